@@ -0,0 +1,337 @@
+"""内容寻址的上传文件存储。
+
+上传的文件按内容的 SHA-256 命名，并按哈希前缀分两级目录存放：
+
+    uploads/ab/cd/abcd…(64 位十六进制).png   ->  URL /uploads/ab/cd/abcd….png
+
+相同内容无论谁上传、用什么文件名，都只落盘一份，URL 也保持不变；单个目录里的文件数
+最多是总数的 1/65536，不会因为一个平铺目录过大而变慢。blobs 表记录每个文件的大小、
+扩展名和引用计数。
+
+引用计数由 collect_garbage 统一重算：扫描 Need.img_urls、Need.video_url、Service.files
+中出现的 blob URL，更新 ref_count，再删除没有任何引用、且上传时间早于宽限期的文件
+（宽限期从最近一次上传算起，保护“刚上传、还没提交表单”的文件）。旧版平铺在 uploads/ 下的文件不受影响。
+超过 SESSION_TTL 没有收到分片的断点续传会话由 expire_sessions 连同分片目录一起删除；两者都由 gc_uploads.py 定期执行。
+"""
+import datetime
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+
+from fastapi import HTTPException
+from python_multipart import MultipartParser
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import parse_options_header
+from sqlalchemy import select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from . import models
+
+UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "uploads")
+# 写入中的临时文件放在同一文件系统下，完成后原子 rename 到最终位置
+TMP_DIR = os.path.join(UPLOAD_DIR, ".tmp")
+os.makedirs(TMP_DIR, exist_ok=True)
+
+# 断点续传会话的分片目录：.sessions/<upload_id>/<index>.part
+SESSION_DIR = os.path.join(UPLOAD_DIR, ".sessions")
+os.makedirs(SESSION_DIR, exist_ok=True)
+
+URL_PREFIX = "/uploads"
+
+# 合并断点续传分片时每次读写的块大小；单个文件的大小上限可用环境变量 HAOFUWU_UPLOAD_MAX_BYTES 覆盖
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_MAX_BYTES = int(os.environ.get("HAOFUWU_UPLOAD_MAX_BYTES") or 500 * 1024 * 1024)
+# multipart 请求体里除文件内容外的 boundary、分段头和普通字段，按 Content-Length 提前拒绝时留出的余量
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# 未被引用的文件至少保留这么久才会被回收
+GC_GRACE_SECONDS = 24 * 3600
+# 断点续传会话多久没有收到分片就过期：过期后各接口返回 410，由 gc_uploads.py 删除会话和分片
+SESSION_TTL = datetime.timedelta(hours=24)
+
+_EXT_RE = re.compile(r"^\.[a-z0-9]{1,10}$")
+# 匹配 URL 中的 blob 路径（相对 / 绝对地址都可以）
+BLOB_URL_RE = re.compile(r"/uploads/([0-9a-f]{2})/([0-9a-f]{2})/([0-9a-f]{64})(\.[a-z0-9]{1,10})?")
+
+
+def normalize_ext(filename: str) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if _EXT_RE.match(ext) else ""
+
+
+def blob_relpath(sha256: str, ext: str = "") -> str:
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+
+def blob_path(sha256: str, ext: str = "") -> str:
+    return os.path.join(UPLOAD_DIR, *blob_relpath(sha256, ext).split("/"))
+
+
+def blob_url(sha256: str, ext: str = "") -> str:
+    return f"{URL_PREFIX}/{blob_relpath(sha256, ext)}"
+
+
+def referenced_hashes(value) -> set:
+    """All blob hashes referenced by a URL string or a JSON value (list / dict) containing URLs."""
+    if not value:
+        return set()
+    if not isinstance(value, str):
+        value = json.dumps(value, ensure_ascii=False)
+    return {m.group(3) for m in BLOB_URL_RE.finditer(value)}
+
+
+async def stream_upload_to_temp(request, field: str = "file", max_bytes: int = None):
+    """Parse a multipart/form-data request body as it arrives and copy the `field` file part into a temp file.
+
+    Returns (tmp_path, size, sha256 hex, filename, content_type). Nothing is spooled first: the body is fed
+    to the multipart parser chunk by chunk straight from request.stream(), so the file is written once and
+    413 is raised as soon as `max_bytes` (default UPLOAD_MAX_BYTES) is exceeded, or before reading anything
+    when Content-Length already says so. Other parts are skipped. The temp file is removed on any failure.
+    """
+    limit = UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    body_limit = limit + MULTIPART_OVERHEAD_BYTES
+    media_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if media_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="请求必须是带 boundary 的 multipart/form-data")
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > body_limit:
+        raise HTTPException(status_code=413, detail=f"文件超过大小上限 {limit} 字节")
+
+    part = {}  # 当前分段：headers 及是否是要保存的文件
+    found = {}
+    pending = []  # 本次 feed 解析出的文件数据，回到协程里再哈希、写盘
+
+    def on_part_begin():
+        part.clear()
+        part.update(headers={}, field=b"", value=b"", target=False)
+
+    def on_header_field(data, start, end):
+        part["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        part["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][part["field"].lower()] = part["value"]
+        part["field"] = part["value"] = b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        if not found and disposition.get(b"name") == field.encode() and b"filename" in disposition:
+            part["target"] = True
+            found["filename"] = disposition[b"filename"].decode("utf-8", "replace")
+            found["content_type"] = part["headers"].get(b"content-type", b"").decode("latin-1") or None
+
+    def on_part_data(data, start, end):
+        if part["target"]:
+            pending.append(data[start:end])
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin, "on_header_field": on_header_field, "on_header_value": on_header_value,
+        "on_header_end": on_header_end, "on_headers_finished": on_headers_finished, "on_part_data": on_part_data,
+    })
+    fd, tmp_path = tempfile.mkstemp(dir=TMP_DIR, prefix="upload-", suffix=".part")
+    hasher = hashlib.sha256()
+    size = received = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in request.stream():
+                received += len(chunk)
+                # 没有 Content-Length（分块传输）时也要限制整个请求体，包括被跳过的分段
+                if received > body_limit:
+                    raise HTTPException(status_code=413, detail=f"文件超过大小上限 {limit} 字节")
+                parser.write(chunk)
+                if not pending:
+                    continue
+                data = b"".join(pending)
+                pending.clear()
+                size += len(data)
+                if size > limit:
+                    raise HTTPException(status_code=413, detail=f"文件超过大小上限 {limit} 字节")
+                hasher.update(data)
+                # 阻塞的磁盘写放到线程池，不卡住事件循环
+                await run_in_threadpool(f.write, data)
+            parser.finalize()
+        if not found:
+            raise HTTPException(status_code=400, detail=f"缺少文件字段 {field}")
+    except FormParserError:
+        os.remove(tmp_path)
+        raise HTTPException(status_code=400, detail="无效的 multipart 数据")
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return tmp_path, size, hasher.hexdigest(), found["filename"], found["content_type"]
+
+
+def session_dir(upload_id: str) -> str:
+    return os.path.join(SESSION_DIR, upload_id)
+
+
+def chunk_path(upload_id: str, index: int) -> str:
+    return os.path.join(session_dir(upload_id), f"{index}.part")
+
+
+def received_chunks(upload_id: str) -> list:
+    d = session_dir(upload_id)
+    if not os.path.isdir(d):
+        return []
+    return sorted(int(name[:-5]) for name in os.listdir(d) if name.endswith(".part") and name[:-5].isdigit())
+
+
+async def write_chunk(body_stream, dest: str, max_bytes: int) -> int:
+    """Stream a request body into `dest` (atomically replaced); return its size, 413 past `max_bytes`."""
+    tmp_path = f"{dest}.{os.getpid()}.{id(body_stream)}.tmp"
+    size = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            async for data in body_stream:
+                if not data:
+                    continue
+                size += len(data)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"分片超过大小 {max_bytes} 字节")
+                await run_in_threadpool(f.write, data)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return size
+
+
+def assemble_chunks(upload_id: str, total_chunks: int):
+    """Concatenate a session's chunks into a temp file block by block; return (tmp_path, size, sha256 hex).
+
+    Blocking: run it in the threadpool. Only UPLOAD_CHUNK_SIZE bytes are held in memory at a time.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=TMP_DIR, prefix="assemble-", suffix=".part")
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for index in range(total_chunks):
+                with open(chunk_path(upload_id, index), "rb") as part:
+                    while True:
+                        block = part.read(UPLOAD_CHUNK_SIZE)
+                        if not block:
+                            break
+                        hasher.update(block)
+                        out.write(block)
+                        size += len(block)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, size, hasher.hexdigest()
+
+
+def remove_session_files(upload_id: str):
+    shutil.rmtree(session_dir(upload_id), ignore_errors=True)
+
+
+def session_expires_at(sess: models.UploadSession) -> datetime.datetime:
+    return sess.update_time + SESSION_TTL
+
+
+def session_expired(sess: models.UploadSession, now: datetime.datetime = None) -> bool:
+    return session_expires_at(sess) <= (now or datetime.datetime.utcnow())
+
+
+def expire_sessions(db: Session, dry_run: bool = False) -> list:
+    """Delete upload sessions idle for longer than SESSION_TTL, with their chunk directories.
+
+    Chunk directories left without a session row (older than SESSION_TTL) are removed too.
+    Returns the ids of the removed (or, with dry_run, removable) sessions and directories.
+    """
+    cutoff = datetime.datetime.utcnow() - SESSION_TTL
+    expired = [row[0] for row in db.query(models.UploadSession.id).filter(models.UploadSession.update_time <= cutoff)]
+    live = {row[0] for row in db.query(models.UploadSession.id)} - set(expired)
+    orphans = [name for name in os.listdir(SESSION_DIR)
+               if name not in live and name not in expired
+               and os.path.getmtime(session_dir(name)) <= cutoff.replace(tzinfo=datetime.timezone.utc).timestamp()]
+    if dry_run:
+        return expired + orphans
+    if expired:
+        db.query(models.UploadSession).filter(models.UploadSession.id.in_(expired)).delete(synchronize_session=False)
+        db.commit()
+    for upload_id in expired + orphans:
+        remove_session_files(upload_id)
+    return expired + orphans
+
+
+def commit_temp(tmp_path: str, sha256: str, ext: str) -> bool:
+    """Move a finished temp file to its content address. Returns False if the blob already existed."""
+    dest = blob_path(sha256, ext)
+    if os.path.exists(dest):
+        os.remove(tmp_path)
+        return False
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    os.replace(tmp_path, dest)
+    return True
+
+
+def register_blob_stmt(sha256: str, ext: str, size: int, content_type: str = None):
+    """Upsert the blobs row (a repeat upload only refreshes last_upload_time); works with sync and async sessions."""
+    tbl = models.Blob.__table__
+    now = datetime.datetime.utcnow()
+    return sqlite_insert(tbl).values(
+        sha256=sha256, ext=ext, size=size, content_type=content_type,
+        ref_count=0, create_time=now, last_upload_time=now,
+    ).on_conflict_do_update(index_elements=[tbl.c.sha256], set_={"last_upload_time": now})
+
+
+def existing_ext_stmt(sha256: str):
+    return select(models.Blob.ext).where(models.Blob.sha256 == sha256)
+
+
+def recount_refs(db: Session) -> dict:
+    """Recompute blobs.ref_count from needs and services; return {sha256: count} for referenced blobs."""
+    counts = {}
+
+    def add(value):
+        for h in referenced_hashes(value):
+            counts[h] = counts.get(h, 0) + 1
+
+    for img_urls, video_url in db.query(models.Need.img_urls, models.Need.video_url):
+        add(img_urls)
+        add(video_url)
+    for (files,) in db.query(models.Service.files):
+        add(files)
+
+    db.execute(update(models.Blob).values(ref_count=0))
+    for sha256, n in counts.items():
+        db.execute(update(models.Blob).where(models.Blob.sha256 == sha256).values(ref_count=n))
+    db.commit()
+    return counts
+
+
+def collect_garbage(db: Session, grace_seconds: int = GC_GRACE_SECONDS, dry_run: bool = False) -> list:
+    """Recount references, then delete unreferenced blobs not uploaded within the last `grace_seconds`.
+
+    Returns the list of removed (or, with dry_run, removable) sha256 hashes.
+    """
+    recount_refs(db)
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=grace_seconds)
+    garbage = db.query(models.Blob).filter(models.Blob.ref_count == 0, models.Blob.last_upload_time <= cutoff).all()
+    removed = []
+    for blob in garbage:
+        removed.append(blob.sha256)
+        if dry_run:
+            continue
+        # 原图和它的派生图（<sha256>.<variant>.jpg）在同一分片目录，一并删除
+        shard = os.path.dirname(blob_path(blob.sha256))
+        if os.path.isdir(shard):
+            for name in os.listdir(shard):
+                if name == blob.sha256 + blob.ext or name.startswith(blob.sha256 + "."):
+                    os.remove(os.path.join(shard, name))
+        db.query(models.BlobDerivative).filter(models.BlobDerivative.sha256 == blob.sha256).delete()
+        db.delete(blob)
+    if not dry_run:
+        db.commit()
+    return removed
@@ -0,0 +1,120 @@
+"""进程内的有界 TTL + LRU 缓存，线程安全（同步路由跑在线程池里）。
+
+- 超过 max_entries 时淘汰最久未使用的条目；条目超过 ttl 秒视为未命中
+- 条目可以带若干标签（tag），invalidate_tag 一次丢弃同一标签下的所有条目
+- 键为元组时以第一个元素作为命名空间，分别统计命中 / 未命中次数
+- read-through 时先取 epoch()，加载完再 put(..., epoch=e)：加载期间若发生过失效，
+  这次结果可能已经过时，put 会直接丢弃，避免把旧数据写回缓存
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tags = {}  # tag -> set(key)
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._by_namespace = {}  # namespace -> [hits, misses]
+
+    @staticmethod
+    def _namespace(key):
+        return key[0] if isinstance(key, tuple) and key else None
+
+    def _count(self, key, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        ns = self._namespace(key)
+        if ns is not None:
+            self._by_namespace.setdefault(ns, [0, 0])[0 if hit else 1] += 1
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return True
+
+    def epoch(self) -> int:
+        with self._lock:
+            return self._epoch
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    self._drop(key)
+                self._count(key, False)
+                return None
+            self._entries.move_to_end(key)
+            self._count(key, True)
+            return entry[1]
+
+    def put(self, key, value, tags=(), epoch: int = None):
+        with self._lock:
+            if epoch is not None and epoch != self._epoch:
+                return False
+            self._drop(key)
+            tags = tuple(tags)
+            self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+            return True
+
+    def invalidate(self, *keys):
+        with self._lock:
+            self._epoch += 1
+            for key in keys:
+                if self._drop(key):
+                    self.invalidations += 1
+
+    def invalidate_tag(self, *tags):
+        with self._lock:
+            self._epoch += 1
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    if self._drop(key):
+                        self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            data = {
+                "size": len(self._entries),
+                "maxEntries": self.max_entries,
+                "ttlSeconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+            if self._by_namespace:
+                data["byNamespace"] = {
+                    ns: {"hits": h, "misses": m, "hitRate": round(h / (h + m), 4) if h + m else 0.0}
+                    for ns, (h, m) in self._by_namespace.items()
+                }
+            return data
@@ -0,0 +1,35 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from backend.database import engine, SessionLocal
+from backend.models import User
+from backend import migrations, querystats
+
+# 应用启动时只检查 schema 版本，测试库在导入 backend.main 之前先升级到最新
+migrations.upgrade(engine)
+
+
+@pytest.fixture
+def sql_queries():
+    """Per-request SQL statistics (querystats.RequestQueries) of the requests made during the test, in order."""
+    with querystats.capture() as finished:
+        yield finished
+
+
+@pytest.fixture
+def ensure_user():
+    """ensure_user(username) -> that User, created with a fake password if missing, detached from its session."""
+    def ensure(username):
+        db = SessionLocal()
+        try:
+            user = db.query(User).filter(User.username == username).first()
+            if not user:
+                user = User(username=username, hashed_password='fake', full_name=username)
+                db.add(user)
+                db.commit()
+                db.refresh(user)
+            db.expunge(user)
+            return user
+        finally:
+            db.close()
+    return ensure
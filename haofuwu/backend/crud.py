@@ -1,6 +1,13 @@
+from sqlalchemy import select, func, tuple_
 from sqlalchemy.orm import Session
-from . import models, schemas, utils
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from . import models, schemas, utils, search, derivatives
+from .response_cache import invalidate_need, invalidate_service
 import datetime
+import base64
+import json
+from collections import Counter
 # 确保导入了 verify_password
 from .utils import verify_password
 
@@ -9,11 +16,10 @@ from .utils import verify_password
 # 用户 (User) 相关逻辑
 # ==========================================
 
-def create_user(db: Session, user_in: schemas.UserCreate):
-    hashed = utils.get_password_hash(user_in.password)
+def _new_user(user_in: schemas.UserCreate, hashed: str) -> models.User:
     now = datetime.datetime.utcnow()
     full_name = user_in.realName if getattr(user_in, 'realName', None) else user_in.full_name
-    db_user = models.User(
+    return models.User(
         username=user_in.username,
         email=user_in.email,
         hashed_password=hashed,
@@ -23,6 +29,10 @@ def create_user(db: Session, user_in: schemas.UserCreate):
         register_time=now,
         update_time=now
     )
+
+
+def create_user(db: Session, user_in: schemas.UserCreate):
+    db_user = _new_user(user_in, utils.get_password_hash(user_in.password))
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
@@ -46,135 +56,283 @@ def authenticate_user(db: Session, username: str, password: str):
     return user
 
 
+# ==========================================
+# 分页游标 (Keyset cursor) 工具
+# ==========================================
+
+def encode_cursor(create_time, row_id):
+    """Encode the (create_time, id) of the last row on a page into an opaque URL-safe token."""
+    if create_time is None or row_id is None:
+        return None
+    raw = json.dumps([create_time.isoformat(), int(row_id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Decode a token produced by encode_cursor. Returns (create_time, id) or None if malformed."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.datetime.fromisoformat(ts), int(row_id)
+    except Exception:
+        return None
+
+
+def _after_cursor(query, model, position):
+    """Restrict a query ordered by (create_time desc, id desc) to rows strictly after `position`."""
+    create_time, row_id = position
+    # 行值比较：SQLite 能直接在 (create_time, id) 复合索引上 SEARCH 定位，
+    # 写成 create_time < ? OR (create_time = ? AND id < ?) 则只能整索引扫描，越往后翻越慢
+    return query.filter(tuple_(model.create_time, model.id) < tuple_(create_time, row_id))
+
+
+def next_cursor(rows, limit, create_time_attr="create_time"):
+    """Return the cursor for the page following `rows`, or None when this was the last page."""
+    if not limit or len(rows) < limit:
+        return None
+    last = rows[-1]
+    if isinstance(last, dict):
+        return encode_cursor(last[create_time_attr], last["id"])
+    return encode_cursor(getattr(last, create_time_attr), last.id)
+
+
+# ==========================================
+# 批量接口工具
+# ==========================================
+
+# 批量创建 / 批量查询单次最多处理的条数
+BATCH_MAX_ITEMS = 200
+
+
+def parse_id_list(ids: str):
+    """Parse an `ids=1,2,3` query value into a de-duplicated list of ints (request order). None if malformed."""
+    if not ids:
+        return []
+    try:
+        parsed = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        return None
+    return list(dict.fromkeys(parsed))
+
+
 # ==========================================
 # 需求 (Need) 相关逻辑
 # ==========================================
 
-def create_need(db: Session, user_id: int, need_in: schemas.NeedCreate):
-    import datetime
+def _new_need(user_id: int, need_in: schemas.NeedCreate, now: datetime.datetime) -> models.Need:
     # 前端会传 imgUrls 作为数组，直接存入 JSON 列
-    img_list = need_in.imgUrls if need_in.imgUrls else []
-
-    db_need = models.Need(
+    return models.Need(
         owner_id=user_id,
         title=need_in.title,
         service_type=need_in.serviceType,
         region=need_in.region,
         description=need_in.description,
-        img_urls=img_list,
+        img_urls=need_in.imgUrls if need_in.imgUrls else [],
         video_url=need_in.videoUrl,
         status=0,  # 0=发布中
-        create_time=datetime.datetime.now(),
-        update_time=datetime.datetime.now()
+        create_time=now,
+        update_time=now
     )
+
+
+def create_need(db: Session, user_id: int, need_in: schemas.NeedCreate):
+    db_need = _new_need(user_id, need_in, datetime.datetime.now())
     db.add(db_need)
+    _bump_monthly_stat(db, db_need.create_time, db_need.region, needs=1)
     db.commit()
     db.refresh(db_need)
     return db_need
 
 
+def create_needs(db: Session, user_id: int, needs_in):
+    """Insert several needs in one transaction (one flush, one commit). Returns their ids in input order."""
+    now = datetime.datetime.now()
+    db_needs = [_new_need(user_id, need_in, now) for need_in in needs_in]
+    db.add_all(db_needs)
+    # 月度统计按地域合并成每个地域一次 upsert
+    for region, count in Counter(n.region for n in db_needs).items():
+        _bump_monthly_stat(db, now, region, needs=count)
+    db.flush()
+    # 提交前取 id：提交后实例会过期，再读属性会逐条 SELECT
+    ids = [n.id for n in db_needs]
+    db.commit()
+    return ids
+
+
 def get_need(db: Session, need_id: int):
     return db.query(models.Need).filter(models.Need.id == need_id).first()
 
 
-def get_needs(db: Session, skip: int = 0, limit: int = 10):
-    # 返回序列化后的 NeedOut 列表，避免 FastAPI 的 response_model 校验失败
-    query = db.query(models.Need).order_by(models.Need.create_time.desc()).offset(skip).limit(limit)
-    needs = query.all()
+def get_needs_by_ids(db: Session, need_ids):
+    """{id: Need} for the given ids, loaded with one IN query."""
+    if not need_ids:
+        return {}
+    return {n.id: n for n in db.query(models.Need).filter(models.Need.id.in_(need_ids))}
+
+
+# 列表只查这些列，结果是轻量的 Row 元组，不进 identity map；summary 模式再去掉大字段 description
+_NEED_FEED_COLUMNS = (
+    models.Need.id,
+    models.Need.title,
+    models.Need.description,
+    models.Need.region,
+    models.Need.service_type,
+    models.Need.img_urls,
+    models.Need.video_url,
+    models.Need.status,
+    models.Need.owner_id,
+    models.Need.create_time,
+    models.Need.response_count,
+    models.Need.accepted_service_id,
+    models.User.username.label("user_name"),
+)
+_NEED_HEAVY_COLUMNS = ("description",)
+
+
+def _need_feed_select(summary: bool = False):
+    """Build the set-based feed statement: one SELECT returning each need together with
+    its publisher username and the denormalised response counters.
+
+    summary=True leaves out the heavy Text columns; rows then lack those attributes.
+    """
+    columns = _NEED_FEED_COLUMNS
+    if summary:
+        columns = [c for c in columns if c.key not in _NEED_HEAVY_COLUMNS]
+    return (
+        select(*columns)
+        .select_from(models.Need)
+        .outerjoin(models.User, models.User.id == models.Need.owner_id)
+    )
 
-    results = []
-    for n in needs:
-        img_list = n.img_urls if getattr(n, 'img_urls', None) else []
-        has_resp = False
-        if hasattr(n, 'responses') and n.responses:
-            has_resp = len(n.responses) > 0
-        # get username from relationship if available
-        username = None
-        try:
-            username = n.owner.username if getattr(n, 'owner', None) else None
-        except Exception:
-            username = None
-        # fallback: try fetching user from DB if owner relationship not available
-        if not username and getattr(n, 'owner_id', None):
-            try:
-                user = get_user_by_id(db, n.owner_id)
-                username = user.username if user else None
-            except Exception:
-                username = None
-        results.append(schemas.NeedOut(
-            id=n.id,
-            title=n.title,
-            description=n.description,
-            region=n.region,
-            serviceType=n.service_type,
-            imgUrls=img_list,
-            videoUrl=n.video_url,
-            status=int(n.status) if n.status is not None else 0,
-            hasResponse=has_resp,
-            userId=n.owner_id,
-            userName=username,
-            createTime=n.create_time
-        ))
-    return results
 
+def _need_dict_from_row(row, summary: bool = False):
+    """Feed row -> plain dict with exactly the fields (and order) of schemas.NeedOut.
 
-def get_needs_my_list(db: Session, user_id: int, keyword: str = None, service_type: str = None):
-    # 查询当前用户发布的需求
-    query = db.query(models.Need).filter(models.Need.owner_id == user_id)
+    Mirrors NeedOut's validators (imgUrls None/str -> list, userId falsy -> 0) so the fast JSON path
+    produces the same body as serialising NeedOut, without constructing the model.
+    With summary=True the row comes from a summary select and `description` is omitted.
+    """
+    img_urls = row.img_urls
+    if not img_urls:
+        img_urls = []
+    elif isinstance(img_urls, str):
+        img_urls = img_urls.split(',')
+    data = {"id": row.id, "title": row.title}
+    if not summary:
+        data["description"] = row.description
+    data.update({
+        "region": row.region,
+        "serviceType": row.service_type,
+        "imgUrls": img_urls,
+        "thumbUrls": derivatives.thumbnail_urls(img_urls),
+        "videoUrl": row.video_url,
+        "status": int(row.status) if row.status is not None else 0,
+        "hasResponse": bool(row.response_count),
+        "hasAccepted": row.accepted_service_id is not None,
+        "userId": row.owner_id or 0,
+        "userName": row.user_name,
+        "createTime": row.create_time,
+    })
+    return data
+
+
+def _need_out_from_row(row):
+    return schemas.NeedOut(**_need_dict_from_row(row))
+
+
+def _need_page(stmt, skip: int = 0, limit: int = None, after=None):
+    """Order `stmt` newest first and page it by offset or cursor (uses ix_needs_create_time_id)."""
+    if after:
+        stmt = _after_cursor(stmt, models.Need, after)
+    elif skip:
+        stmt = stmt.offset(skip)
+    stmt = stmt.order_by(models.Need.create_time.desc(), models.Need.id.desc())
+    if limit:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def _paged_need_feed(conditions, skip: int = 0, limit: int = None, after=None, summary: bool = False):
+    """Feed statement filtered by `conditions`, ordered newest first and paged by offset or cursor."""
+    return _need_page(_need_feed_select(summary).where(*conditions), skip=skip, limit=limit, after=after)
+
+
+def _my_list_conditions(user_id: int, keyword: str = None, service_type: str = None):
+    conditions = [models.Need.owner_id == user_id]
     if keyword:
-        query = query.filter(models.Need.title.contains(keyword))
+        conditions.append(search.keyword_filter(models.Need, keyword))
     if service_type:
-        query = query.filter(models.Need.service_type == service_type)
+        conditions.append(models.Need.service_type == service_type)
+    return conditions
 
-    needs = query.order_by(models.Need.create_time.desc()).all()
 
-    # 转换为 Schema 格式返回
-    results = []
-    for n in needs:
-        # img_urls 字段现在已经是列表或 None
-        img_list = n.img_urls if n.img_urls else []
-
-        # 简单判断是否有响应
-        has_resp = False
-        if hasattr(n, 'responses') and n.responses:
-            has_resp = len(n.responses) > 0
-
-        # publisher username
-        username = None
-        try:
-            username = n.owner.username if getattr(n, 'owner', None) else None
-        except Exception:
-            username = None
-        # fallback: try fetching user from DB if owner relationship not available
-        if not username and getattr(n, 'owner_id', None):
-            try:
-                user = get_user_by_id(db, n.owner_id)
-                username = user.username if user else None
-            except Exception:
-                username = None
-
-        # 构造 NeedOut 对象
-        results.append(schemas.NeedOut(
-            id=n.id,
-            title=n.title,
-            description=n.description,
-            region=n.region,
-            serviceType=n.service_type,
-            imgUrls=img_list,
-            videoUrl=n.video_url,
-            status=int(n.status) if n.status is not None else 0,
-            hasResponse=has_resp,
-            userId=n.owner_id,
-            userName=username,
-            createTime=n.create_time
-        ))
-    return results
+def _need_detail_select(need_id: int):
+    return _need_details_select(models.Need.id == need_id)
+
+
+def _need_details_select(condition):
+    # 需求本身 + 发布者用户名，一条 SQL
+    return (
+        select(models.Need, models.User.username)
+        .outerjoin(models.User, models.User.id == models.Need.owner_id)
+        .where(condition)
+    )
+
+
+def _need_validator_select(conditions, skip: int = 0, limit: int = None, after=None):
+    """Aggregates over exactly the rows of one listing page; they change whenever that page would.
+
+    The page is the same ordered, LIMITed / cursor subquery the listing reads, so this costs about
+    as much as the page itself instead of a pass over the whole table. Every field is folded in as
+    an id-weighted sum rather than a max: counter maintenance keeps update_time untouched, and
+    update_time itself mixes local (create/update) and UTC (onupdate) clocks, so neither a status
+    change nor an edit is guaranteed to move max(update_time).
+    """
+    N = models.Need
+    page = _need_page(
+        select(N.id, N.status, N.update_time, N.response_count, N.accepted_service_id).where(*conditions),
+        skip=skip, limit=limit, after=after,
+    ).subquery()
+    return select(
+        func.count(page.c.id), func.total(page.c.id), func.total(page.c.status * page.c.id),
+        func.total(func.julianday(page.c.update_time) * page.c.id),
+        func.total(page.c.response_count * page.c.id), func.total(page.c.accepted_service_id),
+    )
+
+
+def get_needs(db: Session, skip: int = 0, limit: int = 10, after=None):
+    # 返回序列化后的 NeedOut 列表（含 hasResponse / hasAccepted），整页只发一条 SQL
+    # after: decode_cursor 得到的 (create_time, id)，给出时按游标翻页并忽略 skip
+    stmt = _paged_need_feed([], skip=skip, limit=limit, after=after)
+    return [_need_out_from_row(row) for row in db.execute(stmt)]
+
+
+def get_needs_my_list(db: Session, user_id: int, keyword: str = None, service_type: str = None,
+                      skip: int = 0, limit: int = None, after=None):
+    """Return (records, total) for the needs owned by user_id.
+
+    Filtering, COUNT(*) and paging all run in SQL; only the requested page is turned into NeedOut.
+    """
+    conditions = _my_list_conditions(user_id, keyword, service_type)
+    total = db.execute(select(func.count(models.Need.id)).where(*conditions)).scalar() or 0
+    stmt = _paged_need_feed(conditions, skip=skip, limit=limit, after=after)
+    records = [_need_out_from_row(row) for row in db.execute(stmt)]
+    return records, total
+
+
+def get_need_detail(db: Session, need_id: int):
+    """Return (need, publisher_username) or None."""
+    return db.execute(_need_detail_select(need_id)).first()
 
 
 def update_need(db: Session, need_id: int, need_in: schemas.NeedCreate):
     import datetime
     db_need = get_need(db, need_id)
     if db_need:
+        if (db_need.region or "") != (need_in.region or ""):
+            _move_need_stats(db, db_need, need_in.region)
         db_need.title = need_in.title
         db_need.service_type = need_in.serviceType
         db_need.region = need_in.region
@@ -184,6 +342,7 @@ def update_need(db: Session, need_id: int, need_in: schemas.NeedCreate):
         db_need.video_url = need_in.videoUrl
         db_need.update_time = datetime.datetime.now()
         db.commit()
+        invalidate_need(need_id)
         db.refresh(db_need)
     return db_need
 
@@ -193,87 +352,266 @@ def cancel_need(db: Session, need_id: int):
     if db_need:
         db_need.status = 2  # 2=已取消
         db.commit()
+        invalidate_need(need_id)
     return db_need
 
 
 def delete_need(db: Session, need_id: int):
     db_need = get_need(db, need_id)
     if db_need:
+        # 需求删除后，其已接受响应在统计中不再有地域（与实时聚合时 join 不到需求的口径一致）
+        _move_need_stats(db, db_need, None, drop_need=True)
         db.delete(db_need)
         db.commit()
+        invalidate_need(need_id)
     return True
 
 
+# ==========================================
+# 需求冗余计数 (response_count / pending_count / accepted_service_id)
+# ==========================================
+
+def _update_need_counters(db: Session, need_id: int, values: dict, *criteria):
+    # 计数变化不算需求被修改：显式保留 update_time，避免触发 onupdate
+    values = dict(values)
+    values[models.Need.update_time] = models.Need.update_time
+    db.query(models.Need).filter(models.Need.id == need_id, *criteria).update(values, synchronize_session=False)
+
+
+def _bump_need_counters(db: Session, need_id: int, responses: int = 0, pending: int = 0):
+    """Atomically adjust a need's counters inside the caller's transaction (no commit)."""
+    if not need_id or (not responses and not pending):
+        return
+    _update_need_counters(db, need_id, {
+        models.Need.response_count: models.Need.response_count + responses,
+        models.Need.pending_count: models.Need.pending_count + pending,
+    })
+
+
+def _detach_service_from_need(db: Session, svc: models.Service):
+    """Remove svc's contribution from its need's counters (used on delete / need change)."""
+    if not svc.need_id:
+        return
+    status = int(svc.status) if svc.status is not None else 0
+    _bump_need_counters(db, svc.need_id, responses=-1, pending=-1 if status == 0 else 0)
+    if status == 1:
+        _update_need_counters(db, svc.need_id, {models.Need.accepted_service_id: None},
+                              models.Need.accepted_service_id == svc.id)
+
+
+def _attach_service_to_need(db: Session, svc: models.Service):
+    if not svc.need_id:
+        return
+    status = int(svc.status) if svc.status is not None else 0
+    _bump_need_counters(db, svc.need_id, responses=1, pending=1 if status == 0 else 0)
+    if status == 1:
+        _update_need_counters(db, svc.need_id, {models.Need.accepted_service_id: svc.id})
+
+
+def recompute_need_counters(db: Session):
+    """Recompute response_count / pending_count / accepted_service_id for every need in bulk.
+
+    Repair path for rows written outside crud (imports, manual SQL). Returns the number of needs updated.
+    """
+    svc = models.Service
+    response_count = select(func.count(svc.id)).where(svc.need_id == models.Need.id).scalar_subquery()
+    pending_count = select(func.count(svc.id)).where(svc.need_id == models.Need.id,
+                                                     svc.status == 0).scalar_subquery()
+    accepted_id = select(func.max(svc.id)).where(svc.need_id == models.Need.id,
+                                                 svc.status == 1).scalar_subquery()
+    updated = db.query(models.Need).update({
+        models.Need.response_count: response_count,
+        models.Need.pending_count: pending_count,
+        models.Need.accepted_service_id: accepted_id,
+        models.Need.update_time: models.Need.update_time,
+    }, synchronize_session=False)
+    db.commit()
+    return updated
+
+
+# ==========================================
+# 月度统计汇总 (stats_monthly) 维护
+# ==========================================
+
+def _month_of(when):
+    return (when or datetime.datetime.now()).strftime("%Y-%m")
+
+
+def _bump_monthly_stat(db: Session, when, region, needs: int = 0, services: int = 0):
+    """Add deltas to the (month, region) rollup row inside the caller's transaction (upsert)."""
+    if not needs and not services:
+        return
+    tbl = models.MonthlyStat.__table__
+    stmt = sqlite_insert(tbl).values(month=_month_of(when), region=region or "",
+                                     need_count=needs, service_success_count=services)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[tbl.c.month, tbl.c.region],
+        set_={"need_count": tbl.c.need_count + needs,
+              "service_success_count": tbl.c.service_success_count + services})
+    db.execute(stmt)
+
+
+def _accepted_services_of(db: Session, need_id: int):
+    return db.query(models.Service).filter(models.Service.need_id == need_id, models.Service.status == 1).all()
+
+
+def _move_need_stats(db: Session, need: models.Need, new_region, drop_need: bool = False):
+    """Move a need (and its accepted responses) from its current region to new_region in the rollup."""
+    _bump_monthly_stat(db, need.create_time, need.region, needs=-1)
+    if not drop_need:
+        _bump_monthly_stat(db, need.create_time, new_region, needs=1)
+    for svc in _accepted_services_of(db, need.id):
+        _bump_monthly_stat(db, svc.create_time, need.region, services=-1)
+        _bump_monthly_stat(db, svc.create_time, new_region, services=1)
+
+
+def _service_region(db: Session, svc: models.Service):
+    need = get_need(db, svc.need_id) if svc.need_id else None
+    return need.region if need else None
+
+
+def rebuild_monthly_stats(db: Session):
+    """Backfill: recompute the whole stats_monthly table from needs and accepted services.
+
+    Returns the number of (month, region) rows written.
+    """
+    db.query(models.MonthlyStat).delete(synchronize_session=False)
+    rows = {}
+    need_month = func.strftime("%Y-%m", models.Need.create_time)
+    for month, region, cnt in db.query(need_month, func.coalesce(models.Need.region, ""), func.count(models.Need.id)) \
+            .filter(models.Need.create_time.isnot(None)).group_by(need_month, func.coalesce(models.Need.region, "")):
+        rows[(month, region)] = [cnt, 0]
+    svc_month = func.strftime("%Y-%m", models.Service.create_time)
+    svc_region = func.coalesce(models.Need.region, "")
+    for month, region, cnt in db.query(svc_month, svc_region, func.count(models.Service.id)) \
+            .outerjoin(models.Need, models.Need.id == models.Service.need_id) \
+            .filter(models.Service.status == 1, models.Service.create_time.isnot(None)) \
+            .group_by(svc_month, svc_region):
+        rows.setdefault((month, region), [0, 0])[1] = cnt
+    db.bulk_insert_mappings(models.MonthlyStat, [
+        {"month": m, "region": r, "need_count": n, "service_success_count": c} for (m, r), (n, c) in rows.items()
+    ])
+    db.commit()
+    return len(rows)
+
+
 # ==========================================
 # 服务 (Service) 相关逻辑
 # ==========================================
 
-def create_service(db: Session, owner_id: int, svc_in: schemas.ServiceCreate):
+def _new_service(owner_id: int, svc_in: schemas.ServiceCreate) -> models.Service:
     # files 使用 JSON 存储（前端会传数组对象）
-    files_val = svc_in.files if svc_in.files else []
-
-    db_svc = models.Service(
+    return models.Service(
         title=svc_in.title,
         content=svc_in.content,
         service_type=svc_in.serviceType,
-        files=files_val,
+        files=svc_in.files if svc_in.files else [],
         need_id=svc_in.needId,
         owner_id=owner_id,
         status=0
     )
+
+
+def create_service(db: Session, owner_id: int, svc_in: schemas.ServiceCreate):
+    db_svc = _new_service(owner_id, svc_in)
     db.add(db_svc)
+    # 新响应计入需求的响应数与待处理数，与插入在同一事务提交
+    _bump_need_counters(db, db_svc.need_id, responses=1, pending=1)
     db.commit()
+    # 需求详情里的 hasResponse 变了
+    invalidate_need(db_svc.need_id)
     db.refresh(db_svc)
     return db_svc
 
 
-def get_service_list(db: Session, keyword: str = None, service_type: str = None):
-    query = db.query(models.Service)
+def create_services(db: Session, owner_id: int, services_in):
+    """Insert several services in one transaction (one flush, one commit). Returns their ids in input order.
+
+    Callers validate the target needs first (see routers/services.py); counters are bumped once per need.
+    """
+    db_svcs = [_new_service(owner_id, svc_in) for svc_in in services_in]
+    db.add_all(db_svcs)
+    per_need = Counter(svc.need_id for svc in db_svcs if svc.need_id)
+    for need_id, count in per_need.items():
+        _bump_need_counters(db, need_id, responses=count, pending=count)
+    db.flush()
+    ids = [svc.id for svc in db_svcs]
+    db.commit()
+    invalidate_need(*per_need)
+    return ids
+
+
+_SERVICE_LIST_COLUMNS = (
+    models.Service.id, models.Service.need_id, models.Service.title, models.Service.service_type,
+    models.Service.content, models.Service.status, models.Service.owner_id, models.Service.create_time,
+)
+_SERVICE_HEAVY_COLUMNS = ("content",)
+
+
+def _service_columns(summary: bool = False):
+    if summary:
+        return [c for c in _SERVICE_LIST_COLUMNS if c.key not in _SERVICE_HEAVY_COLUMNS]
+    return list(_SERVICE_LIST_COLUMNS)
+
+
+def _service_dict_from_row(row, summary: bool = False):
+    # 字段与 schemas.ServiceOut 一致，供快速 JSON 输出直接编码；summary 模式不含 content
+    data = {
+        "id": row.id,
+        "need_id": row.need_id,
+        "title": row.title,
+        "service_type": row.service_type,
+    }
+    if not summary:
+        data["content"] = row.content
+    data.update({
+        "status": int(row.status) if row.status is not None else 0,
+        "user_id": row.owner_id,
+        "create_time": row.create_time,
+    })
+    return data
+
+
+def get_service_list(db: Session, keyword: str = None, service_type: str = None,
+                     skip: int = 0, limit: int = None, after=None, summary: bool = False):
+    # 只查列表需要的列，不加载 ORM 实体
+    query = db.query(*_service_columns(summary))
     if keyword:
-        query = query.filter(models.Service.title.contains(keyword))
+        query = query.filter(search.keyword_filter(models.Service, keyword))
     if service_type:
         query = query.filter(models.Service.service_type == service_type)
+    if after:
+        query = _after_cursor(query, models.Service, after)
+    elif skip:
+        query = query.offset(skip)
 
-    services = query.order_by(models.Service.create_time.desc()).all()
-
-    results = []
-    for s in services:
-        results.append(schemas.ServiceOut(
-            id=s.id,
-            need_id=s.need_id,
-            title=s.title,
-            service_type=s.service_type,
-            content=s.content,
-            status=int(s.status) if s.status is not None else 0,
-            user_id=s.owner_id,
-            create_time=s.create_time
-        ))
-    return results
+    query = query.order_by(models.Service.create_time.desc(), models.Service.id.desc())
+    if limit:
+        query = query.limit(limit)
+    return [_service_dict_from_row(row, summary) for row in query]
 
 
 def get_service(db: Session, service_id: int):
     return db.query(models.Service).filter(models.Service.id == service_id).first()
 
 
-def get_my_service_list(db: Session, user_id: int):
-    # 1. 查数据库：找 owner_id 是我的服务
-    services = db.query(models.Service).filter(models.Service.owner_id == user_id).order_by(
-        models.Service.create_time.desc()).all()
+def get_service_details(db: Session, service_ids):
+    """(Service, need title, owner username) rows for the given ids in one joined IN query."""
+    if not service_ids:
+        return []
+    return db.execute(
+        select(models.Service, models.Need.title, models.User.username)
+        .outerjoin(models.Need, models.Need.id == models.Service.need_id)
+        .outerjoin(models.User, models.User.id == models.Service.owner_id)
+        .where(models.Service.id.in_(service_ids))
+    ).all()
 
-    # 2. 转换成 Schema 格式 (ServiceOut)
-    results = []
-    for s in services:
-        results.append(schemas.ServiceOut(
-            id=s.id,
-            need_id=s.need_id,
-            title=s.title,
-            service_type=s.service_type,
-            content=s.content,
-            status=int(s.status) if s.status is not None else 0,
-            user_id=s.owner_id,
-            create_time=s.create_time
-        ))
-    return results
+
+def get_my_service_list(db: Session, user_id: int, summary: bool = False):
+    # 查 owner_id 是我的服务，直接转换成与 ServiceOut 字段一致的 dict
+    rows = db.query(*_service_columns(summary)).filter(models.Service.owner_id == user_id).order_by(
+        models.Service.create_time.desc())
+    return [_service_dict_from_row(row, summary) for row in rows]
 
 
 def update_service(db: Session, service_id: int, owner_id: int, svc_in: schemas.ServiceCreate):
@@ -287,6 +625,7 @@ def update_service(db: Session, service_id: int, owner_id: int, svc_in: schemas.
         # caller should check permissions and return appropriate response
         return False
 
+    old_need_id = db_svc.need_id
     # Update only provided fields
     if getattr(svc_in, 'title', None) is not None:
         db_svc.title = svc_in.title
@@ -296,43 +635,81 @@ def update_service(db: Session, service_id: int, owner_id: int, svc_in: schemas.
         db_svc.service_type = svc_in.serviceType
     if getattr(svc_in, 'files', None) is not None:
         db_svc.files = svc_in.files
-    if getattr(svc_in, 'needId', None) is not None:
+    if getattr(svc_in, 'needId', None) is not None and svc_in.needId != db_svc.need_id:
+        # 响应改挂到另一个需求：计数从旧需求移到新需求
+        _detach_service_from_need(db, db_svc)
+        if db_svc.status == 1:
+            _bump_monthly_stat(db, db_svc.create_time, _service_region(db, db_svc), services=-1)
         db_svc.need_id = svc_in.needId
+        _attach_service_to_need(db, db_svc)
+        if db_svc.status == 1:
+            _bump_monthly_stat(db, db_svc.create_time, _service_region(db, db_svc), services=1)
 
     db.commit()
+    invalidate_service(service_id, old_need_id, db_svc.need_id)
     db.refresh(db_svc)
     return db_svc
 
 
-def get_services_by_need(db: Session, need_id: int):
-    """Return a list of service dicts for a given need id, including publisher username."""
-    query = db.query(models.Service).filter(models.Service.need_id == need_id)
-    services = query.order_by(models.Service.create_time.desc()).all()
+def delete_service(db: Session, service_id: int, owner_id: int):
+    """Delete a service record. Only the owner may delete their service.
+    Returns True on success, False on permission error, None if service not found.
+    """
+    db_svc = get_service(db, service_id)
+    if not db_svc:
+        return None
+    if db_svc.owner_id != owner_id:
+        return False
+    _detach_service_from_need(db, db_svc)
+    if db_svc.status == 1:
+        _bump_monthly_stat(db, db_svc.create_time, _service_region(db, db_svc), services=-1)
+    need_id = db_svc.need_id
+    db.delete(db_svc)
+    db.commit()
+    invalidate_service(service_id, need_id)
+    return True
+
+
+def services_by_need_validator(db: Session, need_id: int):
+    """Cheap aggregate over a need's responses, used as the ETag source for /by-need/{id}."""
+    S = models.Service
+    return tuple(db.execute(select(
+        func.count(S.id), func.max(S.id), func.max(S.update_time), func.total(S.status * S.id),
+    ).where(S.need_id == need_id)).one())
+
+
+def get_services_by_need(db: Session, need_id: int, summary: bool = False):
+    """Return a list of service dicts for a given need id, including publisher username.
+
+    One projected SELECT joined to users (no entity loads, no per-row owner lookups);
+    summary=True omits `content`.
+    """
+    S = models.Service
+    columns = _service_columns(summary) + [models.User.username.label("user_name")]
+    rows = db.execute(
+        select(*columns).select_from(S)
+        .outerjoin(models.User, models.User.id == S.owner_id)
+        .where(S.need_id == need_id)
+        .order_by(S.create_time.desc())
+    )
     results = []
-    for s in services:
-        username = None
-        try:
-            username = s.owner.username if getattr(s, 'owner', None) else None
-        except Exception:
-            username = None
-        if not username and getattr(s, 'owner_id', None):
-            try:
-                user = get_user_by_id(db, s.owner_id)
-                username = user.username if user else None
-            except Exception:
-                username = None
-        results.append({
-            'id': s.id,
-            'serviceId': s.id,
-            'needId': s.need_id,
-            'serviceType': s.service_type,
-            'title': s.title,
-            'content': s.content,
-            'status': int(s.status) if s.status is not None else 0,
-            'userId': s.owner_id,
-            'userName': username or '',
-            'createTime': s.create_time
+    for r in rows:
+        item = {
+            'id': r.id,
+            'serviceId': r.id,
+            'needId': r.need_id,
+            'serviceType': r.service_type,
+            'title': r.title,
+        }
+        if not summary:
+            item['content'] = r.content
+        item.update({
+            'status': int(r.status) if r.status is not None else 0,
+            'userId': r.owner_id,
+            'userName': r.user_name or '',
+            'createTime': r.create_time
         })
+        results.append(item)
     return results
 
 
@@ -351,13 +728,22 @@ def accept_service(db: Session, service_id: int, need_owner_id: int):
     if not need or need.owner_id != need_owner_id:
         return False
 
+    # 统计：之前被接受的其它响应被改为拒绝，本条首次被接受时计入
+    for prev in _accepted_services_of(db, need.id):
+        if prev.id != svc.id:
+            _bump_monthly_stat(db, prev.create_time, need.region, services=-1)
+    if svc.status != 1:
+        _bump_monthly_stat(db, svc.create_time, need.region, services=1)
     # set chosen service to accepted
     svc.status = 1
     # set other services for the same need to rejected
-    others = db.query(models.Service).filter(models.Service.need_id == svc.need_id, models.Service.id != svc.id).all()
-    for o in others:
-        o.status = 2
+    db.query(models.Service).filter(models.Service.need_id == svc.need_id, models.Service.id != svc.id).update(
+        {models.Service.status: 2}, synchronize_session=False)
+    # 接受后没有待处理的响应了
+    _update_need_counters(db, need.id, {models.Need.pending_count: 0, models.Need.accepted_service_id: svc.id})
     db.commit()
+    # 同一需求下其它响应也被改为拒绝，按需求标签一并失效
+    invalidate_service(service_id, need.id)
     db.refresh(svc)
     return True
 
@@ -375,7 +761,82 @@ def reject_service(db: Session, service_id: int, need_owner_id: int):
     if not need or need.owner_id != need_owner_id:
         return False
 
+    status = int(svc.status) if svc.status is not None else 0
+    if status == 0:
+        _bump_need_counters(db, need.id, pending=-1)
+    elif status == 1:
+        _update_need_counters(db, need.id, {models.Need.accepted_service_id: None},
+                              models.Need.accepted_service_id == svc.id)
+        _bump_monthly_stat(db, svc.create_time, need.region, services=-1)
     svc.status = 2
     db.commit()
+    invalidate_service(service_id, need.id)
     db.refresh(svc)
     return True
+
+
+# ==========================================
+# 异步 (Async) 查询：供 async 路由使用，与上面的同步版本共用同一组 SQL 语句
+# ==========================================
+
+async def get_user_by_username_async(db: AsyncSession, username: str):
+    result = await db.execute(select(models.User).where(models.User.username == username))
+    return result.scalars().first()
+
+
+async def create_user_async(db: AsyncSession, user_in: schemas.UserCreate):
+    # 哈希在进程池中计算，事件循环只等待结果
+    db_user = _new_user(user_in, await utils.get_password_hash_async(user_in.password))
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+
+async def authenticate_user_async(db: AsyncSession, username: str, password: str):
+    user = await get_user_by_username_async(db, username)
+    if not user:
+        return False
+    if not await utils.verify_password_async(password, user.hashed_password):
+        return False
+    return user
+
+
+async def need_feed_validator_async(db: AsyncSession, skip: int = 0, limit: int = 10, after=None):
+    return tuple((await db.execute(_need_validator_select([], skip=skip, limit=limit, after=after))).one())
+
+
+async def need_my_list_validator_async(db: AsyncSession, user_id: int, keyword: str = None, service_type: str = None,
+                                       skip: int = 0, limit: int = None, after=None):
+    # 响应体里还有 total：页外的增删只改变总数，所以总数也计入校验值
+    conditions = _my_list_conditions(user_id, keyword, service_type)
+    total = (await db.execute(select(func.count(models.Need.id)).where(*conditions))).scalar() or 0
+    page = (await db.execute(_need_validator_select(conditions, skip=skip, limit=limit, after=after))).one()
+    return (total,) + tuple(page)
+
+
+async def get_needs_async(db: AsyncSession, skip: int = 0, limit: int = 10, after=None, summary: bool = False):
+    # 路由走快速 JSON 输出：返回与 NeedOut 字段一致的 dict，不构造 pydantic 模型
+    result = await db.execute(_paged_need_feed([], skip=skip, limit=limit, after=after, summary=summary))
+    return [_need_dict_from_row(row, summary) for row in result]
+
+
+async def get_needs_my_list_async(db: AsyncSession, user_id: int, keyword: str = None, service_type: str = None,
+                                  skip: int = 0, limit: int = None, after=None, summary: bool = False, total: int = None):
+    # total：调用方已算过（如 need_my_list_validator_async 的第一项）时直接传入，省一次 COUNT
+    conditions = _my_list_conditions(user_id, keyword, service_type)
+    if total is None:
+        total = (await db.execute(select(func.count(models.Need.id)).where(*conditions))).scalar() or 0
+    result = await db.execute(_paged_need_feed(conditions, skip=skip, limit=limit, after=after, summary=summary))
+    return [_need_dict_from_row(row, summary) for row in result], total
+
+
+async def get_need_detail_async(db: AsyncSession, need_id: int):
+    return (await db.execute(_need_detail_select(need_id))).first()
+
+
+async def get_need_details_async(db: AsyncSession, need_ids):
+    """(Need, owner username) rows for the given ids in one IN query (batch form of get_need_detail_async)."""
+    if not need_ids:
+        return []
+    return (await db.execute(_need_details_select(models.Need.id.in_(need_ids)))).all()
@@ -0,0 +1,168 @@
+"""需求图片的派生图（缩略图 / 网页优化图）。
+
+图片上传成功后，schedule() 把生成任务交给一个有界的线程池在后台执行；每种派生图只
+生成一次，以 <sha256>.<variant>.jpg 的名字缓存在原图所在的分片目录，并登记到
+blob_derivatives 表。访问 /api/upload/derivative/<variant>/<sha256> 时若文件缺失
+（例如被手工清理、后台任务还没跑完），会当场重新生成。
+
+Pillow 是可选依赖：未安装时不生成派生图，thumbnail_urls 直接返回原图地址。
+"""
+import datetime
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from . import blobstore, models
+from .database import SessionLocal
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:  # pragma: no cover - 取决于部署环境
+    PIL_AVAILABLE = False
+
+logger = logging.getLogger("uvicorn.error")
+
+# 派生图名称 -> (最长边像素, JPEG 质量)
+VARIANTS = {
+    "thumb": (320, 75),
+    "web": (1280, 82),
+}
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp"}
+
+# 后台生成派生图的线程数（Pillow 缩放时会释放 GIL）
+DERIVATIVE_WORKERS = 2
+
+_pool = None
+_pending = set()
+_lock = threading.Lock()
+
+
+def derivative_path(sha256: str, variant: str) -> str:
+    return os.path.join(os.path.dirname(blobstore.blob_path(sha256)), f"{sha256}.{variant}.jpg")
+
+
+def derivative_url(sha256: str, variant: str) -> str:
+    return f"/api/upload/derivative/{variant}/{sha256}"
+
+
+def is_image_ext(ext: str) -> bool:
+    return (ext or "").lower() in IMAGE_EXTS
+
+
+def thumbnail_urls(img_urls) -> list:
+    """Thumbnail URL for each image URL; non-blob (legacy) URLs are returned unchanged."""
+    if isinstance(img_urls, str):
+        img_urls = img_urls.split(',') if img_urls else []
+    result = []
+    for url in img_urls or []:
+        m = blobstore.BLOB_URL_RE.search(url) if PIL_AVAILABLE and isinstance(url, str) else None
+        if m and is_image_ext(m.group(4)):
+            result.append(derivative_url(m.group(3), "thumb"))
+        else:
+            result.append(url)
+    return result
+
+
+def _render(source: str, sha256: str, variant: str):
+    max_edge, quality = VARIANTS[variant]
+    dest = derivative_path(sha256, variant)
+    with Image.open(source) as im:
+        im = ImageOps.exif_transpose(im)
+        im.thumbnail((max_edge, max_edge))
+        if im.mode not in ("RGB", "L"):
+            im = im.convert("RGB")
+        tmp = f"{dest}.{threading.get_ident()}.part"
+        im.save(tmp, "JPEG", quality=quality, optimize=True, progressive=True)
+        os.replace(tmp, dest)
+        return im.size
+
+
+def generate(sha256: str, ext: str, variants=None) -> dict:
+    """Create the missing derivatives of one blob and make sure each one is recorded; return {variant: path}."""
+    source = blobstore.blob_path(sha256, ext)
+    if not PIL_AVAILABLE or not is_image_ext(ext) or not os.path.exists(source):
+        return {}
+    made = {}
+    rows = []
+    for variant in variants or VARIANTS:
+        path = derivative_path(sha256, variant)
+        rendered = not os.path.exists(path)
+        if rendered:
+            width, height = _render(source, sha256, variant)
+        else:
+            # 文件已在（数据库是新建 / 迁移 / 恢复来的）：同样登记，只读图片头取尺寸
+            with Image.open(path) as im:
+                width, height = im.size
+        made[variant] = path
+        rows.append(({"sha256": sha256, "variant": variant, "url": derivative_url(sha256, variant),
+                      "width": width, "height": height, "create_time": datetime.datetime.utcnow()}, rendered))
+    tbl = models.BlobDerivative.__table__
+    db = SessionLocal()
+    try:
+        for row, rendered in rows:
+            stmt = sqlite_insert(tbl).values(**row)
+            if rendered:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[tbl.c.sha256, tbl.c.variant],
+                    set_={"width": stmt.excluded.width, "height": stmt.excluded.height,
+                          "create_time": stmt.excluded.create_time})
+            else:
+                # 已登记的保持原样
+                stmt = stmt.on_conflict_do_nothing(index_elements=[tbl.c.sha256, tbl.c.variant])
+            db.execute(stmt)
+        db.commit()
+    finally:
+        db.close()
+    return made
+
+
+def _run(sha256: str, ext: str):
+    try:
+        generate(sha256, ext)
+    except Exception:
+        logger.exception("derivative generation failed for %s", sha256)
+    finally:
+        with _lock:
+            _pending.discard(sha256)
+
+
+def schedule(sha256: str, ext: str):
+    """Queue derivative generation for an uploaded image; returns the Future, or None if nothing to do."""
+    global _pool
+    if not PIL_AVAILABLE or not is_image_ext(ext):
+        return None
+    with _lock:
+        if sha256 in _pending:
+            return None
+        _pending.add(sha256)
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=DERIVATIVE_WORKERS, thread_name_prefix="derivative")
+        return _pool.submit(_run, sha256, ext)
+
+
+def ensure(sha256: str, variant: str):
+    """Path of a derivative, generating it on the spot if the file is missing; None if impossible."""
+    path = derivative_path(sha256, variant)
+    if os.path.exists(path):
+        return path
+    db = SessionLocal()
+    try:
+        blob = db.get(models.Blob, sha256)
+        ext = blob.ext if blob else None
+    finally:
+        db.close()
+    if ext is None:
+        return None
+    return generate(sha256, ext, variants=[variant]).get(variant)
+
+
+def shutdown():
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
@@ -0,0 +1,43 @@
+"""列表 / 详情接口的条件请求（ETag + If-None-Match）。
+
+ETag 由一条廉价的聚合查询（行数、max(id)、max(update_time)、计数列的加权和等）加上请求参数
+算出，不需要先查出并序列化整页数据；客户端带着相同的 If-None-Match 再来时直接返回 304。
+这些是弱校验器（W/"..."）：只保证 JSON 内容等价，不保证逐字节相同。
+"""
+import hashlib
+
+from fastapi import Request
+from fastapi.responses import Response
+
+# 响应结构变化时改这个值，让客户端手里的旧 ETag 全部失效
+ETAG_VERSION = "1"
+
+# 客户端可以缓存，但每次使用前都要带 If-None-Match 回来校验
+CACHE_CONTROL = "no-cache"
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(repr((ETAG_VERSION,) + parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    wanted = _opaque(etag)
+    return any(t.strip() == "*" or _opaque(t) == wanted for t in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -0,0 +1,37 @@
+"""热点列表接口的快速 JSON 输出。
+
+路由直接返回 FastJSONResponse(dict/list)，跳过 pydantic 模型构造、校验和 jsonable_encoder，
+由 orjson 一次性编码成 bytes。输出与原先 FastAPI 默认编码保持一致：字段名不变，
+datetime 为 ISO 8601（无时区、微秒为 0 时省略，与 datetime.isoformat() 相同），中文不转义。
+
+orjson 是可选依赖：未安装时退回标准库 json，结果相同，只是慢一些。
+"""
+import datetime
+import json
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 取决于部署环境
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        # OPT_NON_STR_KEYS：与 json 一样允许 int 等非字符串键
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -1,32 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, Base
-from .routers import auth, users, needs, services, upload
-import os
-from sqlalchemy import text
+from fastapi.responses import PlainTextResponse
+from .database import engine, async_engine
+from .routers import auth, users, needs, services, upload, files, search as search_router
+from . import search, utils, derivatives, migrations, metrics, querystats
 
-Base.metadata.create_all(bind=engine)
-
-try:
-    with engine.connect() as conn:
-        res = conn.execute(text("PRAGMA table_info('users')"))
-        existing_cols = {row[1] for row in res.fetchall()} if res is not None else set()
-        needed = {
-            'phone': "TEXT",
-            'intro': "TEXT",
-            'user_type': "TEXT",
-            'register_time': "DATETIME",
-            'update_time': "DATETIME",
-            'full_name': "TEXT"
-        }
-        for col, col_type in needed.items():
-            if col not in existing_cols:
-                try:
-                    conn.execute(text(f"ALTER TABLE users ADD COLUMN {col} {col_type}"))
-                except Exception:
-                    pass
-except Exception:
-    pass
+# 启动时只检查 schema 版本（一条查询，不做 DDL）；建表和升级用 `python migrate.py upgrade` 离线完成
+migrations.require_current(engine)
+search.detect_fts(engine)
 
 app = FastAPI(title="haofuwu-backend")
 
@@ -36,7 +17,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Content-Range", "Accept-Ranges", "X-DB-Queries", "X-DB-Time"],
 )
+# 按请求统计 SQL 语句数 / 耗时，标记疑似 N+1；HAOFUWU_SQL_DEBUG=1 时加 X-DB-Queries / X-DB-Time 响应头
+app.add_middleware(querystats.QueryCountMiddleware)
+querystats.instrument_engine(engine)
+querystats.instrument_engine(async_engine.sync_engine)
+# 最后添加的中间件在最外层：耗时覆盖 CORS 和整个应用
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.REGISTRY.instrument_engine(engine, "sync")
+metrics.REGISTRY.instrument_engine(async_engine.sync_engine, "async")
 
 app.include_router(auth.router, prefix="/api/auth")
 app.include_router(users.router, prefix="/api/user")
@@ -49,6 +39,9 @@ app.include_router(services.router, prefix="/api/service")
 
 app.include_router(services.router, prefix="/api/service-self")
 app.include_router(upload.router, prefix="/api/upload")
+# 上传文件的静态访问（支持 Range / ETag / 304），与上传接口返回的 /uploads/... 地址对应
+app.include_router(files.router, prefix="/uploads")
+app.include_router(search_router.router, prefix="/api/search")
 
 try:
     from .routers import service_self
@@ -65,6 +58,18 @@ except Exception:
     pass
 
 
+@app.on_event("shutdown")
+def _shutdown_worker_pools():
+    utils.shutdown_password_hash_pool()
+    derivatives.shutdown()
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    # async 路由：在事件循环里渲染，才能读到线程池 limiter 的状态
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
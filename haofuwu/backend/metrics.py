@@ -0,0 +1,203 @@
+"""进程内的请求 / 线程池 / 连接池指标，以 Prometheus 文本格式在 /metrics 暴露。
+
+- MetricsMiddleware 是纯 ASGI 中间件（BaseHTTPMiddleware 每个请求要多建任务和队列，开销大一个数量级）：
+  按 (method, 路由模板, status) 统计请求数、耗时直方图和响应体大小直方图，并按 method 维护进行中的请求数
+- 路由模板取自路由匹配后写入 scope 的路由信息（如 /api/need/detail/{need_id}），
+  没匹配到路由的请求统一记为 <unmatched>，标签基数不随 URL 增长
+- 请求指标只在事件循环线程里更新（中间件和 send 回调都跑在事件循环上），因此不加锁；
+  连接池事件来自线程池里的同步路由，单独用一把锁
+- 线程池（同步路由使用的 anyio 默认 CapacityLimiter）和连接池的当前状态在抓取时读取
+"""
+import bisect
+import threading
+from time import perf_counter
+
+import anyio.to_thread
+from sqlalchemy import event
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 直方图上界（秒 / 字节），le 语义：落在 (上一个上界, 本上界] 内
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152)
+
+UNMATCHED = "<unmatched>"
+
+
+class _Series:
+    __slots__ = ("count", "seconds", "bytes", "latency", "size")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.latency = [0] * (len(LATENCY_BUCKETS) + 1)  # 最后一格是 +Inf
+        self.size = [0] * (len(SIZE_BUCKETS) + 1)
+
+
+class Registry:
+    def __init__(self):
+        self.series = {}  # (method, route, status) -> _Series
+        self.in_flight = {}  # method -> 进行中的请求数
+        self.pools = {}  # engine 名 -> {"engine", "checkouts", "held_seconds"}
+        self._pool_lock = threading.Lock()
+
+    def observe(self, method: str, route: str, status: int, seconds: float, size: int):
+        key = (method, route, status)
+        s = self.series.get(key)
+        if s is None:
+            s = self.series[key] = _Series()
+        s.count += 1
+        s.seconds += seconds
+        s.bytes += size
+        s.latency[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        s.size[bisect.bisect_left(SIZE_BUCKETS, size)] += 1
+
+    def instrument_engine(self, engine, name: str):
+        """Count pool checkouts and connection hold time for `engine` (a sync Engine; pass async_engine.sync_engine)."""
+        if name in self.pools:
+            return
+        state = self.pools[name] = {"engine": engine, "checkouts": 0, "held_seconds": 0.0}
+        lock = self._pool_lock
+
+        def on_checkout(dbapi_conn, record, proxy):
+            record.info["metrics_checkout_at"] = perf_counter()
+            with lock:
+                state["checkouts"] += 1
+
+        def on_checkin(dbapi_conn, record):
+            started = record.info.pop("metrics_checkout_at", None)
+            if started is not None:
+                with lock:
+                    state["held_seconds"] += perf_counter() - started
+
+        event.listen(engine, "checkout", on_checkout)
+        event.listen(engine, "checkin", on_checkin)
+
+
+REGISTRY = Registry()
+
+
+def route_template(scope) -> str:
+    """Templated path of the route that handled `scope`, or UNMATCHED."""
+    # 新版 FastAPI 的 include_router 不再把前缀拼进 route.path，带前缀的完整模板在 effective_route_context 里
+    ctx = scope.get("fastapi")
+    ctx = ctx.get("effective_route_context") if isinstance(ctx, dict) else None
+    if ctx is not None:
+        return ctx.path
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED)
+
+
+class MetricsMiddleware:
+    def __init__(self, app, registry: Registry = None):
+        self.app = app
+        self.registry = registry or REGISTRY
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        registry = self.registry
+        method = scope["method"]
+        in_flight = registry.in_flight
+        in_flight[method] = in_flight.get(method, 0) + 1
+        status = 500  # 应用抛异常、没发出响应头时按 500 记
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry.observe(method, route_template(scope), status, perf_counter() - start, size)
+            in_flight[method] -= 1
+
+
+def _labels(**labels):
+    def esc(v):
+        return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in labels.items()) + "}"
+
+
+def _histogram(lines, name, labels, bounds, counts, total):
+    cumulative = 0
+    for bound, n in zip(bounds, counts):
+        cumulative += n
+        lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {cumulative + counts[-1]}")
+    lines.append(f"{name}_sum{_labels(**labels)} {total}")
+    lines.append(f"{name}_count{_labels(**labels)} {cumulative + counts[-1]}")
+
+
+def _threadpool_stats():
+    # 默认 limiter 绑定在当前事件循环上，只能在事件循环里读取
+    try:
+        limiter = anyio.to_thread.current_default_thread_limiter()
+    except RuntimeError:
+        return None
+    stats = limiter.statistics()
+    return limiter.total_tokens, stats.borrowed_tokens, stats.tasks_waiting
+
+
+def render(registry: Registry = None) -> str:
+    """Return all metrics in the Prometheus text exposition format (call from the event loop)."""
+    registry = registry or REGISTRY
+    lines = []
+
+    def header(name, kind, text):
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    series = sorted(registry.series.items())
+    header("http_requests_total", "counter", "HTTP requests by method, route template and status.")
+    for (method, route, status), s in series:
+        lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {s.count}")
+    header("http_request_duration_seconds", "histogram", "Time from receiving the request to the last body byte.")
+    for (method, route, status), s in series:
+        _histogram(lines, "http_request_duration_seconds", {"method": method, "route": route, "status": status},
+                   LATENCY_BUCKETS, s.latency, s.seconds)
+    header("http_response_size_bytes", "histogram", "Response body size.")
+    for (method, route, status), s in series:
+        _histogram(lines, "http_response_size_bytes", {"method": method, "route": route, "status": status},
+                   SIZE_BUCKETS, s.size, s.bytes)
+    header("http_requests_in_flight", "gauge", "Requests currently being handled.")
+    for method, n in sorted(registry.in_flight.items()):
+        lines.append(f"http_requests_in_flight{_labels(method=method)} {n}")
+
+    pool = _threadpool_stats()
+    if pool is not None:
+        total, borrowed, waiting = pool
+        header("threadpool_tokens", "gauge", "Worker threads available to sync routes (anyio default limiter).")
+        lines.append(f"threadpool_tokens {total}")
+        header("threadpool_tokens_in_use", "gauge", "Worker threads currently running sync routes or dependencies.")
+        lines.append(f"threadpool_tokens_in_use {borrowed}")
+        header("threadpool_tasks_waiting", "gauge", "Calls queued because every worker thread is busy.")
+        lines.append(f"threadpool_tasks_waiting {waiting}")
+
+    if registry.pools:
+        gauges = (("db_pool_size", "Configured pool size.", "size"),
+                  ("db_pool_checked_out", "Connections currently checked out.", "checkedout"),
+                  ("db_pool_overflow", "Connections open beyond the pool size.", "overflow"))
+        for name, text, attr in gauges:
+            header(name, "gauge", text)
+            for engine_name, state in sorted(registry.pools.items()):
+                fn = getattr(state["engine"].pool, attr, None)
+                if fn is not None:
+                    lines.append(f"{name}{_labels(engine=engine_name)} {fn()}")
+        with registry._pool_lock:
+            snapshot = sorted((n, s["checkouts"], s["held_seconds"]) for n, s in registry.pools.items())
+        header("db_pool_checkouts_total", "counter", "Connections checked out of the pool.")
+        for engine_name, checkouts, _ in snapshot:
+            lines.append(f"db_pool_checkouts_total{_labels(engine=engine_name)} {checkouts}")
+        header("db_pool_checkout_seconds_total", "counter", "Total time connections were held before being returned.")
+        for engine_name, _, held in snapshot:
+            lines.append(f"db_pool_checkout_seconds_total{_labels(engine=engine_name)} {held}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,137 @@
+"""版本化的数据库迁移。
+
+每个迁移是本目录下的 vNNNN_<name>.py，提供 upgrade(conn)，按编号顺序执行；
+已执行到的版本记在 schema_version 表里（每个迁移一行）。
+
+- 建表 / 升级离线完成：python migrate.py upgrade（或部署时设置 HAOFUWU_AUTO_MIGRATE=1）
+- 应用启动时只调用 require_current()：一条 SELECT 比较版本号，不做任何 DDL
+- 每个迁移连同版本记录在同一个事务里提交；SQLite 上用 BEGIN IMMEDIATE 先拿写锁，
+  多个进程同时升级时后到的会等待，拿到锁后重新读版本号，不会重复执行
+
+迁移一旦发布就不要再改；结构变化写新的迁移。迁移只写固定的 DDL / SQL，不引用 models、crud
+等应用代码，否则应用代码一改，旧迁移的行为也跟着变。v0001 是引入迁移时模型的建表语句，之后的迁移
+要能同时作用于新建的库和 v0001 之前用 create_all 建出来的旧库（先检查再 ALTER）。
+"""
+import datetime
+import importlib
+import logging
+import os
+import re
+from collections import namedtuple
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger("uvicorn.error")
+
+VERSION_TABLE = "schema_version"
+
+_MIGRATION_RE = re.compile(r"^v(\d{4})_(\w+)\.py$")
+
+Migration = namedtuple("Migration", "version name module")
+
+
+class SchemaVersionError(RuntimeError):
+    """The database schema is not at the version this code expects."""
+
+
+def discover():
+    """Return all migrations in this package ordered by version."""
+    found = []
+    for filename in os.listdir(os.path.dirname(os.path.abspath(__file__))):
+        m = _MIGRATION_RE.match(filename)
+        if m:
+            found.append(Migration(int(m.group(1)), m.group(2), f"{__name__}.{filename[:-3]}"))
+    found.sort()
+    versions = [m.version for m in found]
+    if len(set(versions)) != len(versions):
+        raise SchemaVersionError(f"duplicate migration versions: {versions}")
+    return found
+
+
+def head() -> int:
+    migrations = discover()
+    return migrations[-1].version if migrations else 0
+
+
+def table_exists(conn, name: str) -> bool:
+    return inspect(conn).has_table(name)
+
+
+def column_names(conn, table: str) -> set:
+    return {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def add_missing_columns(conn, table: str, columns: dict):
+    """ALTER TABLE ... ADD COLUMN for each {name: ddl} not yet present. Returns the names added."""
+    existing = column_names(conn, table)
+    added = [name for name in columns if name not in existing]
+    for name in added:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {columns[name]}"))
+    return added
+
+
+def _current(conn) -> int:
+    if not table_exists(conn, VERSION_TABLE):
+        return 0
+    return conn.execute(text(f"SELECT COALESCE(MAX(version), 0) FROM {VERSION_TABLE}")).scalar()
+
+
+def current_version(engine) -> int:
+    with engine.connect() as conn:
+        return _current(conn)
+
+
+def history(engine):
+    """Return [(version, name, applied_at)] for the migrations recorded in the database."""
+    with engine.connect() as conn:
+        if not table_exists(conn, VERSION_TABLE):
+            return []
+        return [tuple(row) for row in conn.execute(text(
+            f"SELECT version, name, applied_at FROM {VERSION_TABLE} ORDER BY version"))]
+
+
+def upgrade(engine, target: int = None):
+    """Apply pending migrations up to `target` (default: head). Returns the migrations applied."""
+    applied = []
+    with engine.connect() as conn:
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} ("
+            "version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at DATETIME NOT NULL)"))
+        conn.commit()
+        for migration in discover():
+            if target is not None and migration.version > target:
+                break
+            if conn.dialect.name == "sqlite":
+                # 先拿写锁再读版本号：并发升级的进程在这里排队
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                if _current(conn) >= migration.version:
+                    conn.rollback()
+                    continue
+                logger.info("applying migration %04d_%s", migration.version, migration.name)
+                importlib.import_module(migration.module).upgrade(conn)
+                conn.execute(text(f"INSERT INTO {VERSION_TABLE} (version, name, applied_at) VALUES (:v, :n, :t)"),
+                             {"v": migration.version, "n": migration.name, "t": datetime.datetime.utcnow()})
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            applied.append(migration)
+    return applied
+
+
+def require_current(engine):
+    """Startup check: raise SchemaVersionError unless the database is exactly at head.
+
+    With HAOFUWU_AUTO_MIGRATE=1 pending migrations are applied instead (development setups).
+    """
+    expected = head()
+    found = current_version(engine)
+    if found < expected and os.environ.get("HAOFUWU_AUTO_MIGRATE") == "1":
+        upgrade(engine)
+        found = current_version(engine)
+    if found != expected:
+        raise SchemaVersionError(
+            f"database schema is at version {found}, this code expects {expected}; "
+            f"run `python migrate.py upgrade` first")
+    return found
@@ -0,0 +1,105 @@
+"""建立基线：按引入迁移时的模型创建所有缺失的表和索引。
+
+DDL 固定写在这里，不引用 models：之后模型再变，这个迁移建出来的结构也不变（后续变化由新迁移补上）。
+引入迁移之前的库里表已经存在，IF NOT EXISTS 会跳过它们，只补上缺的表。
+"""
+from sqlalchemy import text
+
+STATEMENTS = (
+    """CREATE TABLE IF NOT EXISTS users (
+        id INTEGER NOT NULL,
+        username VARCHAR(64) NOT NULL,
+        email VARCHAR(128),
+        hashed_password VARCHAR(256) NOT NULL,
+        full_name VARCHAR(128),
+        phone VARCHAR(32),
+        intro TEXT,
+        user_type VARCHAR(64),
+        register_time DATETIME,
+        update_time DATETIME,
+        PRIMARY KEY (id)
+    )""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email)",
+    "CREATE INDEX IF NOT EXISTS ix_users_id ON users (id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_username ON users (username)",
+    """CREATE TABLE IF NOT EXISTS stats_monthly (
+        month VARCHAR(7) NOT NULL,
+        region VARCHAR(100) NOT NULL,
+        need_count INTEGER DEFAULT '0' NOT NULL,
+        service_success_count INTEGER DEFAULT '0' NOT NULL,
+        PRIMARY KEY (month, region)
+    )""",
+    """CREATE TABLE IF NOT EXISTS blobs (
+        sha256 VARCHAR(64) NOT NULL,
+        ext VARCHAR(16) NOT NULL,
+        size INTEGER NOT NULL,
+        content_type VARCHAR(100),
+        ref_count INTEGER DEFAULT '0' NOT NULL,
+        create_time DATETIME,
+        last_upload_time DATETIME,
+        PRIMARY KEY (sha256)
+    )""",
+    """CREATE TABLE IF NOT EXISTS needs (
+        id INTEGER NOT NULL,
+        title VARCHAR(200) NOT NULL,
+        description TEXT,
+        region VARCHAR(100),
+        service_type VARCHAR(100) NOT NULL,
+        img_urls JSON,
+        video_url VARCHAR(500),
+        status INTEGER,
+        response_count INTEGER DEFAULT '0' NOT NULL,
+        pending_count INTEGER DEFAULT '0' NOT NULL,
+        accepted_service_id INTEGER,
+        owner_id INTEGER,
+        create_time DATETIME,
+        update_time DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(owner_id) REFERENCES users (id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_needs_id ON needs (id)",
+    """CREATE TABLE IF NOT EXISTS blob_derivatives (
+        sha256 VARCHAR(64) NOT NULL,
+        variant VARCHAR(16) NOT NULL,
+        url VARCHAR(200) NOT NULL,
+        width INTEGER,
+        height INTEGER,
+        create_time DATETIME,
+        PRIMARY KEY (sha256, variant),
+        FOREIGN KEY(sha256) REFERENCES blobs (sha256)
+    )""",
+    """CREATE TABLE IF NOT EXISTS upload_sessions (
+        id VARCHAR(32) NOT NULL,
+        filename VARCHAR(255),
+        content_type VARCHAR(100),
+        size INTEGER NOT NULL,
+        chunk_size INTEGER NOT NULL,
+        total_chunks INTEGER NOT NULL,
+        owner_id INTEGER,
+        create_time DATETIME,
+        update_time DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(owner_id) REFERENCES users (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS services (
+        id INTEGER NOT NULL,
+        title VARCHAR(200),
+        content TEXT,
+        service_type VARCHAR(100),
+        files JSON,
+        status INTEGER,
+        need_id INTEGER,
+        owner_id INTEGER,
+        create_time DATETIME,
+        update_time DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(need_id) REFERENCES needs (id),
+        FOREIGN KEY(owner_id) REFERENCES users (id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_services_id ON services (id)",
+)
+
+
+def upgrade(conn):
+    for stmt in STATEMENTS:
+        conn.execute(text(stmt))
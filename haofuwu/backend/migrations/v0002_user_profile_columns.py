@@ -0,0 +1,13 @@
+"""users 表的资料列：最早的库只有账号字段。"""
+from . import add_missing_columns
+
+
+def upgrade(conn):
+    add_missing_columns(conn, "users", {
+        "phone": "TEXT",
+        "intro": "TEXT",
+        "user_type": "TEXT",
+        "register_time": "DATETIME",
+        "update_time": "DATETIME",
+        "full_name": "TEXT",
+    })
@@ -0,0 +1,21 @@
+"""needs 表的冗余计数列：旧库补列后按现有 services 整体回填一次（固定 SQL，不调用 crud）。"""
+from sqlalchemy import text
+
+from . import add_missing_columns
+
+BACKFILL = """
+UPDATE needs SET
+    response_count = (SELECT COUNT(s.id) FROM services s WHERE s.need_id = needs.id),
+    pending_count = (SELECT COUNT(s.id) FROM services s WHERE s.need_id = needs.id AND s.status = 0),
+    accepted_service_id = (SELECT MAX(s.id) FROM services s WHERE s.need_id = needs.id AND s.status = 1)
+"""
+
+
+def upgrade(conn):
+    added = add_missing_columns(conn, "needs", {
+        "response_count": "INTEGER NOT NULL DEFAULT 0",
+        "pending_count": "INTEGER NOT NULL DEFAULT 0",
+        "accepted_service_id": "INTEGER",
+    })
+    if added:
+        conn.execute(text(BACKFILL))
@@ -0,0 +1,30 @@
+"""月度统计汇总表为空但已有需求时（新建表的旧库），整体回填一次（固定 SQL，不调用 crud）。
+
+口径：需求按创建月份、地域计数；被接受的响应（status=1）按响应创建月份、所属需求的地域计数，
+地域为空记为 ''。
+"""
+from sqlalchemy import text
+
+BACKFILL = """
+INSERT INTO stats_monthly (month, region, need_count, service_success_count)
+SELECT month, region, SUM(needs), SUM(services) FROM (
+    SELECT strftime('%Y-%m', create_time) AS month, COALESCE(region, '') AS region,
+           COUNT(id) AS needs, 0 AS services
+    FROM needs WHERE create_time IS NOT NULL
+    GROUP BY 1, 2
+    UNION ALL
+    SELECT strftime('%Y-%m', s.create_time), COALESCE(n.region, ''), 0, COUNT(s.id)
+    FROM services s LEFT JOIN needs n ON n.id = s.need_id
+    WHERE s.status = 1 AND s.create_time IS NOT NULL
+    GROUP BY 1, 2
+)
+GROUP BY month, region
+"""
+
+
+def upgrade(conn):
+    if conn.execute(text("SELECT 1 FROM stats_monthly LIMIT 1")).first() is not None:
+        return
+    if conn.execute(text("SELECT 1 FROM needs LIMIT 1")).first() is None:
+        return
+    conn.execute(text(BACKFILL))
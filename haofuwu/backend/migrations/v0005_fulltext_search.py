@@ -0,0 +1,62 @@
+"""needs_fts / services_fts 全文索引及同步触发器（DDL 固定写在这里，不引用 search 模块）。
+
+SQLite 不支持 FTS5 / trigram 时跳过，检索退回 LIKE；换了支持的 SQLite 后可以用
+bench_search.py 或 search.ensure_fts(engine) 补建。
+"""
+import logging
+
+from sqlalchemy import text
+
+logger = logging.getLogger("uvicorn.error")
+
+# (fts 表, 该表新建时才执行的回填语句, DDL)
+FTS_TABLES = (
+    ("needs_fts", (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS needs_fts USING fts5("
+        "title, description, region, content='needs', content_rowid='id', tokenize='trigram')",
+        "CREATE TRIGGER IF NOT EXISTS needs_fts_ai AFTER INSERT ON needs BEGIN "
+        "INSERT INTO needs_fts(rowid, title, description, region) "
+        "VALUES (new.id, new.title, new.description, new.region); END",
+        "CREATE TRIGGER IF NOT EXISTS needs_fts_ad AFTER DELETE ON needs BEGIN "
+        "INSERT INTO needs_fts(needs_fts, rowid, title, description, region) "
+        "VALUES ('delete', old.id, old.title, old.description, old.region); END",
+        "CREATE TRIGGER IF NOT EXISTS needs_fts_au AFTER UPDATE OF title, description, region ON needs BEGIN "
+        "INSERT INTO needs_fts(needs_fts, rowid, title, description, region) "
+        "VALUES ('delete', old.id, old.title, old.description, old.region); "
+        "INSERT INTO needs_fts(rowid, title, description, region) "
+        "VALUES (new.id, new.title, new.description, new.region); END",
+    )),
+    ("services_fts", (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS services_fts USING fts5("
+        "title, content, content='services', content_rowid='id', tokenize='trigram')",
+        "CREATE TRIGGER IF NOT EXISTS services_fts_ai AFTER INSERT ON services BEGIN "
+        "INSERT INTO services_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+        "CREATE TRIGGER IF NOT EXISTS services_fts_ad AFTER DELETE ON services BEGIN "
+        "INSERT INTO services_fts(services_fts, rowid, title, content) "
+        "VALUES ('delete', old.id, old.title, old.content); END",
+        "CREATE TRIGGER IF NOT EXISTS services_fts_au AFTER UPDATE OF title, content ON services BEGIN "
+        "INSERT INTO services_fts(services_fts, rowid, title, content) "
+        "VALUES ('delete', old.id, old.title, old.content); "
+        "INSERT INTO services_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+    )),
+)
+
+
+def _create(conn):
+    existing = {row[0] for row in conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%_fts'"))}
+    for fts_table, statements in FTS_TABLES:
+        for stmt in statements:
+            conn.execute(text(stmt))
+        if fts_table not in existing:
+            conn.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+
+
+def upgrade(conn):
+    if conn.dialect.name != "sqlite":
+        return
+    try:
+        with conn.begin_nested():
+            _create(conn)
+    except Exception as e:
+        logger.warning("FTS5 full-text index unavailable, keyword search falls back to LIKE: %s", e)
@@ -0,0 +1,20 @@
+"""热点查询的复合索引（与 models 里 Need / Service 的 __table_args__ 一致）。
+
+v0001 的建表语句里没有这些索引，新库和旧库都在这里建（IF NOT EXISTS，重复执行无害）。
+"""
+from sqlalchemy import text
+
+INDEXES = (
+    ("ix_needs_create_time_id", "needs", ("create_time", "id")),
+    ("ix_needs_owner_create_time", "needs", ("owner_id", "create_time")),
+    ("ix_needs_service_type_create_time", "needs", ("service_type", "create_time")),
+    ("ix_services_need_status", "services", ("need_id", "status")),
+    ("ix_services_owner_create_time", "services", ("owner_id", "create_time")),
+    ("ix_services_create_time_id", "services", ("create_time", "id")),
+    ("ix_services_service_type_create_time", "services", ("service_type", "create_time")),
+)
+
+
+def upgrade(conn):
+    for name, table, columns in INDEXES:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
@@ -0,0 +1,55 @@
+"""两字检索词的二元（bigram）索引：needs_bigrams / services_bigrams 及同步触发器（DDL 固定写在这里，不引用 search 模块）。
+
+trigram 全文索引只能匹配不少于 3 个字的片段，而两个字是最常见的中文检索词长。这里为
+needs.title/description/region 和 services.title/content 中每个相邻的两字片段记一行 (gram, row_id)，
+两字词先按 gram 走主键定位候选行，再在这些行上用 LIKE 核对列。
+
+- 普通表 + 触发器，不依赖 FTS5，也不需要应用注册的 SQL 函数，任何客户端写入都能同步
+- 片段按 search_positions 里的序号逐字截取（触发器里不能用递归 CTE）；超过 MAX_POSITION 字的文本尾部不进索引
+- gram 用 lower() 折叠，与 LIKE 一样只对 ASCII 字母不区分大小写
+"""
+from sqlalchemy import text
+
+MAX_POSITION = 65535
+
+# (二元索引表, 原表, 被索引的列)
+SOURCES = (
+    ("needs_bigrams", "needs", ("title", "description", "region")),
+    ("services_bigrams", "services", ("title", "content")),
+)
+
+
+def _grams_of(row_id: str, values) -> str:
+    # values 中每个文本的所有两字片段，与 row_id 组成 (gram, row_id)
+    union = " UNION ALL ".join(f"SELECT {v} AS v" for v in values)
+    return (f"SELECT lower(substr(s.v, p.n, 2)), {row_id} FROM ({union}) AS s "
+            f"JOIN search_positions AS p ON p.n < length(s.v)")
+
+
+def _statements(bigram_table: str, base_table: str, columns):
+    cols = ", ".join(columns)
+    insert_new = f"INSERT OR IGNORE INTO {bigram_table} (gram, row_id) " + _grams_of("new.id", [f"new.{c}" for c in columns])
+    delete_old = f"DELETE FROM {bigram_table} WHERE row_id = old.id"
+    backfill = " UNION ALL ".join(f"SELECT id, {c} AS v FROM {base_table}" for c in columns)
+    return [
+        f"CREATE TABLE IF NOT EXISTS {bigram_table} (gram TEXT NOT NULL, row_id INTEGER NOT NULL, "
+        f"PRIMARY KEY (gram, row_id)) WITHOUT ROWID",
+        f"CREATE INDEX IF NOT EXISTS ix_{bigram_table}_row_id ON {bigram_table} (row_id)",
+        f"CREATE TRIGGER IF NOT EXISTS {bigram_table}_ai AFTER INSERT ON {base_table} BEGIN {insert_new}; END",
+        f"CREATE TRIGGER IF NOT EXISTS {bigram_table}_ad AFTER DELETE ON {base_table} BEGIN {delete_old}; END",
+        f"CREATE TRIGGER IF NOT EXISTS {bigram_table}_au AFTER UPDATE OF {cols} ON {base_table} BEGIN "
+        f"{delete_old}; {insert_new}; END",
+        f"INSERT OR IGNORE INTO {bigram_table} (gram, row_id) "
+        f"SELECT lower(substr(s.v, p.n, 2)), s.id FROM ({backfill}) AS s "
+        f"JOIN search_positions AS p ON p.n < length(s.v)",
+    ]
+
+
+def upgrade(conn):
+    conn.execute(text("CREATE TABLE IF NOT EXISTS search_positions (n INTEGER PRIMARY KEY)"))
+    conn.execute(text(
+        f"WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < {MAX_POSITION}) "
+        f"INSERT OR IGNORE INTO search_positions (n) SELECT n FROM seq"))
+    for bigram_table, base_table, columns in SOURCES:
+        for stmt in _statements(bigram_table, base_table, columns):
+            conn.execute(text(stmt))
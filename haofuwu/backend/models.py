@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON, Index
 from sqlalchemy.orm import relationship
 from .database import Base
 import datetime
@@ -37,6 +37,11 @@ class Need(Base):
 
     status = Column(Integer, default=0)  # 0:已发布, -1:已取消
 
+    # --- 冗余计数，由 crud 中的服务写操作在同一事务内维护 ---
+    response_count = Column(Integer, default=0, server_default="0", nullable=False)  # 响应总数
+    pending_count = Column(Integer, default=0, server_default="0", nullable=False)  # 待处理响应数
+    accepted_service_id = Column(Integer, nullable=True)  # 已接受的响应 id（不设外键，避免 needs/services 循环依赖）
+
     owner_id = Column(Integer, ForeignKey("users.id"))
     create_time = Column(DateTime, default=datetime.datetime.utcnow)
     update_time = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
@@ -44,6 +49,14 @@ class Need(Base):
     owner = relationship("User", back_populates="needs")
     responses = relationship("Service", back_populates="need")
 
+    # 热点查询用到的复合索引（新增索引同时要写迁移，见 migrations/v0006）：
+    # 首页按 (create_time, id) 倒序翻页；"我的需求"按发布者过滤再按时间排序；按服务类型筛选
+    __table_args__ = (
+        Index("ix_needs_create_time_id", "create_time", "id"),
+        Index("ix_needs_owner_create_time", "owner_id", "create_time"),
+        Index("ix_needs_service_type_create_time", "service_type", "create_time"),
+    )
+
 
 class Service(Base):
     __tablename__ = "services"
@@ -64,4 +77,65 @@ class Service(Base):
     update_time = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
 
     owner = relationship("User", back_populates="services")
-    need = relationship("Need", back_populates="responses")
\ No newline at end of file
+    need = relationship("Need", back_populates="responses")
+
+    # 某需求下的响应（含按状态统计 / 查已接受的响应）；"我的服务"；服务列表的排序与类型筛选
+    __table_args__ = (
+        Index("ix_services_need_status", "need_id", "status"),
+        Index("ix_services_owner_create_time", "owner_id", "create_time"),
+        Index("ix_services_create_time_id", "create_time", "id"),
+        Index("ix_services_service_type_create_time", "service_type", "create_time"),
+    )
+
+class MonthlyStat(Base):
+    """按 (月份, 地域) 汇总的统计数据，供 /api/admin/stats 直接读取。
+
+    need_count 按需求创建月份计数；service_success_count 按被接受响应的创建月份、
+    关联需求的地域计数（与原先实时聚合的口径一致）。由 crud 中的写操作增量维护。
+    """
+    __tablename__ = "stats_monthly"
+    month = Column(String(7), primary_key=True)  # YYYY-MM
+    region = Column(String(100), primary_key=True, default="")  # 无地域记为 ""
+    need_count = Column(Integer, default=0, server_default="0", nullable=False)
+    service_success_count = Column(Integer, default=0, server_default="0", nullable=False)
+
+
+class Blob(Base):
+    """内容寻址的上传文件：文件按 SHA-256 命名、按前缀分目录存放，相同内容只存一份。
+
+    ref_count 是被 Need.img_urls / Need.video_url / Service.files 引用的次数，
+    由 blobstore.collect_garbage 重新统计；为 0 且最近一次上传已超过宽限期的文件会被删除。
+    """
+    __tablename__ = "blobs"
+    sha256 = Column(String(64), primary_key=True)
+    ext = Column(String(16), nullable=False, default="")  # 含点号的小写扩展名，如 ".png"；无扩展名为 ""
+    size = Column(Integer, nullable=False, default=0)
+    content_type = Column(String(100), nullable=True)
+    ref_count = Column(Integer, default=0, server_default="0", nullable=False)
+    create_time = Column(DateTime, default=datetime.datetime.utcnow)
+    last_upload_time = Column(DateTime, default=datetime.datetime.utcnow)  # 重复上传同一内容时刷新
+
+
+class BlobDerivative(Base):
+    """由图片 blob 生成的派生图（缩略图 / 网页优化图），文件与原图放在同一分片目录。"""
+    __tablename__ = "blob_derivatives"
+    sha256 = Column(String(64), ForeignKey("blobs.sha256"), primary_key=True)
+    variant = Column(String(16), primary_key=True)  # thumb / web
+    url = Column(String(200), nullable=False)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    create_time = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+class UploadSession(Base):
+    """断点续传的上传会话：分片文件暂存在 uploads/.sessions/<id>/，合并完成或过期后删除。"""
+    __tablename__ = "upload_sessions"
+    id = Column(String(32), primary_key=True)  # 随机十六进制串
+    filename = Column(String(255), nullable=True)
+    content_type = Column(String(100), nullable=True)
+    size = Column(Integer, nullable=False)  # 文件总字节数
+    chunk_size = Column(Integer, nullable=False)
+    total_chunks = Column(Integer, nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    create_time = Column(DateTime, default=datetime.datetime.utcnow)
+    update_time = Column(DateTime, default=datetime.datetime.utcnow)  # 最近一次收到分片的时间，用于判断过期
@@ -0,0 +1,144 @@
+"""按请求统计 SQL 语句数与耗时，并标记疑似 N+1 查询。
+
+- instrument_engine 在 engine 上挂 before/after_cursor_execute 事件，语句计入当前请求的 RequestQueries。
+  当前请求放在 ContextVar 里：同步路由跑在线程池中（anyio 会复制 context），异步驱动在同一个任务里执行，都能取到
+- QueryCountMiddleware 为每个 HTTP 请求建立统计；HAOFUWU_SQL_DEBUG=1 时在响应头加
+  X-DB-Queries（语句数）/ X-DB-Time（毫秒），并为每个请求记一行日志
+- 同一请求里同一形状（文本相同，IN 列表折叠后）的 SELECT 执行 N_PLUS_ONE_THRESHOLD 次及以上，
+  视为疑似 N+1（通常是循环里触发的 lazy load），总是记 warning
+- capture() 收集期间结束的每个请求的统计，测试用它断言查询数上限（见 conftest.py 的 sql_queries fixture）
+"""
+import contextlib
+import contextvars
+import logging
+import os
+import re
+from collections import Counter
+from time import perf_counter
+
+from sqlalchemy import event
+
+logger = logging.getLogger("uvicorn.error")
+
+N_PLUS_ONE_THRESHOLD = 3
+
+DEBUG = os.environ.get("HAOFUWU_SQL_DEBUG") == "1"
+
+_current = contextvars.ContextVar("request_queries", default=None)
+_sinks = []
+
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WS_RE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Collapse whitespace and expanded IN (?, ?, ...) lists so same-shape statements compare equal."""
+    return _IN_LIST_RE.sub("(?)", _WS_RE.sub(" ", statement).strip())
+
+
+class RequestQueries:
+    """SQL statements executed while handling one request (or one `track()` block)."""
+
+    def __init__(self, method: str = "", path: str = ""):
+        self.method = method
+        self.path = path
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()  # 原始语句文本 -> 次数；形状归一化推迟到分析时再做
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+
+    def shapes(self) -> Counter:
+        shapes = Counter()
+        for statement, n in self.statements.items():
+            shapes[statement_shape(statement)] += n
+        return shapes
+
+    def repeated(self, threshold: int = None):
+        """[(shape, count)] of SELECT shapes run at least `threshold` times: probable N+1 queries."""
+        threshold = threshold or N_PLUS_ONE_THRESHOLD
+        return sorted(((shape, n) for shape, n in self.shapes().items()
+                       if n >= threshold and shape.upper().startswith("SELECT")), key=lambda item: -item[1])
+
+    def __repr__(self):
+        return f"<RequestQueries {self.method} {self.path}: {self.count} queries, {self.seconds * 1000:.2f} ms>"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("querystats_started", []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.get("querystats_started")
+    if stats is not None and started:
+        stats.record(statement, perf_counter() - started.pop())
+
+
+def instrument_engine(engine):
+    """Attach the counting hooks to `engine` (a sync Engine; pass async_engine.sync_engine)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _report(stats: RequestQueries):
+    for sink in _sinks:
+        sink.append(stats)
+    for shape, n in stats.repeated():
+        logger.warning("[SQL] probable N+1 in %s %s: %d x %s", stats.method, stats.path, n, shape)
+    if DEBUG:
+        logger.info("[SQL] %s %s: %d queries, %.2f ms", stats.method, stats.path, stats.count, stats.seconds * 1000)
+
+
+@contextlib.contextmanager
+def track(method: str = "", path: str = ""):
+    """Count the statements run inside the block (outside of HTTP requests, e.g. in scripts and tests)."""
+    stats = RequestQueries(method, path)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        _report(stats)
+
+
+@contextlib.contextmanager
+def capture():
+    """Collect the RequestQueries of every request that finishes inside the block, in order."""
+    finished = []
+    _sinks.append(finished)
+    try:
+        yield finished
+    finally:
+        _sinks.remove(finished)
+
+
+class QueryCountMiddleware:
+    def __init__(self, app, debug_headers: bool = None):
+        self.app = app
+        self.debug_headers = DEBUG if debug_headers is None else debug_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with track(scope["method"], scope["path"]) as stats:
+            if not self.debug_headers:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_wrapper(message):
+                # 响应头发出时路由已执行完，之后的语句（流式响应、后台任务）不计入头部，但仍计入日志
+                if message["type"] == "http.response.start":
+                    message = dict(message, headers=list(message.get("headers", [])) + [
+                        (b"x-db-queries", str(stats.count).encode()),
+                        (b"x-db-time", f"{stats.seconds * 1000:.2f}".encode()),
+                    ])
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
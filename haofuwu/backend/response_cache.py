@@ -0,0 +1,31 @@
+"""公开详情接口的响应缓存（需求 / 服务 / 用户详情）。
+
+读：路由先查缓存，未命中再查库并写回（read-through）；404 不缓存。
+写：crud 中修改需求 / 服务的函数在提交后按主键和标签精确失效：
+  - 需求详情、以及挂在该需求下的服务详情都带标签 need:<id>，
+    需求被修改 / 取消 / 删除、或其下响应有增删改 / 接受 / 拒绝时整体失效
+  - 服务详情另按 ("service", id) 失效；用户详情按 id 和用户名失效
+"""
+from .cache import TTLCache
+
+RESPONSE_CACHE_TTL_SECONDS = 30
+RESPONSE_CACHE_MAX_ENTRIES = 4096
+
+response_cache = TTLCache(RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_ENTRIES)
+
+
+def need_tag(need_id: int) -> str:
+    return f"need:{need_id}"
+
+
+def invalidate_need(*need_ids):
+    response_cache.invalidate_tag(*(need_tag(n) for n in need_ids if n))
+
+
+def invalidate_service(service_id: int, *need_ids):
+    response_cache.invalidate(("service", service_id))
+    invalidate_need(*need_ids)
+
+
+def invalidate_user(user_id: int, username: str = None):
+    response_cache.invalidate(("user", user_id), ("username", username))
@@ -2,8 +2,10 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from ..database import get_db
 from .. import models
+from ..user_cache import user_cache
+from ..response_cache import response_cache
+from ..utils import password_hash_stats
 from datetime import datetime
-from collections import defaultdict
 
 router = APIRouter()
 
@@ -57,44 +59,24 @@ def admin_stats(startMonth: str = None, endMonth: str = None, regionKeyword: str
         start_dt = start_month_dt
         end_dt = end_month_dt
 
-    # inclusive end -> make end_next = first day of month after end
-    end_next = _next_month(end_dt)
-
-    # Query needs in the date range
-    need_q = db.query(models.Need).filter(models.Need.create_time >= start_dt, models.Need.create_time < end_next)
-    svc_q = db.query(models.Service).filter(models.Service.create_time >= start_dt, models.Service.create_time < end_next, models.Service.status == 1)
-
+    # 直接读取按 (月份, 地域) 增量维护的汇总表，不再扫描 needs / services 明细
+    stat_q = db.query(models.MonthlyStat).filter(
+        models.MonthlyStat.month >= start_dt.strftime("%Y-%m"),
+        models.MonthlyStat.month <= end_dt.strftime("%Y-%m"),
+    )
     if regionKeyword:
         kw = f"%{regionKeyword}%"
-        need_q = need_q.filter(models.Need.region.ilike(kw))
-        # join need for service to filter by region
-        svc_q = svc_q.join(models.Need).filter(models.Need.region.ilike(kw))
-
-    needs = need_q.all()
-    services = svc_q.all()
-
-    # aggregate by month and region
-    grouped = defaultdict(lambda: {"monthNeedCount": 0, "monthServiceSuccessCount": 0})
-
-    def month_str_from_dt(dt: datetime):
-        return dt.strftime("%Y-%m")
-
-    for n in needs:
-        m = month_str_from_dt(n.create_time)
-        key = (m, (n.region or ""))
-        grouped[key]["monthNeedCount"] += 1
-
-    for s in services:
-        # try to get region via related need; fallback to empty
-        region = ""
-        try:
-            if s.need and getattr(s.need, 'region', None):
-                region = s.need.region
-        except Exception:
-            region = ""
-        m = month_str_from_dt(s.create_time)
-        key = (m, (region or ""))
-        grouped[key]["monthServiceSuccessCount"] += 1
+        stat_q = stat_q.filter(models.MonthlyStat.region.ilike(kw))
+
+    grouped = {}
+    for row in stat_q.all():
+        # 计数被减回 0 的行视为不存在，和实时聚合的结果保持一致
+        if not row.need_count and not row.service_success_count:
+            continue
+        grouped[(row.month, row.region or "")] = {
+            "monthNeedCount": row.need_count,
+            "monthServiceSuccessCount": row.service_success_count,
+        }
 
     # produce list entries
     results = []
@@ -152,3 +134,21 @@ def admin_stats(startMonth: str = None, endMonth: str = None, regionKeyword: str
 
     return {"code": 200, "msg": "ok", "data": {"list": results, "totalNeed": total_need, "totalServiceSuccess": total_service}}
 
+
+
+@router.get("/user-cache")
+def user_cache_stats():
+    """Hit / miss counters of the authenticated-user cache used by get_current_user."""
+    return {"code": 200, "msg": "ok", "data": user_cache.stats()}
+
+
+@router.get("/password-hashing")
+def password_hashing_stats():
+    """Worker count and queue depth of the password hashing process pool."""
+    return {"code": 200, "msg": "ok", "data": password_hash_stats()}
+
+
+@router.get("/response-cache")
+def response_cache_stats():
+    """Hit / miss counters (overall and per endpoint) of the detail response cache."""
+    return {"code": 200, "msg": "ok", "data": response_cache.stats()}
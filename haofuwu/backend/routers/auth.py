@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from .. import schemas, crud, utils
-from ..database import get_db
+from ..database import get_db, get_async_db
 import traceback
 import sys
 
@@ -11,11 +12,12 @@ router = APIRouter()
 
 
 @router.post("/register")
-def register(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
-    existing = crud.get_user_by_username(db, user_in.username)
+async def register(user_in: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = await crud.get_user_by_username_async(db, user_in.username)
     if existing:
         return JSONResponse({"code": 400, "msg": "Username already registered", "data": None}, status_code=400)
-    user = crud.create_user(db, user_in)
+    # 密码哈希在进程池中完成，不阻塞其他请求
+    user = await crud.create_user_async(db, user_in)
     return JSONResponse({"code": 200, "msg": "ok", "data": {"id": user.id, "username": user.username}})
 
 
@@ -30,8 +32,9 @@ def check_username(username: str, db: Session = Depends(get_db)):
 
 
 @router.post("/token", response_model=schemas.Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = crud.authenticate_user(db, form_data.username, form_data.password)
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(),
+                                 db: AsyncSession = Depends(get_async_db)):
+    user = await crud.authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
     access_token = utils.create_access_token(subject=user.username)
@@ -0,0 +1,144 @@
+import os
+import re
+import mimetypes
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from .. import blobstore
+
+router = APIRouter()
+
+# 每次从磁盘读出并发送的字节数（Range 响应）
+RANGE_READ_SIZE = 256 * 1024
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# 旧版平铺在 uploads/ 下的文件名可能被覆盖，只短期缓存，过期后用 ETag 校验
+MUTABLE_CACHE = "public, max-age=3600"
+
+# 浏览器能直接展示、又不会执行脚本的类型才内联返回；其余（html、svg、js、pdf……）一律作为附件下载，
+# 否则用户上传的 html 会在 API 源下执行（存储型 XSS）
+INLINE_MEDIA_TYPES = frozenset({
+    "image/png", "image/jpeg", "image/gif", "image/webp", "image/bmp", "image/avif",
+    "video/mp4", "video/webm", "video/ogg", "video/quicktime",
+})
+
+_BLOB_NAME_RE = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(\.[a-z0-9]{1,10})?$")
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _resolve(rel_path: str) -> str:
+    # 只允许访问上传目录内的普通文件；.tmp / .sessions 等内部目录不对外
+    # 反斜杠在 Windows 上是路径分隔符（a\..\..\x 只算一段），一律拒绝
+    parts = rel_path.split("/")
+    if not rel_path or "\\" in rel_path or "\0" in rel_path or any(not p or p.startswith(".") for p in parts):
+        raise HTTPException(status_code=404, detail="Not Found")
+    # 解析符号链接、盘符等之后，结果仍须落在上传目录内
+    root = os.path.realpath(blobstore.UPLOAD_DIR)
+    path = os.path.realpath(os.path.join(root, *parts))
+    try:
+        inside = os.path.commonpath([path, root]) == root
+    except ValueError:  # Windows 上不同盘符
+        inside = False
+    if not inside or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Not Found")
+    return path
+
+
+def _parse_range(header: str, size: int):
+    """Return (start, end) inclusive for a single satisfiable byte range, None to ignore the header,
+    or raise 416. Multi-range requests are answered with the whole file."""
+    m = _RANGE_RE.match(header.strip())
+    if not m or (not m.group(1) and not m.group(2)):
+        return None
+    first, last = m.group(1), m.group(2)
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        # bytes=-N：最后 N 个字节
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or size == 0:
+        raise HTTPException(status_code=416, detail="Range Not Satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _iter_range(path: str, start: int, end: int):
+    async def body():
+        # 每个响应各开一个句柄，seek + read 在线程池里执行，不阻塞事件循环（os.pread 在 Windows 上不存在）
+        f = await run_in_threadpool(open, path, "rb")
+        try:
+            await run_in_threadpool(f.seek, start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = await run_in_threadpool(f.read, min(RANGE_READ_SIZE, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+        finally:
+            await run_in_threadpool(f.close)
+    return body()
+
+
+def serve_file(request: Request, path: str, media_type: str = None, etag: str = None, immutable: bool = False):
+    """Serve `path` with ETag / Last-Modified validation (304), single Range requests (206 / 416),
+    Cache-Control and nosniff; anything outside INLINE_MEDIA_TYPES is sent as an attachment.
+    Whole-file responses go through FileResponse (handed to the server as a path when it supports
+    the ASGI pathsend extension); ranges are read in RANGE_READ_SIZE chunks and streamed."""
+    st = os.stat(path)
+    media_type = media_type or mimetypes.guess_type(path)[0] or "application/octet-stream"
+    etag = etag or f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+        "Cache-Control": IMMUTABLE_CACHE if immutable else MUTABLE_CACHE,
+        "Accept-Ranges": "bytes",
+        # 禁止浏览器按内容猜类型，否则声明为图片的文件仍可能被当作 html 执行
+        "X-Content-Type-Options": "nosniff",
+    }
+    if media_type not in INLINE_MEDIA_TYPES:
+        headers["Content-Disposition"] = "attachment"
+    if _not_modified(request, etag, st.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # If-Range 与当前 ETag / Last-Modified 不一致时，文件已变，返回完整内容
+    if range_header and (not if_range or if_range in (etag, headers["Last-Modified"])):
+        byte_range = _parse_range(range_header, st.st_size)
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{st.st_size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(_iter_range(path, start, end), status_code=206,
+                                     media_type=media_type, headers=headers)
+    return FileResponse(path, media_type=media_type, stat_result=st, headers=headers)
+
+
+@router.get("/{file_path:path}")
+def get_upload(file_path: str, request: Request):
+    path = _resolve(file_path)
+    m = _BLOB_NAME_RE.match(file_path)
+    if m:
+        # 内容寻址的文件永不改变：ETag 就是内容哈希，可以永久缓存
+        return serve_file(request, path, etag=f'"{m.group(1)}"', immutable=True)
+    return serve_file(request, path)
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from .. import schemas, crud, models
-from ..database import get_db
+from .. import schemas, crud, models, derivatives, etag
+from ..fastjson import FastJSONResponse
+from ..database import get_db, get_async_db
 from ..utils import get_current_user
+from ..response_cache import response_cache, need_tag
 import logging
 import json
 
@@ -45,109 +48,145 @@ def create_need(need_in: schemas.NeedCreate, db: Session = Depends(get_db),
 # 2. 获取需求列表
 # ==========================================
 @router.get("/", response_model=List[schemas.NeedOut])
-def list_needs(
+async def list_needs(
+        request: Request,
+        response: Response,
         page: int = Query(1, ge=1),
         size: int = Query(10, ge=1, le=100),
-        db: Session = Depends(get_db)
+        cursor: str = None,
+        summary: bool = False,
+        db: AsyncSession = Depends(get_async_db)
 ):
+    # summary=true 时列表不含 description，适合只展示标题的场景
+    # cursor 优先：传入上一页返回的 X-Next-Cursor 时按 (create_time, id) 游标翻页，page 被忽略
+    after = None
+    if cursor:
+        after = crud.decode_cursor(cursor)
+        if not after:
+            raise HTTPException(status_code=400, detail="无效的分页游标")
     skip = (page - 1) * size
-    needs = crud.get_needs(db, skip=skip, limit=size)
-    # augment each NeedOut with hasAccepted
-    results = []
-    for n in needs:
-        # determine if any service for this need has been accepted
-        svc_list = crud.get_services_by_need(db, n.id)
-        has_accepted = any(s.get('status') == 1 for s in svc_list)
-        obj = n.dict() if hasattr(n, 'dict') else n
-        obj['hasAccepted'] = has_accepted
-        results.append(obj)
-    return results
+    # 先对本页要读的行做一次聚合算 ETag（走与列表相同的索引），内容没变就直接 304，省掉 join、取大字段和序列化
+    validator = await crud.need_feed_validator_async(db, skip=skip, limit=size, after=after)
+    tag = etag.make_etag("need-feed", validator, page, size, cursor, summary)
+    if etag.is_not_modified(request, tag):
+        return etag.not_modified(tag)
+    etag.set_etag(response, tag)
+    # get_needs 在 SQL 中一次性算出 userName / hasResponse / hasAccepted，无需逐条再查
+    needs = await crud.get_needs_async(db, skip=skip, limit=size, after=after, summary=summary)
+    # 响应体保持数组不变（兼容旧前端），下一页游标放在响应头里
+    next_cursor = crud.next_cursor(needs, size, "createTime")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    # needs 已是与 NeedOut 字段一致的 dict，直接编码，跳过逐行的模型校验；
+    # 直接返回 Response 时 FastAPI 不再合并 response 上的头，这里显式带上
+    return FastJSONResponse(needs, headers=dict(response.headers))
 
 
 # ==========================================
 # 3. 获取“我的”需求列表（支持分页和筛选）
 # ==========================================
 @router.get("/my-list")
-def my_needs(
+async def my_needs(
+        request: Request,
+        response: Response,
         pageNum: int = Query(1, ge=1),
         pageSize: int = Query(15, ge=1, le=200),
         keyword: str = None,
         serviceType: str = None,
-        db: Session = Depends(get_db),
+        cursor: str = None,
+        summary: bool = False,
+        db: AsyncSession = Depends(get_async_db),
         current_user: models.User = Depends(get_current_user)
 ):
-    # 获取所有匹配的需求
-    all_needs = crud.get_needs_my_list(db, current_user.id, keyword=keyword, service_type=serviceType)
-    # for each need, tag hasAccepted
-    for n in all_needs:
-        svc_list = crud.get_services_by_need(db, n.id)
-        n.hasAccepted = any(s.get('status') == 1 for s in svc_list)
-    total = len(all_needs)
-    # 简单分页
-    start = (pageNum - 1) * pageSize
-    end = start + pageSize
-    records = all_needs[start:end]
-    return {"code": 200, "msg": "ok", "data": {"records": records, "total": total}}
+    after = None
+    if cursor:
+        after = crud.decode_cursor(cursor)
+        if not after:
+            return {"code": 400, "msg": "无效的分页游标", "data": None}
+    validator = await crud.need_my_list_validator_async(db, current_user.id, keyword=keyword, service_type=serviceType,
+                                                        skip=(pageNum - 1) * pageSize, limit=pageSize, after=after)
+    tag = etag.make_etag("need-my-list", current_user.id, validator, pageNum, pageSize, keyword, serviceType, cursor,
+                          summary)
+    if etag.is_not_modified(request, tag):
+        return etag.not_modified(tag)
+    etag.set_etag(response, tag)
+    # 筛选、计数、分页都在数据库中完成，只构造当前页的记录
+    records, total = await crud.get_needs_my_list_async(db, current_user.id, keyword=keyword, service_type=serviceType,
+                                                        skip=(pageNum - 1) * pageSize, limit=pageSize, after=after,
+                                                        summary=summary, total=validator[0])
+    next_cursor = crud.next_cursor(records, pageSize, "createTime")
+    return FastJSONResponse({"code": 200, "msg": "ok", "data": {"records": records, "total": total, "nextCursor": next_cursor}},
+                            headers=dict(response.headers))
 
 
 # ==========================================
 # 4. 获取需求详情
 # ==========================================
+def _need_detail_data(n: models.Need, publish_username) -> dict:
+    """Detail payload of one need (shared by /detail/{id} and /batch)."""
+    # Normalize img_urls: may be None, list, or legacy string
+    img_list = n.img_urls if getattr(n, 'img_urls', None) else []
+    if isinstance(img_list, str):
+        # try JSON decode, else split by comma
+        try:
+            img_list = json.loads(img_list)
+        except Exception:
+            img_list = img_list.split(',') if img_list else []
+
+    # ensure we always return a string (avoid None) so frontend won't fallback to mock 'admin'
+    if not publish_username:
+        publish_username = ''
+
+    return {
+        # provide both `id` and `needId` so frontend (which expects `needId`) works
+        "id": n.id,
+        "needId": n.id,
+        "title": n.title,
+        "description": n.description,
+        "region": n.region,
+        "serviceType": n.service_type,
+        "imgUrls": img_list,
+        "thumbUrls": derivatives.thumbnail_urls(img_list),
+        "videoUrl": n.video_url,
+        # return status as string to be compatible with frontend comparisons (e.g. '0')
+        "status": str(int(n.status) if n.status is not None else 0),
+        # indicate whether there are any responses attached to this need
+        "hasResponse": bool(n.response_count),
+        "userId": n.owner_id,
+        "userName": publish_username,
+        "createTime": n.create_time,
+        # include updateTime which the frontend displays
+        "updateTime": getattr(n, 'update_time', None)
+    }
+
+
 @router.get("/detail/{need_id}")
-def need_detail(need_id: int, db: Session = Depends(get_db)):
+async def need_detail(need_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    # 先查响应缓存；需求或其响应被修改时由 crud 按标签失效
+    cache_key = ("need", need_id)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        # 详情的 ETag 取自响应内容本身：命中缓存时省掉传输
+        tag = etag.make_etag("need-detail", repr(cached["data"]))
+        if etag.is_not_modified(request, tag):
+            return etag.not_modified(tag)
+        etag.set_etag(response, tag)
+        return cached
+    epoch = response_cache.epoch()
     try:
-        n = crud.get_need(db, need_id)
-        if not n:
+        # 需求与发布者用户名一次查出
+        row = await crud.get_need_detail_async(db, need_id)
+        if not row:
             return {"code": 404, "msg": "需求未找到", "data": None}
-
-        # Normalize img_urls: may be None, list, or legacy string
-        img_list = n.img_urls if getattr(n, 'img_urls', None) else []
-        if isinstance(img_list, str):
-            # try JSON decode, else split by comma
-            try:
-                img_list = json.loads(img_list)
-            except Exception:
-                img_list = img_list.split(',') if img_list else []
-
-        # try to get publisher username from relationship, fallback to DB lookup
-        publish_username = None
-        try:
-            publish_username = n.owner.username if getattr(n, 'owner', None) and getattr(n.owner, 'username', None) else None
-        except Exception:
-            publish_username = None
-
-        if not publish_username and getattr(n, 'owner_id', None):
-            try:
-                user = crud.get_user_by_id(db, n.owner_id)
-                publish_username = user.username if user else None
-            except Exception:
-                publish_username = None
-
-        # ensure we always return a string (avoid None) so frontend won't fallback to mock 'admin'
-        if not publish_username:
-            publish_username = ''
-
-        data = {
-            # provide both `id` and `needId` so frontend (which expects `needId`) works
-            "id": n.id,
-            "needId": n.id,
-            "title": n.title,
-            "description": n.description,
-            "region": n.region,
-            "serviceType": n.service_type,
-            "imgUrls": img_list,
-            "videoUrl": n.video_url,
-            # return status as string to be compatible with frontend comparisons (e.g. '0')
-            "status": str(int(n.status) if n.status is not None else 0),
-            # indicate whether there are any responses attached to this need
-            "hasResponse": bool(getattr(n, 'responses', None) and len(n.responses) > 0),
-            "userId": n.owner_id,
-            "userName": publish_username,
-            "createTime": n.create_time,
-            # include updateTime which the frontend displays
-            "updateTime": getattr(n, 'update_time', None)
-        }
-        return {"code": 200, "msg": "ok", "data": data}
+        n, publish_username = row
+        data = _need_detail_data(n, publish_username)
+        result = {"code": 200, "msg": "ok", "data": data}
+        response_cache.put(cache_key, result, tags=[need_tag(n.id)], epoch=epoch)
+        tag = etag.make_etag("need-detail", repr(data))
+        if etag.is_not_modified(request, tag):
+            return etag.not_modified(tag)
+        etag.set_etag(response, tag)
+        return result
     except Exception as e:
         logger.exception(f"Error in need_detail for id={need_id}: %s", e)
         return {"code": 500, "msg": "服务器内部错误：无法获取需求详情", "data": None}
@@ -181,4 +220,43 @@ def delete_need(need_id: int, db: Session = Depends(get_db), current_user: model
         return {"code": 403, "msg": "无权限", "data": None}
 
     crud.delete_need(db, need_id)
-    return {"code": 200, "msg": "删除成功", "data": None}
\ No newline at end of file
+    return {"code": 200, "msg": "删除成功", "data": None}
+
+
+# ==========================================
+# 7. 批量发布 / 批量获取需求
+# ==========================================
+@router.post("/batch")
+def create_needs_batch(batch: schemas.BatchCreate, db: Session = Depends(get_db),
+                       current_user: models.User = Depends(get_current_user)):
+    # 一次鉴权、一个事务；逐条校验，不合法的条目单独报错，其余照常写入
+    if len(batch.items) > crud.BATCH_MAX_ITEMS:
+        return {"code": 400, "msg": f"单次最多提交 {crud.BATCH_MAX_ITEMS} 条", "data": None}
+    results, valid = [], []
+    for index, item in enumerate(batch.items):
+        need_in, error = schemas.validate_item(schemas.NeedCreate, item)
+        if error:
+            results.append({"index": index, "code": 400, "msg": error, "id": None})
+        else:
+            results.append(None)
+            valid.append((index, need_in))
+    ids = crud.create_needs(db, current_user.id, [need_in for _, need_in in valid]) if valid else []
+    for (index, _), new_id in zip(valid, ids):
+        results[index] = {"index": index, "code": 200, "msg": "ok", "id": new_id}
+    return {"code": 200, "msg": "ok",
+            "data": {"created": len(ids), "failed": len(results) - len(ids), "results": results}}
+
+
+@router.get("/batch")
+async def need_details_batch(ids: str = "", db: AsyncSession = Depends(get_async_db)):
+    # ids=1,2,3：一条 IN 查询取回所有需求及发布者；不存在的 id 放在 missing 里
+    need_ids = crud.parse_id_list(ids)
+    if need_ids is None:
+        return {"code": 400, "msg": "ids 必须是逗号分隔的数字", "data": None}
+    if len(need_ids) > crud.BATCH_MAX_ITEMS:
+        return {"code": 400, "msg": f"单次最多查询 {crud.BATCH_MAX_ITEMS} 条", "data": None}
+    found = {n.id: _need_detail_data(n, username) for n, username in await crud.get_need_details_async(db, need_ids)}
+    return {"code": 200, "msg": "ok", "data": {
+        "records": [found[i] for i in need_ids if i in found],
+        "missing": [i for i in need_ids if i not in found],
+    }}
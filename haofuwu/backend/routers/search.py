@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from .. import search
+from ..database import get_db
+
+router = APIRouter()
+
+
+# -------------------------------------------
+# 全文检索 (GET /api/search/?q=...&type=need|service)
+# -------------------------------------------
+@router.get("/")
+def search_items(
+        q: str = Query(..., description="空格分隔的检索词，须全部命中。不少于 3 个字的词走 FTS5 trigram 索引并按相关度排序；"
+                                        "两个字的词（如“保洁”“维修”）走二元索引；只有一个字的词按 LIKE 在原表上匹配。"
+                                        "没有 3 字以上的词时按时间排序、score 为 null"),
+        type: str = Query("need", regex="^(need|service)$"),
+        page: int = Query(1, ge=1),
+        size: int = Query(20, ge=1, le=100),
+        db: Session = Depends(get_db)
+):
+    # 按相关度排序，titleHighlight / snippet 中命中部分用 <mark> 标出；其余文本已做 HTML 转义，可直接 v-html
+    # trigram 索引只能匹配 >=3 个字的片段；两个字的中文词（最常见的检索）由 needs_bigrams / services_bigrams
+    # 定位候选行再 LIKE 核对，不扫描整张表。单字词仍是 LIKE 全表扫描
+    records, total = search.search(db, q, kind=type, skip=(page - 1) * size, limit=size)
+    return {"code": 200, "msg": "ok", "data": {"records": records, "total": total}}
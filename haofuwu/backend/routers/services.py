@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 import logging
 from sqlalchemy.orm import Session
 from typing import List
-from .. import schemas, crud, models
+from .. import schemas, crud, models, etag
+from ..fastjson import FastJSONResponse
 from ..database import get_db
 from ..utils import get_current_user
+from ..response_cache import response_cache, need_tag
 import re
 
 # 注意：这里不写 prefix，因为我们在 main.py 里已经定义了 prefix="/api/service" 和 "/api/service-self"
@@ -15,21 +17,27 @@ logger = logging.getLogger("uvicorn.error")
 # -------------------------------------------
 # 发布服务 (Service Create)
 # -------------------------------------------
+def _need_refuses_responses(need):
+    """Why a new response to `need` is not allowed, or None if it is."""
+    if not need:
+        return "关联的需求不存在"
+    # need.status: 0=已发布, other values mean closed/cancelled
+    if int(getattr(need, 'status', 0)) != 0:
+        return "该需求已关闭或不可响应"
+    # If any accepted service exists for this need, block new responses
+    if need.accepted_service_id is not None:
+        return "该需求已有被接受的响应，无法再次提供服务"
+    return None
+
+
 @router.post("/")  # 对应 /api/service/
 def create_service(service_in: schemas.ServiceCreate, db: Session = Depends(get_db),
                    current_user: models.User = Depends(get_current_user)):
     # Validate need association if provided
     if getattr(service_in, 'needId', None):
-        need = crud.get_need(db, int(service_in.needId))
-        if not need:
-            return {"code": 400, "msg": "关联的需求不存在", "data": None}
-        # need.status: 0=已发布, other values mean closed/cancelled
-        if int(getattr(need, 'status', 0)) != 0:
-            return {"code": 400, "msg": "该需求已关闭或不可响应", "data": None}
-        # If any accepted service exists for this need, block new responses
-        services = crud.get_services_by_need(db, need.id)
-        if any(s.get('status') == 1 for s in services):
-            return {"code": 400, "msg": "该需求已有被接受的响应，无法再次提供服务", "data": None}
+        error = _need_refuses_responses(crud.get_need(db, int(service_in.needId)))
+        if error:
+            return {"code": 400, "msg": error, "data": None}
 
     # 调用 crud 创建
     new_service = crud.create_service(db, current_user.id, service_in)
@@ -41,7 +49,8 @@ def create_service(service_in: schemas.ServiceCreate, db: Session = Depends(get_
 # 获取我的服务列表 (My Service List)
 # -------------------------------------------
 @router.get("/my-list")  # 对应 /api/service-self/my-list
-def my_service_list(request: Request, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def my_service_list(request: Request, summary: bool = False, db: Session = Depends(get_db),
+                    current_user: models.User = Depends(get_current_user)):
     # Debug logging to help trace authentication issues
     try:
         auth_header = request.headers.get('authorization')
@@ -50,9 +59,9 @@ def my_service_list(request: Request, db: Session = Depends(get_db), current_use
         logger.warning(f"[SERVICE-MY-LIST] logging failed: {_e}")
 
     # 1. 调用 crud 获取列表
-    data = crud.get_my_service_list(db, current_user.id)
-    # 2. 返回给前端（注意：不加 response_model，防止 422 错误）
-    return {"code": 200, "msg": "ok", "data": data}
+    data = crud.get_my_service_list(db, current_user.id, summary=summary)
+    # 2. 返回给前端（注意：不加 response_model，防止 422 错误）；data 已是 dict，直接编码
+    return FastJSONResponse({"code": 200, "msg": "ok", "data": data})
 
 
 # -------------------------------------------
@@ -62,16 +71,47 @@ def my_service_list(request: Request, db: Session = Depends(get_db), current_use
 def service_list(
         keyword: str = None,
         serviceType: str = None,
+        page: int = Query(1, ge=1),
+        size: int = Query(None, ge=1, le=200),
+        cursor: str = None,
+        summary: bool = False,
         db: Session = Depends(get_db)
 ):
+    # 不传 size 时保持旧行为返回全部；传 size 时按 page 或 cursor 分页；summary=true 时不返回 content
+    after = None
+    if cursor:
+        after = crud.decode_cursor(cursor)
+        if not after:
+            return {"code": 400, "msg": "无效的分页游标", "data": None}
+    skip = (page - 1) * size if size else 0
     # 调用 crud
-    data = crud.get_service_list(db, keyword=keyword, service_type=serviceType)
-    return {"code": 200, "msg": "ok", "data": data}
+    data = crud.get_service_list(db, keyword=keyword, service_type=serviceType,
+                                 skip=skip, limit=size, after=after, summary=summary)
+    return FastJSONResponse({"code": 200, "msg": "ok", "data": data, "nextCursor": crud.next_cursor(data, size, "create_time")})
 
 
 # -------------------------------------------
 # 获取服务详情 (Detail) — 返回前端期望字段
 # -------------------------------------------
+def _service_detail_data(s: models.Service, need_title, owner_username) -> dict:
+    """Detail payload of one service (shared by /detail/{id} and /batch)."""
+    # files stored as JSON
+    files = s.files if s.files else []
+    return {
+        "id": s.id,
+        "needId": s.need_id,
+        "needTitle": need_title,
+        "serviceType": s.service_type,
+        "title": s.title,
+        "content": s.content,
+        "files": files,
+        "status": int(s.status) if s.status is not None else 0,
+        "userId": s.owner_id,
+        "userName": owner_username or '',
+        "createTime": s.create_time
+    }
+
+
 @router.get("/detail/{service_id}")
 def service_detail(service_id: str, db: Session = Depends(get_db)):
     # Accept both numeric ids and prefixed ids like 'service_123'
@@ -81,6 +121,13 @@ def service_detail(service_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=422, detail="无效的服务ID")
     sid = int(m.group(1))
 
+    # 先查响应缓存；服务或其所属需求被修改时由 crud 失效
+    cache_key = ("service", sid)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    epoch = response_cache.epoch()
+
     s = crud.get_service(db, sid)
     if not s:
         return {"code": 404, "msg": "服务不存在", "data": None}
@@ -105,26 +152,9 @@ def service_detail(service_id: str, db: Session = Depends(get_db)):
         except Exception:
             owner_username = None
 
-    if not owner_username:
-        owner_username = ''
-
-    # files stored as JSON
-    files = s.files if s.files else []
-
-    data = {
-        "id": s.id,
-        "needId": s.need_id,
-        "needTitle": need_title,
-        "serviceType": s.service_type,
-        "title": s.title,
-        "content": s.content,
-        "files": files,
-        "status": int(s.status) if s.status is not None else 0,
-        "userId": s.owner_id,
-        "userName": owner_username,
-        "createTime": s.create_time
-    }
-    return {"code": 200, "msg": "ok", "data": data}
+    result = {"code": 200, "msg": "ok", "data": _service_detail_data(s, need_title, owner_username)}
+    response_cache.put(cache_key, result, tags=[need_tag(s.need_id)] if s.need_id else (), epoch=epoch)
+    return result
 
 
 # -------------------------------------------
@@ -142,13 +172,33 @@ def update_service(service_id: int, service_in: schemas.ServiceCreate, db: Sessi
     return {"code": 200, "msg": "修改成功", "data": None}
 
 
+# -------------------------------------------
+# 删除服务 (Delete Service) - 仅限拥有者
+# -------------------------------------------
+@router.delete("/{service_id}")
+def delete_service(service_id: int, db: Session = Depends(get_db),
+                   current_user: models.User = Depends(get_current_user)):
+    res = crud.delete_service(db, service_id, current_user.id)
+    if res is None:
+        return {"code": 404, "msg": "服务不存在", "data": None}
+    if res is False:
+        return {"code": 403, "msg": "无权限删除", "data": None}
+    return {"code": 200, "msg": "删除成功", "data": None}
+
+
 # -------------------------------------------
 # 列出某个需求的所有响应（服务自荐）
 # -------------------------------------------
 @router.get('/by-need/{need_id}')
-def services_by_need(need_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def services_by_need(need_id: int, request: Request, response: Response, summary: bool = False,
+                     db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    # 聚合查询算 ETag，响应列表没变时直接 304
+    tag = etag.make_etag("services-by-need", need_id, crud.services_by_need_validator(db, need_id), summary)
+    if etag.is_not_modified(request, tag):
+        return etag.not_modified(tag)
+    etag.set_etag(response, tag)
     # return list of services for a need (include publisher username)
-    data = crud.get_services_by_need(db, need_id)
+    data = crud.get_services_by_need(db, need_id, summary=summary)
     return {"code": 200, "msg": "ok", "data": data}
 
 
@@ -176,3 +226,46 @@ def reject_service_endpoint(service_id: int, db: Session = Depends(get_db), curr
     if res is False:
         return {"code": 403, "msg": "无权限或该响应不属于你的需求", "data": None}
     return {"code": 200, "msg": "拒绝成功", "data": None}
+
+
+# -------------------------------------------
+# 批量发布响应 / 批量获取服务详情
+# -------------------------------------------
+@router.post("/batch")
+def create_services_batch(batch: schemas.BatchCreate, db: Session = Depends(get_db),
+                          current_user: models.User = Depends(get_current_user)):
+    # 一次鉴权、一个事务；关联需求一条 IN 查询取回，逐条按与单条接口相同的规则校验
+    if len(batch.items) > crud.BATCH_MAX_ITEMS:
+        return {"code": 400, "msg": f"单次最多提交 {crud.BATCH_MAX_ITEMS} 条", "data": None}
+    parsed = [schemas.validate_item(schemas.ServiceCreate, item) for item in batch.items]
+    needs = crud.get_needs_by_ids(db, {svc_in.needId for svc_in, _ in parsed if svc_in and svc_in.needId})
+    results, valid = [], []
+    for index, (svc_in, error) in enumerate(parsed):
+        if not error and svc_in.needId:
+            error = _need_refuses_responses(needs.get(svc_in.needId))
+        if error:
+            results.append({"index": index, "code": 400, "msg": error, "id": None})
+        else:
+            results.append(None)
+            valid.append((index, svc_in))
+    ids = crud.create_services(db, current_user.id, [svc_in for _, svc_in in valid]) if valid else []
+    for (index, _), new_id in zip(valid, ids):
+        results[index] = {"index": index, "code": 200, "msg": "ok", "id": new_id}
+    return {"code": 200, "msg": "ok",
+            "data": {"created": len(ids), "failed": len(results) - len(ids), "results": results}}
+
+
+@router.get("/batch")
+def service_details_batch(ids: str = "", db: Session = Depends(get_db)):
+    # ids=1,2,3：服务、所属需求标题、发布者用户名一条 IN 查询取回；不存在的 id 放在 missing 里
+    service_ids = crud.parse_id_list(ids)
+    if service_ids is None:
+        return {"code": 400, "msg": "ids 必须是逗号分隔的数字", "data": None}
+    if len(service_ids) > crud.BATCH_MAX_ITEMS:
+        return {"code": 400, "msg": f"单次最多查询 {crud.BATCH_MAX_ITEMS} 条", "data": None}
+    found = {s.id: _service_detail_data(s, need_title, username)
+             for s, need_title, username in crud.get_service_details(db, service_ids)}
+    return {"code": 200, "msg": "ok", "data": {
+        "records": [found[i] for i in service_ids if i in found],
+        "missing": [i for i in service_ids if i not in found],
+    }}
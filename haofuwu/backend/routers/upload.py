@@ -1,22 +1,170 @@
 import os
-from fastapi import APIRouter, UploadFile, File, HTTPException
+import re
+import uuid
+import datetime
+from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from ..database import get_async_db
+from .. import blobstore, derivatives, models, schemas
+from .files import serve_file
 
 router = APIRouter()
 
-UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads")
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+# 断点续传：默认分片大小、允许的分片大小范围、文件总大小上限；会话过期时间见 blobstore.SESSION_TTL
+RESUMABLE_CHUNK_SIZE = 5 * 1024 * 1024
+RESUMABLE_MIN_CHUNK_SIZE = 256 * 1024
+RESUMABLE_MAX_CHUNK_SIZE = 64 * 1024 * 1024
+RESUMABLE_MAX_BYTES = int(os.environ.get("HAOFUWU_RESUMABLE_MAX_BYTES") or 4 * 1024 * 1024 * 1024)
 
 
-@router.post("/")
-async def upload_file(file: UploadFile = File(...)):
-    filename = file.filename
-    dest = os.path.join(UPLOAD_DIR, filename)
+async def _store_temp(db: AsyncSession, tmp_path: str, size: int, sha256: str, filename: str, content_type: str):
+    """Move a finished temp file into the blob store and register it; return the upload response data."""
     try:
-        with open(dest, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        # 同一内容已登记过时沿用原扩展名，保证 URL 稳定
+        ext = (await db.execute(blobstore.existing_ext_stmt(sha256))).scalar()
+        if ext is None:
+            ext = blobstore.normalize_ext(filename)
+        created = blobstore.commit_temp(tmp_path, sha256, ext)
+        await db.execute(blobstore.register_blob_stmt(sha256, ext, size, content_type))
+        await db.commit()
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    # 图片在后台线程池里生成缩略图 / 网页优化图，不拖慢本次上传
+    derivatives.schedule(sha256, ext)
+    return {"filename": filename, "url": blobstore.blob_url(sha256, ext), "size": size, "sha256": sha256,
+            "deduplicated": not created}
+
+
+# 不用 UploadFile = File(...)：那样 Starlette 会先把整个请求体解析进临时文件，大小上限只能在收完之后检查，
+# 文件还要再拷贝一次。这里直接边收边解析 multipart，文件内容只写一次盘
+_UPLOAD_OPENAPI = {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+    "type": "object", "required": ["file"], "properties": {"file": {"type": "string", "format": "binary"}}}}}}}
+
+
+@router.post("/", openapi_extra=_UPLOAD_OPENAPI)
+async def upload_file(request: Request, db: AsyncSession = Depends(get_async_db)):
+    try:
+        # 边读边写临时文件并计算 SHA-256，再按内容哈希放到分片目录；相同内容只保存一份
+        tmp_path, size, sha256, filename, content_type = await blobstore.stream_upload_to_temp(request)
+        data = await _store_temp(db, tmp_path, size, sha256, os.path.basename(filename), content_type)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     # 返回兼容前端的响应结构
-    return JSONResponse({"code": 200, "msg": "ok", "data": {"filename": filename, "url": f"/uploads/{filename}"}})
+    return JSONResponse({"code": 200, "msg": "ok", "data": data})
+
+
+# ==========================================
+# 断点续传：创建会话 -> PUT 分片（可重传、可乱序）-> 查询已收到的分片 -> 合并
+# ==========================================
+
+async def _get_session(db: AsyncSession, upload_id: str) -> models.UploadSession:
+    # 过期会话在 gc_uploads.py 清理之前仍留在表里：每次查找都检查过期时间，过期的一律 410，不再接收分片或合并
+    sess = await db.get(models.UploadSession, upload_id)
+    if sess is None:
+        raise HTTPException(status_code=404, detail="上传会话不存在")
+    if blobstore.session_expired(sess):
+        raise HTTPException(status_code=410, detail="上传会话已过期，请重新创建")
+    return sess
+
+
+def _session_status(sess: models.UploadSession) -> dict:
+    received = blobstore.received_chunks(sess.id)
+    received_set = set(received)
+    return {
+        "uploadId": sess.id,
+        "filename": sess.filename,
+        "size": sess.size,
+        "chunkSize": sess.chunk_size,
+        "totalChunks": sess.total_chunks,
+        "receivedChunks": received,
+        "missingChunks": [i for i in range(sess.total_chunks) if i not in received_set],
+        "expiresAt": blobstore.session_expires_at(sess).isoformat(),
+    }
+
+
+@router.post("/sessions")
+async def create_upload_session(body: schemas.UploadSessionCreate, db: AsyncSession = Depends(get_async_db)):
+    if body.size <= 0 or body.size > RESUMABLE_MAX_BYTES:
+        raise HTTPException(status_code=413 if body.size > 0 else 400,
+                            detail=f"文件大小必须在 1 到 {RESUMABLE_MAX_BYTES} 字节之间")
+    chunk_size = body.chunkSize or RESUMABLE_CHUNK_SIZE
+    if not RESUMABLE_MIN_CHUNK_SIZE <= chunk_size <= RESUMABLE_MAX_CHUNK_SIZE:
+        raise HTTPException(status_code=400, detail="分片大小超出允许范围")
+    now = datetime.datetime.utcnow()
+    sess = models.UploadSession(
+        id=uuid.uuid4().hex,
+        filename=os.path.basename(body.filename or ""),
+        content_type=body.contentType,
+        size=body.size,
+        chunk_size=chunk_size,
+        total_chunks=(body.size + chunk_size - 1) // chunk_size,
+        create_time=now,
+        update_time=now,
+    )
+    os.makedirs(blobstore.session_dir(sess.id), exist_ok=True)
+    db.add(sess)
+    await db.commit()
+    return {"code": 200, "msg": "ok", "data": _session_status(sess)}
+
+
+@router.put("/sessions/{upload_id}/chunks/{index}")
+async def put_upload_chunk(upload_id: str, index: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    sess = await _get_session(db, upload_id)
+    if not 0 <= index < sess.total_chunks:
+        raise HTTPException(status_code=400, detail="分片序号超出范围")
+    # 除最后一片外每片都必须正好是 chunk_size
+    expected = min(sess.chunk_size, sess.size - index * sess.chunk_size)
+    size = await blobstore.write_chunk(request.stream(), blobstore.chunk_path(upload_id, index), expected)
+    if size != expected:
+        os.remove(blobstore.chunk_path(upload_id, index))
+        raise HTTPException(status_code=400, detail=f"分片 {index} 应为 {expected} 字节，实际收到 {size} 字节")
+    sess.update_time = datetime.datetime.utcnow()
+    await db.commit()
+    return {"code": 200, "msg": "ok", "data": {"index": index, "size": size}}
+
+
+@router.get("/sessions/{upload_id}")
+async def get_upload_session(upload_id: str, db: AsyncSession = Depends(get_async_db)):
+    sess = await _get_session(db, upload_id)
+    return {"code": 200, "msg": "ok", "data": _session_status(sess)}
+
+
+@router.post("/sessions/{upload_id}/complete")
+async def complete_upload_session(upload_id: str, db: AsyncSession = Depends(get_async_db)):
+    sess = await _get_session(db, upload_id)
+    status = _session_status(sess)
+    if status["missingChunks"]:
+        return JSONResponse({"code": 409, "msg": "还有分片未上传", "data": status}, status_code=409)
+    # 逐片流式合并并计算哈希，不把整个文件读进内存
+    tmp_path, size, sha256 = await run_in_threadpool(blobstore.assemble_chunks, upload_id, sess.total_chunks)
+    data = await _store_temp(db, tmp_path, size, sha256, sess.filename, sess.content_type)
+    await db.delete(sess)
+    await db.commit()
+    await run_in_threadpool(blobstore.remove_session_files, upload_id)
+    return {"code": 200, "msg": "ok", "data": data}
+
+
+@router.delete("/sessions/{upload_id}")
+async def abort_upload_session(upload_id: str, db: AsyncSession = Depends(get_async_db)):
+    sess = await _get_session(db, upload_id)
+    await db.delete(sess)
+    await db.commit()
+    await run_in_threadpool(blobstore.remove_session_files, upload_id)
+    return {"code": 200, "msg": "ok", "data": None}
+
+
+@router.get("/derivative/{variant}/{sha256}")
+async def get_derivative(variant: str, sha256: str, request: Request):
+    if variant not in derivatives.VARIANTS or not re.fullmatch(r"[0-9a-f]{64}", sha256):
+        raise HTTPException(status_code=404, detail="Not Found")
+    # 派生图缓存在磁盘上；文件缺失时当场重新生成
+    path = await run_in_threadpool(derivatives.ensure, sha256, variant)
+    if not path:
+        raise HTTPException(status_code=404, detail="Not Found")
+    # 内容由 sha256 决定，可以长期缓存
+    return serve_file(request, path, media_type="image/jpeg", immutable=True)
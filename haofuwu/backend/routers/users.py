@@ -1,9 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from .. import schemas, models
-from ..database import get_db
-# 👇 多加了一个 get_password_hash
-from ..utils import get_current_user, get_password_hash
+from ..database import get_db, get_async_db
+# 👇 多加了一个 get_password_hash_async（进程池中计算哈希）
+from ..utils import get_current_user, get_password_hash_async
+from ..user_cache import user_cache
+from ..response_cache import response_cache, invalidate_user
 
 router = APIRouter()
 
@@ -50,6 +54,9 @@ def update_my_profile(data: schemas.UserCreate, db: Session = Depends(get_db), c
     db.add(user)
     db.commit()
     db.refresh(user)
+    # 资料已变更，丢弃缓存中的旧用户对象和用户详情响应
+    user_cache.invalidate(user.username)
+    invalidate_user(user.id, user.username)
     data = {
         "userId": user.id,
         "id": user.id,
@@ -67,6 +74,11 @@ def update_my_profile(data: schemas.UserCreate, db: Session = Depends(get_db), c
 @router.get('/detail/{user_id}')
 def get_user_detail(user_id: int, db: Session = Depends(get_db)):
     from ..crud import get_user_by_id
+    cache_key = ("user", user_id)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    epoch = response_cache.epoch()
     user = get_user_by_id(db, user_id)
     if not user:
         return {"code": 404, "msg": "用户未找到", "data": None}
@@ -82,12 +94,19 @@ def get_user_detail(user_id: int, db: Session = Depends(get_db)):
         "intro": user.intro or "",
         "phone": user.phone or ""
     }
-    return {"code": 200, "msg": "ok", "data": data}
+    result = {"code": 200, "msg": "ok", "data": data}
+    response_cache.put(cache_key, result, epoch=epoch)
+    return result
 
 
 @router.get('/by-username')
 def get_user_by_username(username: str, db: Session = Depends(get_db)):
     """Lookup user by username and return same payload shape as /detail/{user_id}."""
+    cache_key = ("username", username)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    epoch = response_cache.epoch()
     user = db.query(models.User).filter(models.User.username == username).first()
     if not user:
         return {"code": 404, "msg": "用户未找到", "data": None}
@@ -102,7 +121,9 @@ def get_user_by_username(username: str, db: Session = Depends(get_db)):
         "intro": user.intro or "",
         "phone": user.phone or ""
     }
-    return {"code": 200, "msg": "ok", "data": data}
+    result = {"code": 200, "msg": "ok", "data": data}
+    response_cache.put(cache_key, result, epoch=epoch)
+    return result
 
 
 @router.get("/check-username")
@@ -137,14 +158,14 @@ def check_username(username: str, db: Session = Depends(get_db)):
 
 
 @router.post("/register")
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     # 1. 虽然前端检查过了，后端为了安全再检查一遍用户名
-    db_user = db.query(models.User).filter(models.User.username == user.username).first()
+    db_user = (await db.execute(select(models.User).where(models.User.username == user.username))).scalars().first()
     if db_user:
         return {"code": 400, "msg": "用户名已存在", "data": None}
 
-    # 2. 密码加密 (这一步很重要，不能存明文密码)
-    hashed_password = get_password_hash(user.password)
+    # 2. 密码加密 (这一步很重要，不能存明文密码)；在独立进程池中计算，不占用请求线程
+    hashed_password = await get_password_hash_async(user.password)
 
     # 3. 创建用户数据
     # 注意：前端传过来的是 realName，数据库里叫 full_name
@@ -162,11 +183,11 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
     # 4. 保存到数据库
     try:
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
         # 5. 返回成功信息
         return {"code": 200, "msg": "注册成功", "data": new_user.id}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"❌ 注册写入数据库失败: {e}")
         return {"code": 500, "msg": f"注册失败: {str(e)}", "data": None}
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, validator
+from pydantic import BaseModel, EmailStr, ValidationError, validator
 from typing import Optional, List, Any
 import datetime
 
@@ -44,6 +44,7 @@ class NeedOut(BaseModel):
     region: Optional[str]
     serviceType: str
     imgUrls: Optional[List[str]] = None
+    thumbUrls: Optional[List[str]] = None  # 与 imgUrls 一一对应的缩略图地址
     videoUrl: Optional[str] = None
     status: int
     hasResponse: Optional[bool] = False
@@ -91,3 +92,27 @@ class ServiceOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+# --- 批量创建 ---
+class BatchCreate(BaseModel):
+    # items 逐条用 validate_item 校验：单条不合法只让这一条失败，不让整个请求 422
+    items: List[Any]
+
+
+def validate_item(model, item):
+    """Validate one batch item against `model`. Returns (instance, None) or (None, error message)."""
+    if not isinstance(item, dict):
+        return None, "每一项必须是对象"
+    try:
+        return model(**item), None
+    except ValidationError as e:
+        err = e.errors()[0]
+        field = ".".join(str(part) for part in err.get("loc", ()))
+        return None, f"{field}: {err.get('msg')}" if field else err.get("msg")
+
+# --- 断点续传上传 ---
+class UploadSessionCreate(BaseModel):
+    filename: str
+    size: int  # 文件总字节数
+    chunkSize: Optional[int] = None  # 不传时使用服务端默认值
+    contentType: Optional[str] = None
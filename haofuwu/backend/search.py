@@ -0,0 +1,293 @@
+"""SQLite FTS5 全文检索（需求 / 服务）。
+
+needs_fts 覆盖 Need.title/description/region，services_fts 覆盖 Service.title/content。
+两张都是 external-content 表（正文仍只存在 needs / services 中），由触发器在
+INSERT / UPDATE / DELETE 时同步，因此 crud 里的写操作不需要额外代码。
+
+分词使用 FTS5 内置的 trigram 分词器：中文没有空格，unicode61 会把整句当成一个词，
+trigram 则对任意 >=3 个字符的子串建立索引，可以直接匹配中文片段。两个字的检索词（如“保洁”，
+也是最常见的中文词长）trigram 查不到，改由 needs_bigrams / services_bigrams 二元索引按片段
+定位候选行（见迁移 v0007），再用 LIKE 在候选行上核对；只有一个字的检索词才在原表上 LIKE。
+"""
+import datetime
+import html
+import logging
+import re
+
+from sqlalchemy import and_, text, column as column_
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("uvicorn.error")
+
+# ensure_fts / detect_fts 确认 FTS 表可用后置为 True；未启用时检索全部走 LIKE
+FTS_ENABLED = False
+
+# trigram 分词器最短可索引长度
+MIN_TERM_LEN = 3
+# 二元索引的片段长度：不少于这么长、又走不了 FTS 的检索词先按开头两个字定位候选行
+BIGRAM_LEN = 2
+
+HIGHLIGHT_OPEN = "<mark>"
+HIGHLIGHT_CLOSE = "</mark>"
+# 高亮结果要当 HTML 渲染，而标题 / 正文是用户输入：先用控制字符标出命中位置，
+# 整段 HTML 转义后再把控制字符换成 <mark>，输出里只有这一种标签
+_MARK_OPEN = "\x02"
+_MARK_CLOSE = "\x03"
+
+# (fts 表, 原表, 索引列)
+FTS_TABLES = {
+    "need": ("needs_fts", "needs", ("title", "description", "region")),
+    "service": ("services_fts", "services", ("title", "content")),
+}
+
+# (二元索引表, 原表, 索引列)，由迁移 v0007 的触发器同步
+BIGRAM_TABLES = {
+    "need": ("needs_bigrams", "needs", ("title", "description", "region")),
+    "service": ("services_bigrams", "services", ("title", "content")),
+}
+
+# SQLite 的 lower() 只转换 ASCII 字母，检索词按同样的规则折叠
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+# bm25 列权重：标题命中比正文命中更重要
+BM25_WEIGHTS = {
+    "need": (10.0, 1.0, 2.0),
+    "service": (10.0, 1.0),
+}
+
+
+def _fts_ddl(fts_table: str, base_table: str, columns):
+    cols = ", ".join(columns)
+    new_vals = ", ".join(f"new.{c}" for c in columns)
+    old_vals = ", ".join(f"old.{c}" for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"{cols}, content='{base_table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {base_table} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_vals}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {base_table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); END",
+        # 只有被索引的列变化时才重建该行，避免状态/计数类更新带来无谓的索引写入
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {cols} ON {base_table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); "
+        f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_vals}); END",
+    ]
+
+
+def create_fts(conn):
+    """Create the FTS5 tables and sync triggers on `conn` if missing, back-filling existing rows.
+
+    Raises when SQLite lacks FTS5/trigram support. Migration v0005 carries its own frozen copy of this DDL.
+    """
+    existing = {row[0] for row in conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%_fts'"))}
+    for fts_table, base_table, columns in FTS_TABLES.values():
+        for stmt in _fts_ddl(fts_table, base_table, columns):
+            conn.execute(text(stmt))
+        if fts_table not in existing:
+            conn.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+
+
+def ensure_fts(engine):
+    """Create the FTS5 tables and sync triggers if missing, back-filling existing rows.
+
+    Silently leaves FTS disabled when the database is not SQLite or lacks FTS5/trigram support.
+    """
+    global FTS_ENABLED
+    if engine.dialect.name != "sqlite":
+        return False
+    try:
+        with engine.begin() as conn:
+            create_fts(conn)
+        FTS_ENABLED = True
+    except Exception as e:
+        logger.warning("FTS5 full-text index unavailable, keyword search falls back to LIKE: %s", e)
+        FTS_ENABLED = False
+    return FTS_ENABLED
+
+
+def detect_fts(engine):
+    """Startup check (no DDL): enable FTS only if the migration managed to create both FTS tables."""
+    global FTS_ENABLED
+    if engine.dialect.name != "sqlite":
+        FTS_ENABLED = False
+        return False
+    names = [fts_table for fts_table, _, _ in FTS_TABLES.values()]
+    with engine.connect() as conn:
+        found = {row[0] for row in conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN (%s)"
+            % ", ".join(f"'{n}'" for n in names)))}
+    FTS_ENABLED = found == set(names)
+    return FTS_ENABLED
+
+
+def split_terms(q: str):
+    """Split a user query on whitespace into (long_terms, short_terms) by trigram indexability."""
+    terms = [t for t in re.split(r"\s+", (q or "").strip()) if t]
+    long_terms = [t for t in terms if len(t) >= MIN_TERM_LEN]
+    short_terms = [t for t in terms if len(t) < MIN_TERM_LEN]
+    return long_terms, short_terms
+
+
+def match_expression(terms, column: str = None):
+    """Quote each term as an FTS5 phrase so user input cannot inject query syntax; terms are ANDed."""
+    phrases = ['"' + t.replace('"', '""') + '"' for t in terms]
+    if column:
+        return " AND ".join(f"{column} : {p}" for p in phrases)
+    return " AND ".join(phrases)
+
+
+def _escape_like(term: str):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def bigram_gram(term: str) -> str:
+    """The bigram-table key for `term`: its first two characters, folded like SQLite lower()."""
+    return term[:BIGRAM_LEN].translate(_ASCII_LOWER)
+
+
+def bigram_rebuild_statements():
+    """SQL that re-fills every bigram table from its base table (bulk loads drop the sync triggers)."""
+    statements = []
+    for bigram_table, base_table, columns in BIGRAM_TABLES.values():
+        values = " UNION ALL ".join(f"SELECT id, {c} AS v FROM {base_table}" for c in columns)
+        statements += [
+            f"DELETE FROM {bigram_table}",
+            f"INSERT OR IGNORE INTO {bigram_table} (gram, row_id) SELECT lower(substr(s.v, p.n, 2)), s.id "
+            f"FROM ({values}) AS s JOIN search_positions AS p ON p.n < length(s.v)",
+        ]
+    return statements
+
+
+def keyword_filter(model, keyword: str, column: str = "title"):
+    """Return a SQLAlchemy condition matching `keyword` as one substring of model.<column> (LIKE semantics,
+    whitespace included, no term splitting).
+
+    The candidate rows come from the trigram FTS index for keywords of MIN_TERM_LEN+ characters, or from
+    the bigram table for shorter ones (and when FTS is off); LIKE then checks the column on those rows only.
+    A one-character keyword is a plain LIKE.
+    """
+    attr = getattr(model, column)
+    kind = "need" if model.__tablename__ == "needs" else "service"
+    if FTS_ENABLED and len(keyword) >= MIN_TERM_LEN:
+        fts_table = FTS_TABLES[kind][0]
+        rows = text(f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH :fts_kw").bindparams(
+            fts_kw=match_expression([keyword], column)).columns(column_("rowid"))
+    elif len(keyword) >= BIGRAM_LEN:
+        bigram_table = BIGRAM_TABLES[kind][0]
+        rows = text(f"SELECT row_id FROM {bigram_table} WHERE gram = :bigram_kw").bindparams(
+            bigram_kw=bigram_gram(keyword)).columns(column_("row_id"))
+    else:
+        return attr.contains(keyword)
+    return and_(model.id.in_(rows), attr.contains(keyword))
+
+
+def _marked_to_html(value):
+    """HTML-escape text whose matches are wrapped in _MARK_OPEN / _MARK_CLOSE, then turn those into <mark>."""
+    if value is None:
+        return None
+    return html.escape(value).replace(_MARK_OPEN, HIGHLIGHT_OPEN).replace(_MARK_CLOSE, HIGHLIGHT_CLOSE)
+
+
+def _highlight_text(value, terms, width: int = 48):
+    """Python-side snippet for matches that did not go through FTS (short terms); HTML-escaped."""
+    if not value:
+        return value
+    value = value.replace(_MARK_OPEN, "").replace(_MARK_CLOSE, "")
+    first = min((value.find(t) for t in terms if t in value), default=-1)
+    if first < 0:
+        return html.escape(value[:width])
+    start = max(0, first - width // 3)
+    piece = value[start:start + width]
+    for t in sorted(set(terms), key=len, reverse=True):
+        piece = piece.replace(t, f"{_MARK_OPEN}{t}{_MARK_CLOSE}")
+    return ("…" if start > 0 else "") + _marked_to_html(piece) + ("…" if start + width < len(value) else "")
+
+
+def _to_datetime(value):
+    # 原生 SQL 读出的 DATETIME 是字符串
+    if isinstance(value, str):
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+def search(db: Session, q: str, kind: str = "need", skip: int = 0, limit: int = 20):
+    """Ranked keyword search over needs or services; whitespace-separated terms must all match.
+
+    Returns (records, total). Each record carries `score` (bm25, lower is better; None when the
+    query only had short terms), `titleHighlight` and `snippet`: HTML-escaped text whose only
+    markup is <mark> around matches, safe to render as HTML.
+    """
+    fts_table, base_table, columns = FTS_TABLES[kind]
+    long_terms, short_terms = split_terms(q)
+    if not long_terms and not short_terms:
+        return [], 0
+    use_fts = FTS_ENABLED and bool(long_terms)
+    body_col = "description" if kind == "need" else "content"
+    extra_cols = "b.region, b.service_type, b.status, b.owner_id" if kind == "need" \
+        else "b.need_id, b.service_type, b.status, b.owner_id"
+
+    params = {}
+    where = []
+    if use_fts:
+        params["match"] = match_expression(long_terms)
+        where.append(f"{fts_table} MATCH :match")
+    like_terms = short_terms if use_fts else long_terms + short_terms
+    bigram_table = BIGRAM_TABLES[kind][0]
+    for i, term in enumerate(like_terms):
+        params[f"kw{i}"] = f"%{_escape_like(term)}%"
+        if len(term) >= BIGRAM_LEN:
+            # 二元索引给出含这两个字的行，LIKE 只在这些行上核对
+            params[f"bg{i}"] = bigram_gram(term)
+            where.append(f"b.id IN (SELECT row_id FROM {bigram_table} WHERE gram = :bg{i})")
+        where.append("(" + " OR ".join(f"b.{c} LIKE :kw{i} ESCAPE '\\'" for c in columns) + ")")
+
+    if use_fts:
+        weights = ", ".join(str(w) for w in BM25_WEIGHTS[kind])
+        body_idx = columns.index(body_col)
+        from_clause = f"{fts_table} JOIN {base_table} b ON b.id = {fts_table}.rowid"
+        select_cols = (
+            f"b.id, b.title, b.{body_col}, {extra_cols}, b.create_time, "
+            f"bm25({fts_table}, {weights}) AS score, "
+            f"highlight({fts_table}, 0, char(2), char(3)) AS title_hl, "
+            f"snippet({fts_table}, {body_idx}, char(2), char(3), '…', 24) AS body_hl"
+        )
+        order = "score, b.id DESC"
+    else:
+        from_clause = f"{base_table} b"
+        select_cols = f"b.id, b.title, b.{body_col}, {extra_cols}, b.create_time, NULL AS score, " \
+                      f"NULL AS title_hl, NULL AS body_hl"
+        order = "b.create_time DESC, b.id DESC"
+    where_sql = " AND ".join(where)
+
+    total = db.execute(text(f"SELECT COUNT(*) FROM {from_clause} WHERE {where_sql}"), params).scalar() or 0
+    params.update(limit=limit, skip=skip)
+    rows = db.execute(text(
+        f"SELECT {select_cols} FROM {from_clause} WHERE {where_sql} ORDER BY {order} LIMIT :limit OFFSET :skip"
+    ), params).all()
+
+    terms = long_terms + short_terms
+    records = []
+    for r in rows:
+        title_hl = _marked_to_html(r.title_hl) if r.title_hl is not None else _highlight_text(r.title, terms, width=200)
+        body_hl = _marked_to_html(r.body_hl) if r.body_hl is not None else _highlight_text(getattr(r, body_col), terms)
+        item = {
+            "id": r.id,
+            "title": r.title,
+            "serviceType": r.service_type,
+            "status": int(r.status) if r.status is not None else 0,
+            "userId": r.owner_id,
+            "createTime": _to_datetime(r.create_time),
+            "score": r.score,
+            "titleHighlight": title_hl,
+            "snippet": body_hl,
+        }
+        if kind == "need":
+            item["region"] = r.region
+        else:
+            item["needId"] = r.need_id
+        records.append(item)
+    return records, total
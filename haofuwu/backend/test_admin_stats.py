@@ -0,0 +1,85 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from collections import defaultdict
+from datetime import datetime
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import SessionLocal
+from backend.models import Need, Service
+from backend import crud, schemas
+
+client = TestClient(app)
+
+REGION_KW = '统计测试区'
+
+
+def scan_stats(start, end, region_kw):
+    """The original full-scan aggregation, used as the oracle for the rollup."""
+    db = SessionLocal()
+    try:
+        end_next = datetime(end.year + end.month // 12, end.month % 12 + 1, 1)
+        need_q = db.query(Need).filter(Need.create_time >= start, Need.create_time < end_next)
+        svc_q = db.query(Service).filter(Service.create_time >= start, Service.create_time < end_next,
+                                         Service.status == 1)
+        if region_kw:
+            need_q = need_q.filter(Need.region.ilike(f'%{region_kw}%'))
+            svc_q = svc_q.join(Need).filter(Need.region.ilike(f'%{region_kw}%'))
+        grouped = defaultdict(lambda: [0, 0])
+        for n in need_q.all():
+            grouped[(n.create_time.strftime('%Y-%m'), n.region or '')][0] += 1
+        for s in svc_q.all():
+            region = s.need.region if s.need and s.need.region else ''
+            grouped[(s.create_time.strftime('%Y-%m'), region)][1] += 1
+        return dict(grouped)
+    finally:
+        db.close()
+
+
+def endpoint_stats(start, end, region_kw):
+    body = client.post('/api/admin/stats', params={'startMonth': start.strftime('%Y-%m'),
+                                                   'endMonth': end.strftime('%Y-%m'),
+                                                   'regionKeyword': region_kw}).json()
+    assert body['code'] == 200
+    return {(r['month'], r['region']): [r['monthNeedCount'], r['monthServiceSuccessCount']]
+            for r in body['data']['list']}
+
+
+def test_rollup_matches_full_scan_after_writes(ensure_user):
+    db = SessionLocal()
+    try:
+        crud.rebuild_monthly_stats(db)
+        owner = ensure_user('test_stats_owner').id
+        helper = ensure_user('test_stats_helper').id
+
+        def need(region):
+            return crud.create_need(db, owner, schemas.NeedCreate(serviceType='保洁', title='统计', description=None,
+                                                                  region=region))
+
+        n1, n2, n3 = need(REGION_KW + 'A'), need(REGION_KW + 'B'), need(None)
+        s1 = crud.create_service(db, helper, schemas.ServiceCreate(needId=n1.id, title='s1'))
+        s2 = crud.create_service(db, helper, schemas.ServiceCreate(needId=n1.id, title='s2'))
+        s3 = crud.create_service(db, helper, schemas.ServiceCreate(needId=n2.id, title='s3'))
+        crud.accept_service(db, s1.id, owner)
+        crud.accept_service(db, s2.id, owner)  # s1 flips to rejected
+        crud.accept_service(db, s3.id, owner)
+        crud.reject_service(db, s3.id, owner)
+        crud.accept_service(db, s3.id, owner)
+        # region edit moves the need and its accepted response
+        crud.update_need(db, n1.id, schemas.NeedCreate(serviceType='保洁', title='统计', description=None,
+                                                       region=REGION_KW + 'C'))
+        # moving an accepted response to another need moves its count
+        crud.update_service(db, s3.id, helper, schemas.ServiceCreate(needId=n3.id))
+        crud.delete_need(db, n2.id)
+    finally:
+        db.close()
+
+    now = datetime.now()
+    start = datetime(now.year - 1, now.month, 1)
+    end = datetime(now.year, now.month, 1)
+    for kw in (REGION_KW, None):
+        assert endpoint_stats(start, end, kw) == scan_stats(start, end, kw)
+
+    body = client.post('/api/admin/stats', params={'startMonth': end.strftime('%Y-%m'),
+                                                   'endMonth': end.strftime('%Y-%m'),
+                                                   'regionKeyword': REGION_KW}).json()['data']
+    assert body['totalNeed'] == sum(r['monthNeedCount'] for r in body['list'])
@@ -0,0 +1,133 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import SessionLocal
+from backend.models import Need
+from backend.utils import get_current_user
+from backend import crud, schemas
+
+client = TestClient(app)
+
+
+def create_need(owner, title):
+    db = SessionLocal()
+    try:
+        return crud.create_need(db, owner.id, schemas.NeedCreate(serviceType='保洁', title=title,
+                                                                description=None)).id
+    finally:
+        db.close()
+
+
+def test_batch_create_needs_reports_each_item(sql_queries, ensure_user):
+    user = ensure_user('test_batch_owner')
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        items = [
+            {'serviceType': '保洁', 'title': 'batch a', 'description': None, 'region': '北京'},
+            {'serviceType': '保洁'},  # 缺 title
+            'not an object',
+            {'serviceType': '维修', 'title': 'batch b', 'description': 'd', 'region': '北京'},
+        ]
+        resp = client.post('/api/need/batch', json={'items': items})
+        assert resp.status_code == 200
+        data = resp.json()['data']
+        assert (data['created'], data['failed']) == (2, 2)
+        assert [r['index'] for r in data['results']] == [0, 1, 2, 3]
+        assert [r['code'] for r in data['results']] == [200, 400, 400, 200]
+        assert 'title' in data['results'][1]['msg']
+        assert data['results'][2]['msg'] == '每一项必须是对象'
+
+        # 一个事务：插入随条数增长的只有 INSERT 本身，没有逐条 commit / refresh
+        stats = sql_queries[-1]
+        assert stats.path == '/api/need/batch'
+        assert not stats.repeated()
+
+        ok_ids = [r['id'] for r in data['results'] if r['code'] == 200]
+        db = SessionLocal()
+        try:
+            titles = {n.id: n.title for n in db.query(Need).filter(Need.id.in_(ok_ids))}
+        finally:
+            db.close()
+        assert titles == {ok_ids[0]: 'batch a', ok_ids[1]: 'batch b'}
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_batch_fetch_needs_keeps_request_order(ensure_user):
+    user = ensure_user('test_batch_owner')
+    first, second = create_need(user, 'fetch 1'), create_need(user, 'fetch 2')
+    missing = second + 100000
+
+    resp = client.get(f'/api/need/batch?ids={second},{missing},{first},{second}')
+    data = resp.json()['data']
+    assert [r['id'] for r in data['records']] == [second, first]
+    assert data['records'][0]['title'] == 'fetch 2'
+    assert data['records'][0]['userName'] == user.username
+    assert data['missing'] == [missing]
+
+    assert client.get('/api/need/batch?ids=1,abc').json()['code'] == 400
+    too_many = ','.join(str(i) for i in range(crud.BATCH_MAX_ITEMS + 1))
+    assert client.get(f'/api/need/batch?ids={too_many}').json()['code'] == 400
+    assert client.get('/api/need/batch').json()['data'] == {'records': [], 'missing': []}
+
+
+def test_batch_create_services_checks_each_need(sql_queries, ensure_user):
+    owner = ensure_user('test_batch_owner')
+    helper = ensure_user('test_batch_helper')
+    open_need, closed_need, taken_need = (create_need(owner, t) for t in ('open', 'closed', 'taken'))
+    db = SessionLocal()
+    try:
+        db.query(Need).filter(Need.id == closed_need).update({Need.status: 1})
+        db.commit()
+        taken_svc = crud.create_service(db, owner.id, schemas.ServiceCreate(needId=taken_need, title='first')).id
+        crud.accept_service(db, taken_svc, owner.id)
+    finally:
+        db.close()
+
+    app.dependency_overrides[get_current_user] = lambda: helper
+    try:
+        items = [
+            {'needId': open_need, 'title': 'r1'},
+            {'needId': closed_need, 'title': 'r2'},
+            {'needId': taken_need, 'title': 'r3'},
+            {'needId': open_need, 'title': 'r4'},
+            {'needId': open_need + 100000, 'title': 'r5'},
+        ]
+        data = client.post('/api/service/batch', json={'items': items}).json()['data']
+        assert (data['created'], data['failed']) == (2, 3)
+        assert [r['msg'] for r in data['results'][1:3]] == ['该需求已关闭或不可响应', '该需求已有被接受的响应，无法再次提供服务']
+        assert data['results'][4]['msg'] == '关联的需求不存在'
+        # 关联需求一次取回，计数按需求合并更新
+        assert not sql_queries[-1].repeated()
+
+        db = SessionLocal()
+        try:
+            need = db.get(Need, open_need)
+            assert (need.response_count, need.pending_count) == (2, 2)
+        finally:
+            db.close()
+
+        ids = [r['id'] for r in data['results'] if r['code'] == 200]
+        fetched = client.get(f"/api/service/batch?ids={','.join(map(str, ids))},0").json()['data']
+        assert [s['id'] for s in fetched['records']] == ids
+        assert {s['needTitle'] for s in fetched['records']} == {'open'}
+        assert {s['userName'] for s in fetched['records']} == {helper.username}
+        assert fetched['missing'] == [0]
+        assert sql_queries[-1].count == 1
+        # 单条详情接口与批量接口字段一致
+        assert client.get(f'/api/service/detail/{ids[0]}').json()['data'] == fetched['records'][0]
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_batch_rejects_oversized_requests(ensure_user):
+    user = ensure_user('test_batch_owner')
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        items = [{'serviceType': '保洁', 'title': 'x', 'description': None}] * (crud.BATCH_MAX_ITEMS + 1)
+        assert client.post('/api/need/batch', json={'items': items}).json()['code'] == 400
+        assert client.post('/api/service/batch', json={'items': items}).json()['code'] == 400
+        assert client.post('/api/need/batch', json={'items': []}).json()['data']['created'] == 0
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
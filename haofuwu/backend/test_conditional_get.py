@@ -0,0 +1,101 @@
+import sys, os
+import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import SessionLocal
+from backend.models import Need
+from backend.utils import get_current_user
+from backend import crud, schemas
+
+client = TestClient(app)
+
+
+def revalidate(url):
+    first = client.get(url)
+    assert first.status_code == 200 and first.headers['etag']
+    second = client.get(url, headers={'If-None-Match': first.headers['etag']})
+    return first, second
+
+
+def test_unchanged_polls_get_304_and_writes_change_the_etag(ensure_user):
+    owner = ensure_user('test_etag_owner')
+    helper = ensure_user('test_etag_helper')
+    db = SessionLocal()
+    try:
+        need = crud.create_need(db, owner.id, schemas.NeedCreate(serviceType='保洁', title='etag', description=None))
+        other = crud.create_need(db, owner.id, schemas.NeedCreate(serviceType='保洁', title='etag2', description=None))
+        need_id, other_id = need.id, other.id
+    finally:
+        db.close()
+
+    app.dependency_overrides[get_current_user] = lambda: owner
+    try:
+        for url in ('/api/need/?size=20', '/api/need/my-list?pageSize=5', f'/api/service/by-need/{need_id}',
+                    f'/api/need/detail/{need_id}'):
+            first, second = revalidate(url)
+            assert second.status_code == 304 and second.content == b''
+            assert second.headers['etag'] == first.headers['etag']
+
+        feed_tag = client.get('/api/need/?size=20').headers['etag']
+        by_need_tag = client.get(f'/api/service/by-need/{need_id}').headers['etag']
+        db = SessionLocal()
+        try:
+            svc = crud.create_service(db, helper.id, schemas.ServiceCreate(needId=need_id, title='resp'))
+        finally:
+            db.close()
+        # counters changed without touching need.update_time: the feed must still revalidate
+        assert client.get('/api/need/?size=20', headers={'If-None-Match': feed_tag}).status_code == 200
+        resp = client.get(f'/api/service/by-need/{need_id}', headers={'If-None-Match': by_need_tag})
+        assert resp.status_code == 200 and len(resp.json()['data']) == 1
+
+        feed_tag = client.get('/api/need/?size=20').headers['etag']
+        db = SessionLocal()
+        try:
+            crud.update_service(db, svc.id, helper.id, schemas.ServiceCreate(needId=other_id))
+        finally:
+            db.close()
+        assert client.get('/api/need/?size=20', headers={'If-None-Match': feed_tag}).status_code == 200
+
+        # different page parameters never share a validator
+        assert client.get('/api/need/?size=20').headers['etag'] != client.get('/api/need/?size=10').headers['etag']
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_feed_etag_follows_status_even_when_update_time_goes_backwards(ensure_user):
+    owner = ensure_user('test_etag_owner')
+    db = SessionLocal()
+    try:
+        need = crud.create_need(db, owner.id, schemas.NeedCreate(serviceType='保洁', title='clock', description=None))
+        need_id, created = need.id, need.update_time
+    finally:
+        db.close()
+
+    first, second = revalidate('/api/need/?size=20')
+    assert second.status_code == 304
+    db = SessionLocal()
+    try:
+        crud.cancel_need(db, need_id)
+        # cancel_need 走 onupdate=utcnow，东八区下比 create_need 写的本地时间早 8 小时
+        db.query(Need).filter(Need.id == need_id).update(
+            {Need.update_time: created - datetime.timedelta(hours=8)}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+    resp = client.get('/api/need/?size=20', headers={'If-None-Match': first.headers['etag']})
+    assert resp.status_code == 200
+    assert next(n for n in resp.json() if n['id'] == need_id)['status'] == 2
+
+
+def test_feed_etag_changes_when_rows_shift_between_pages(ensure_user):
+    owner = ensure_user('test_etag_owner')
+    page2 = '/api/need/?size=2&page=2'
+    tag = client.get(page2).headers['etag']
+    db = SessionLocal()
+    try:
+        crud.create_need(db, owner.id, schemas.NeedCreate(serviceType='保洁', title='shift', description=None))
+    finally:
+        db.close()
+    # 新需求插在第一页顶部，第二页整体后移一行
+    assert client.get(page2, headers={'If-None-Match': tag}).status_code == 200
@@ -0,0 +1,116 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import SessionLocal
+from backend.models import User, Need, Service
+from backend.utils import get_current_user
+from backend import crud
+
+client = TestClient(app)
+
+
+def ensure_cursor_data(count=25):
+    """Seed a user owning `count` needs (each with one response); returns the user."""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == 'test_cursor_user').first()
+        if not user:
+            user = User(username='test_cursor_user', hashed_password='fake', full_name='Cursor User')
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+        existing = db.query(Need).filter(Need.owner_id == user.id).count()
+        for i in range(existing, count):
+            need = Need(owner_id=user.id, title=f'Cursor Need {i}', service_type='保洁', region='测试区',
+                        description='cursor test', img_urls=[], status=0)
+            db.add(need)
+            db.flush()
+            db.add(Service(need_id=need.id, owner_id=user.id, title=f'Cursor Service {i}', service_type='保洁'))
+        db.commit()
+        # services were inserted directly, bypassing crud, so rebuild the denormalised counters
+        crud.recompute_need_counters(db)
+        db.refresh(user)
+        db.expunge(user)
+        return user
+    finally:
+        db.close()
+
+
+def test_cursor_roundtrip():
+    import datetime
+    now = datetime.datetime(2024, 5, 1, 12, 30, 15, 123456)
+    assert crud.decode_cursor(crud.encode_cursor(now, 42)) == (now, 42)
+    assert crud.decode_cursor('not-a-cursor') is None
+
+
+def test_need_feed_cursor_walk_matches_offset_pages():
+    ensure_cursor_data()
+    offset_ids = [n['id'] for n in client.get('/api/need/?page=1&size=100').json()]
+
+    seen = []
+    resp = client.get('/api/need/?size=7')
+    while True:
+        assert resp.status_code == 200
+        seen.extend(n['id'] for n in resp.json())
+        cursor = resp.headers.get('x-next-cursor')
+        if not cursor or len(seen) >= len(offset_ids):
+            break
+        resp = client.get(f'/api/need/?size=7&cursor={cursor}')
+    assert seen[:len(offset_ids)] == offset_ids
+    assert len(seen) == len(set(seen))
+
+
+def test_need_feed_rejects_bad_cursor():
+    assert client.get('/api/need/?cursor=garbage').status_code == 400
+
+
+def test_my_list_cursor_walk():
+    user = ensure_cursor_data()
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        seen = []
+        cursor = None
+        while True:
+            url = '/api/need/my-list?pageSize=10' + (f'&cursor={cursor}' if cursor else '')
+            body = client.get(url).json()
+            assert body['code'] == 200
+            seen.extend(r['id'] for r in body['data']['records'])
+            cursor = body['data']['nextCursor']
+            if not cursor:
+                break
+        assert len(seen) == body['data']['total']
+        assert len(seen) == len(set(seen))
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_service_list_cursor_walk():
+    ensure_cursor_data()
+    full = client.get('/api/service/list?keyword=Cursor Service').json()['data']
+    seen = []
+    cursor = None
+    while True:
+        url = '/api/service/list?keyword=Cursor Service&size=6' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(url).json()
+        seen.extend(s['id'] for s in body['data'])
+        cursor = body['nextCursor']
+        if not cursor:
+            break
+    assert seen == [s['id'] for s in full]
+
+
+def test_my_list_pages_in_sql():
+    user = ensure_cursor_data()
+    db = SessionLocal()
+    try:
+        page, total = crud.get_needs_my_list(db, user.id, skip=5, limit=5)
+        everything, total_all = crud.get_needs_my_list(db, user.id)
+        assert total == total_all == len(everything)
+        assert [n.id for n in page] == [n.id for n in everything[5:10]]
+        filtered, filtered_total = crud.get_needs_my_list(db, user.id, keyword='Cursor Need 1', service_type='保洁')
+        assert filtered_total == len(filtered)
+        assert all('Cursor Need 1' in n.title for n in filtered)
+        assert all(n.hasResponse for n in filtered)
+    finally:
+        db.close()
@@ -0,0 +1,81 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import io
+from PIL import Image
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import SessionLocal
+from backend.models import User, BlobDerivative
+from backend import crud, schemas, derivatives
+
+client = TestClient(app)
+
+
+def png_bytes(size, color):
+    buf = io.BytesIO()
+    Image.new('RGB', size, color).save(buf, 'PNG')
+    return buf.getvalue()
+
+
+def test_need_images_get_cached_thumbnails():
+    # 每次用不同颜色，保证是新 blob，不受 uploads/ 里上次留下的文件影响
+    color = tuple(os.urandom(3))
+    data = client.post('/api/upload/', files={'file': ('photo.png', png_bytes((800, 600), color), 'image/png')}).json()['data']
+    sha256 = data['sha256']
+    # 后台任务生成完毕（已存在时直接返回）
+    derivatives.generate(sha256, '.png')
+
+    db = SessionLocal()
+    try:
+        owner = db.query(User).filter(User.username == 'test_thumb_owner').first()
+        if not owner:
+            owner = User(username='test_thumb_owner', hashed_password='fake')
+            db.add(owner)
+            db.commit()
+        need = crud.create_need(db, owner.id, schemas.NeedCreate(
+            serviceType='保洁', title='缩略图', description=None, imgUrls=[data['url'], 'http://example.com/legacy.png']))
+        need_id = need.id
+        assert {r.variant for r in db.query(BlobDerivative).filter(BlobDerivative.sha256 == sha256)} == {'thumb', 'web'}
+    finally:
+        db.close()
+
+    detail = client.get(f'/api/need/detail/{need_id}').json()['data']
+    thumb_url = derivatives.derivative_url(sha256, 'thumb')
+    assert detail['thumbUrls'] == [thumb_url, 'http://example.com/legacy.png']
+    feed_item = next(n for n in client.get('/api/need/?size=100').json() if n['id'] == need_id)
+    assert feed_item['thumbUrls'] == detail['thumbUrls']
+
+    resp = client.get(thumb_url)
+    assert resp.status_code == 200 and resp.headers['content-type'] == 'image/jpeg'
+    assert Image.open(io.BytesIO(resp.content)).size == (320, 240)
+
+    # a missing derivative is regenerated on request
+    os.remove(derivatives.derivative_path(sha256, 'web'))
+    resp = client.get(derivatives.derivative_url(sha256, 'web'))
+    assert resp.status_code == 200
+    assert Image.open(io.BytesIO(resp.content)).size == (800, 600)
+
+    assert client.get(f'/api/upload/derivative/huge/{sha256}').status_code == 404
+    assert client.get(derivatives.derivative_url('0' * 64, 'thumb')).status_code == 404
+
+
+def test_existing_derivative_files_are_recorded_again():
+    data = client.post('/api/upload/', files={'file': ('photo.png', png_bytes((640, 480), tuple(os.urandom(3))), 'image/png')}).json()['data']
+    sha256 = data['sha256']
+    derivatives.generate(sha256, '.png')
+
+    # 库换了（新建 / 恢复）而派生图文件还在：再次 generate 时补登记
+    db = SessionLocal()
+    try:
+        db.query(BlobDerivative).filter(BlobDerivative.sha256 == sha256).delete()
+        db.commit()
+    finally:
+        db.close()
+    made = derivatives.generate(sha256, '.png')
+    assert set(made) == {'thumb', 'web'}
+    db = SessionLocal()
+    try:
+        rows = {r.variant: (r.width, r.height) for r in db.query(BlobDerivative).filter(BlobDerivative.sha256 == sha256)}
+    finally:
+        db.close()
+    assert rows == {'thumb': (320, 240), 'web': (640, 480)}
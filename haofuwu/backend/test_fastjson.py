@@ -0,0 +1,78 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import datetime
+import json
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import SessionLocal
+from backend.utils import get_current_user
+from backend import crud, schemas, fastjson
+
+client = TestClient(app)
+
+
+def legacy_json(value):
+    # 旧路径：pydantic 模型 -> jsonable_encoder -> json
+    return json.loads(json.dumps(jsonable_encoder(value)))
+
+
+def test_dumps_matches_jsonable_encoder_formats():
+    for ts in (datetime.datetime(2024, 5, 1, 8, 30, 0), datetime.datetime(2024, 5, 1, 8, 30, 0, 123456)):
+        payload = {"createTime": ts, "title": "上门维修", "n": None, "ok": True}
+        assert json.loads(fastjson.dumps(payload)) == legacy_json(payload)
+    # 无 orjson 时的退回路径也保持同样的格式
+    saved = fastjson.orjson
+    fastjson.orjson = None
+    try:
+        payload = {"createTime": datetime.datetime(2024, 5, 1, 8, 30, 0, 5), "title": "保洁"}
+        assert json.loads(fastjson.dumps(payload)) == legacy_json(payload)
+    finally:
+        fastjson.orjson = saved
+
+
+def test_list_endpoints_match_pydantic_output(ensure_user):
+    owner = ensure_user('test_fastjson_owner')
+    helper = ensure_user('test_fastjson_helper')
+    db = SessionLocal()
+    try:
+        need = crud.create_need(db, owner.id, schemas.NeedCreate(serviceType='保洁', title='fastjson',
+                                                                 description='中文描述', imgUrls=['/uploads/a.png'],
+                                                                 region='北京'))
+        need_id = need.id
+        crud.create_service(db, helper.id, schemas.ServiceCreate(needId=need_id, title='resp', content='好的'))
+        expected_feed = legacy_json(crud.get_needs(db, skip=0, limit=20))
+        expected_mine = legacy_json(crud.get_needs_my_list(db, owner.id, skip=0, limit=5)[0])
+        expected_services = legacy_json([schemas.ServiceOut(**s) for s in crud.get_my_service_list(db, helper.id)])
+    finally:
+        db.close()
+
+    resp = client.get('/api/need/?size=20')
+    assert resp.status_code == 200 and resp.headers['content-type'] == 'application/json'
+    assert resp.headers['etag']
+    assert resp.json() == expected_feed
+    assert any(n['id'] == need_id and n['hasResponse'] and n['imgUrls'] == ['/uploads/a.png'] for n in resp.json())
+
+    # 满页时 X-Next-Cursor 仍然在响应头里
+    assert client.get('/api/need/?size=1').headers.get('x-next-cursor')
+
+    app.dependency_overrides[get_current_user] = lambda: owner
+    try:
+        resp = client.get('/api/need/my-list?pageSize=5')
+        assert resp.status_code == 200 and resp.headers['etag']
+        assert resp.json()['data']['records'] == expected_mine
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+    app.dependency_overrides[get_current_user] = lambda: helper
+    try:
+        resp = client.get('/api/service-self/my-list')
+        assert resp.status_code == 200
+        assert resp.json()['data'] == expected_services
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+    resp = client.get('/api/service/list?size=1')
+    body = resp.json()
+    assert body['code'] == 200 and len(body['data']) == 1 and body['nextCursor']
+    assert set(body['data'][0]) == set(schemas.ServiceOut.__fields__)
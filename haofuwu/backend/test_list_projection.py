@@ -0,0 +1,70 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from backend.main import app
+from backend.database import SessionLocal, engine
+from backend.utils import get_current_user
+from backend import crud, schemas
+
+client = TestClient(app)
+
+
+def test_summary_mode_drops_heavy_columns(ensure_user):
+    owner = ensure_user('test_projection_owner')
+    helper = ensure_user('test_projection_helper')
+    db = SessionLocal()
+    try:
+        need = crud.create_need(db, owner.id, schemas.NeedCreate(serviceType='保洁', title='projection',
+                                                                 description='很长的描述' * 200))
+        need_id = need.id
+        crud.create_service(db, helper.id, schemas.ServiceCreate(needId=need_id, title='resp', content='内容' * 200))
+    finally:
+        db.close()
+
+    full = client.get('/api/need/?size=50').json()
+    summary = client.get('/api/need/?size=50&summary=true').json()
+    assert all('description' in n for n in full)
+    assert all('description' not in n for n in summary)
+    # 除去大字段，其余内容完全一致
+    assert [{k: v for k, v in n.items() if k != 'description'} for n in full] == summary
+    # summary 与完整列表不能共用 ETag
+    assert client.get('/api/need/?size=50').headers['etag'] != client.get('/api/need/?size=50&summary=true').headers['etag']
+
+    services = client.get('/api/service/list?summary=true').json()['data']
+    assert services and all('content' not in s for s in services)
+    assert all('content' in s for s in client.get('/api/service/list').json()['data'])
+
+    app.dependency_overrides[get_current_user] = lambda: owner
+    try:
+        records = client.get('/api/need/my-list?pageSize=5&summary=true').json()['data']['records']
+        assert records and all('description' not in r for r in records)
+        data = client.get(f'/api/service/by-need/{need_id}?summary=true').json()['data']
+        assert len(data) == 1 and 'content' not in data[0] and data[0]['userName'] == 'test_projection_helper'
+        data = client.get(f'/api/service/by-need/{need_id}').json()['data']
+        assert data[0]['content'] == '内容' * 200
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_services_by_need_is_one_query(ensure_user):
+    owner = ensure_user('test_projection_owner')
+    db = SessionLocal()
+    try:
+        need = crud.create_need(db, owner.id, schemas.NeedCreate(serviceType='保洁', title='n+1', description=None))
+        need_id = need.id
+        for i in range(5):
+            helper = ensure_user(f'test_projection_helper{i}')
+            crud.create_service(db, helper.id, schemas.ServiceCreate(needId=need_id, title=f'r{i}'))
+
+        statements = []
+        listener = lambda conn, cursor, stmt, params, context, many: statements.append(stmt)
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            rows = crud.get_services_by_need(db, need_id)
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+        assert len(rows) == 5 and all(r['userName'].startswith('test_projection_helper') for r in rows)
+        assert len(statements) == 1
+    finally:
+        db.close()
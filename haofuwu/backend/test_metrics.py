@@ -0,0 +1,71 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import re
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import SessionLocal
+from backend import crud, metrics, schemas
+
+client = TestClient(app)
+
+
+def sample(text, name, **labels):
+    """Return the value of one sample line, or None when it is missing."""
+    want = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    m = re.search(rf'^{re.escape(name)}\{{{re.escape(want)}\}} (\S+)$', text, re.M)
+    return float(m.group(1)) if m else None
+
+
+def test_metrics_use_route_templates_and_count_every_request(ensure_user):
+    owner = ensure_user('test_metrics_owner')
+    db = SessionLocal()
+    try:
+        need_id = crud.create_need(db, owner.id, schemas.NeedCreate(serviceType='保洁', title='metrics',
+                                                                   description=None)).id
+    finally:
+        db.close()
+    route = "/api/need/detail/{need_id}"
+    before = client.get('/metrics').text
+    count_before = sample(before, "http_requests_total", method="GET", route=route, status=200) or 0
+
+    for _ in range(3):
+        assert client.get(f'/api/need/detail/{need_id}').status_code == 200
+    assert client.get('/no/such/path').status_code == 404
+
+    resp = client.get('/metrics')
+    assert resp.status_code == 200
+    assert resp.headers['content-type'].startswith('text/plain; version=0.0.4')
+    text = resp.text
+    assert sample(text, "http_requests_total", method="GET", route=route, status=200) == count_before + 3
+    # 具体 id 不会出现在标签里，未匹配的路径合并为一个标签值
+    assert f'/api/need/detail/{need_id}"' not in text
+    assert sample(text, "http_requests_total", method="GET", route=metrics.UNMATCHED, status=404) >= 1
+    labels = dict(method="GET", route=route, status=200)
+    assert sample(text, "http_request_duration_seconds_count", **labels) == count_before + 3
+    assert sample(text, "http_request_duration_seconds_bucket", **labels, le="+Inf") == count_before + 3
+    assert sample(text, "http_response_size_bytes_sum", **labels) > 0
+    # /metrics 请求本身正在处理中
+    assert sample(text, "http_requests_in_flight", method="GET") >= 1
+    assert re.search(r'^threadpool_tokens \d+$', text, re.M)
+    assert re.search(r'^threadpool_tasks_waiting \d+$', text, re.M)
+    assert sample(text, "db_pool_checkouts_total", engine="sync") > 0
+    assert sample(text, "db_pool_checked_out", engine="sync") is not None
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = metrics.Registry()
+    for seconds in (0.0005, 0.003, 0.003, 0.2, 30.0):
+        registry.observe("GET", "/x", 200, seconds, 100)
+    text = asyncio.run(_render(registry))
+    labels = dict(method="GET", route="/x", status=200)
+    assert sample(text, "http_request_duration_seconds_bucket", **labels, le=0.001) == 1
+    assert sample(text, "http_request_duration_seconds_bucket", **labels, le=0.005) == 3
+    assert sample(text, "http_request_duration_seconds_bucket", **labels, le=0.25) == 4
+    assert sample(text, "http_request_duration_seconds_bucket", **labels, le=10.0) == 4
+    assert sample(text, "http_request_duration_seconds_bucket", **labels, le="+Inf") == 5
+    assert sample(text, "http_response_size_bytes_bucket", **labels, le=128) == 5
+
+
+async def _render(registry):
+    return metrics.render(registry)
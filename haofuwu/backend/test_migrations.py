@@ -0,0 +1,99 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import datetime
+import tempfile
+import threading
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from backend.database import Base
+from backend import migrations, models  # noqa: F401
+
+
+def temp_engine(tmp):
+    return create_engine(f"sqlite:///{os.path.join(tmp, 'm.db')}", connect_args={"check_same_thread": False})
+
+
+def test_fresh_database_is_rejected_until_upgraded():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = temp_engine(tmp)
+        with pytest.raises(migrations.SchemaVersionError):
+            migrations.require_current(engine)
+        applied = migrations.upgrade(engine)
+        assert [m.version for m in applied] == [m.version for m in migrations.discover()]
+        assert migrations.require_current(engine) == migrations.head()
+        # 已是最新时再次升级什么都不做
+        assert migrations.upgrade(engine) == []
+        engine.dispose()
+
+
+def test_legacy_create_all_database_is_adopted():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = temp_engine(tmp)
+        # 模拟引入迁移之前的旧库：create_all 建表，但缺少后来才加的列，统计表为空
+        Base.metadata.create_all(bind=engine)
+        now = datetime.datetime(2024, 3, 5)
+        with engine.begin() as conn:
+            for col in ("response_count", "pending_count", "accepted_service_id"):
+                conn.execute(text(f"ALTER TABLE needs DROP COLUMN {col}"))
+            for col in ("phone", "intro"):
+                conn.execute(text(f"ALTER TABLE users DROP COLUMN {col}"))
+            conn.execute(text("INSERT INTO users (id, username, hashed_password) VALUES (1, 'a', 'x'), (2, 'b', 'x')"))
+            conn.execute(text("INSERT INTO needs (id, title, service_type, owner_id, region, create_time) "
+                              "VALUES (1, 't', '保洁', 1, '北京', :now)"), {"now": now})
+            conn.execute(text("INSERT INTO services (id, need_id, owner_id, status, create_time) "
+                              "VALUES (1, 1, 2, 1, :now), (2, 1, 2, 0, :now)"), {"now": now})
+
+        migrations.upgrade(engine)
+        assert migrations.current_version(engine) == migrations.head()
+        with engine.connect() as conn:
+            assert {"phone", "intro"} <= migrations.column_names(conn, "users")
+            assert tuple(conn.execute(text(
+                "SELECT response_count, pending_count, accepted_service_id FROM needs WHERE id = 1")).one()) == (2, 1, 1)
+            assert tuple(conn.execute(text(
+                "SELECT month, region, need_count, service_success_count FROM stats_monthly")).one()) == \
+                ('2024-03', '北京', 1, 1)
+        engine.dispose()
+
+
+def test_concurrent_upgrades_apply_each_migration_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = temp_engine(tmp)
+        results, errors = [], []
+
+        def run():
+            try:
+                results.append(migrations.upgrade(engine))
+            except Exception as e:  # pragma: no cover - 失败时在断言里显示
+                errors.append(e)
+
+        threads = [threading.Thread(target=run) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert not errors
+        assert sorted(m.version for applied in results for m in applied) == [m.version for m in migrations.discover()]
+        assert [v for v, _, _ in migrations.history(engine)] == [m.version for m in migrations.discover()]
+        engine.dispose()
+
+
+def test_migrated_schema_matches_models():
+    # 迁移是固定 SQL，不再随模型变化：模型改了而没写迁移时这里会失败
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = temp_engine(tmp)
+        migrations.upgrade(engine)
+        with engine.connect() as conn:
+            db_inspect = inspect(conn)
+            for table in Base.metadata.sorted_tables:
+                assert {c['name'] for c in db_inspect.get_columns(table.name)} == {c.name for c in table.columns}, table.name
+                indexed = {tuple(ix['column_names']) for ix in db_inspect.get_indexes(table.name)}
+                assert {tuple(c.name for c in ix.columns) for ix in table.indexes} <= indexed, table.name
+        engine.dispose()
+
+
+def test_migrations_do_not_import_application_code():
+    for migration in migrations.discover():
+        path = os.path.join(os.path.dirname(migrations.__file__), migration.module.rsplit('.', 1)[1] + '.py')
+        with open(path, encoding='utf-8') as f:
+            source = f.read()
+        assert 'from ..' not in source and 'import backend' not in source, migration.module
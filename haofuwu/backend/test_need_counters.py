@@ -0,0 +1,83 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import SessionLocal
+from backend.models import Need
+from backend.utils import get_current_user
+from backend import crud, schemas
+
+client = TestClient(app)
+
+
+def counters(need_id):
+    db = SessionLocal()
+    try:
+        n = db.query(Need).filter(Need.id == need_id).first()
+        return n.response_count, n.pending_count, n.accepted_service_id
+    finally:
+        db.close()
+
+
+def test_counters_follow_service_lifecycle(ensure_user):
+    owner = ensure_user('test_counter_owner')
+    helper = ensure_user('test_counter_helper')
+    db = SessionLocal()
+    try:
+        need = crud.create_need(db, owner.id, schemas.NeedCreate(serviceType='保洁', title='计数测试', description=None))
+        other = crud.create_need(db, owner.id, schemas.NeedCreate(serviceType='保洁', title='计数测试2', description=None))
+        update_time = need.update_time
+        assert counters(need.id) == (0, 0, None)
+
+        svc_in = schemas.ServiceCreate(needId=need.id, title='我来', content='ok')
+        s1 = crud.create_service(db, helper.id, svc_in)
+        s2 = crud.create_service(db, helper.id, svc_in)
+        s3 = crud.create_service(db, helper.id, svc_in)
+        assert counters(need.id) == (3, 3, None)
+
+        assert crud.reject_service(db, s3.id, owner.id) is True
+        assert counters(need.id) == (3, 2, None)
+
+        assert crud.accept_service(db, s1.id, owner.id) is True
+        assert counters(need.id) == (3, 0, s1.id)
+
+        # moving an accepted response to another need moves its counters too
+        crud.update_service(db, s1.id, helper.id, schemas.ServiceCreate(needId=other.id))
+        assert counters(need.id) == (2, 0, None)
+        assert counters(other.id) == (1, 0, s1.id)
+
+        assert crud.delete_service(db, s2.id, owner.id) is False
+        assert crud.delete_service(db, s2.id, helper.id) is True
+        assert counters(need.id) == (1, 0, None)
+
+        # counter maintenance is not an edit of the need itself
+        db.expire_all()
+        assert crud.get_need(db, need.id).update_time == update_time
+
+        expected = {nid: counters(nid) for nid in (need.id, other.id)}
+        crud.recompute_need_counters(db)
+        assert {nid: counters(nid) for nid in (need.id, other.id)} == expected
+    finally:
+        db.close()
+
+
+def test_create_service_guard_uses_accepted_pointer(ensure_user):
+    owner = ensure_user('test_counter_owner')
+    helper = ensure_user('test_counter_helper')
+    db = SessionLocal()
+    try:
+        need = crud.create_need(db, owner.id, schemas.NeedCreate(serviceType='保洁', title='守卫测试', description=None))
+        svc = crud.create_service(db, helper.id, schemas.ServiceCreate(needId=need.id, title='a'))
+        crud.accept_service(db, svc.id, owner.id)
+        need_id = need.id
+    finally:
+        db.close()
+
+    app.dependency_overrides[get_current_user] = lambda: helper
+    try:
+        body = client.post('/api/service/', json={'needId': need_id, 'title': 'late'}).json()
+        assert body['code'] == 400
+        detail = client.get(f'/api/need/detail/{need_id}').json()['data']
+        assert detail['hasResponse'] is True
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
@@ -0,0 +1,40 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import uuid
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend import utils
+
+client = TestClient(app)
+
+
+def test_async_hashing_matches_sync_verification():
+    async def run():
+        hashes = await asyncio.gather(*(utils.get_password_hash_async(f'pw-{i}') for i in range(4)))
+        checks = await asyncio.gather(*(utils.verify_password_async(f'pw-{i}', h) for i, h in enumerate(hashes)))
+        return hashes, checks
+
+    hashes, checks = asyncio.run(run())
+    assert all(checks)
+    assert utils.verify_password('pw-0', hashes[0])
+    assert not asyncio.run(utils.verify_password_async('wrong', hashes[0]))
+    stats = utils.password_hash_stats()
+    assert stats['inFlight'] == 0 and stats['queued'] == 0
+    assert stats['completed'] >= 9 and stats['workers'] == utils.PASSWORD_HASH_WORKERS
+    # 工作进程不从多线程的服务进程 fork 出来
+    assert utils._get_hash_pool()._mp_context.get_start_method() == 'spawn'
+
+
+def test_register_and_login_use_the_hash_pool():
+    name = f'test_hash_{uuid.uuid4().hex[:8]}'
+    before = utils.password_hash_stats()['completed']
+    assert client.post('/api/auth/register', json={'username': name, 'password': 'secret'}).status_code == 200
+    assert client.post('/api/auth/register', json={'username': name, 'password': 'secret'}).status_code == 400
+    assert client.post('/api/register', json={'username': name + '_b', 'password': 'secret'}).json()['code'] == 200
+
+    token = client.post('/api/auth/token', data={'username': name, 'password': 'secret'})
+    assert token.status_code == 200 and token.json()['access_token']
+    assert client.post('/api/auth/token', data={'username': name, 'password': 'nope'}).status_code == 400
+    assert utils.password_hash_stats()['completed'] == before + 4
+    assert client.get('/api/admin/password-hashing').json()['data']['inFlight'] == 0
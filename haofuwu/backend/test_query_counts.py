@@ -0,0 +1,95 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import SessionLocal
+from backend.models import User, Service
+from backend.utils import get_current_user
+from backend import crud, querystats, schemas
+
+client = TestClient(app)
+
+
+def seed_need_with_responses(owner, helpers):
+    db = SessionLocal()
+    try:
+        need_id = crud.create_need(db, owner.id, schemas.NeedCreate(serviceType='保洁', title='queries',
+                                                                   description=None)).id
+        service_ids = [crud.create_service(db, h.id, schemas.ServiceCreate(needId=need_id, title=f'r{i}')).id
+                       for i, h in enumerate(helpers)]
+        return need_id, service_ids
+    finally:
+        db.close()
+
+
+# 每个接口允许的最多语句数（随数据量不变）；超出说明新增了查询，多半是循环里的 lazy load
+QUERY_BUDGETS = {
+    '/api/need/?size=20': 2,
+    '/api/need/?size=20&summary=true': 2,
+    '/api/need/my-list?pageSize=15': 3,
+    '/api/need/detail/{need_id}': 1,
+    '/api/service/by-need/{need_id}': 2,
+    '/api/service/list?size=20': 1,
+    '/api/service-self/my-list': 1,
+    '/api/service/detail/{service_id}': 3,
+}
+
+
+def test_endpoints_stay_within_query_budget(sql_queries, ensure_user):
+    owner = ensure_user('test_queries_owner')
+    helpers = [ensure_user(f'test_queries_helper{i}') for i in range(4)]
+    need_id, service_ids = seed_need_with_responses(owner, helpers)
+
+    app.dependency_overrides[get_current_user] = lambda: owner
+    try:
+        for template, budget in QUERY_BUDGETS.items():
+            url = template.format(need_id=need_id, service_id=service_ids[0])
+            assert client.get(url).status_code == 200, url
+            stats = sql_queries[-1]
+            assert stats.path == url.split('?')[0]
+            assert 0 < stats.count <= budget, (url, stats.count, list(stats.statements))
+            assert not stats.repeated(), (url, stats.repeated())
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_lazy_loads_in_a_loop_are_flagged_as_n_plus_one(ensure_user):
+    owner = ensure_user('test_queries_owner')
+    helpers = [ensure_user(f'test_queries_nplus1_{i}') for i in range(4)]
+    _, service_ids = seed_need_with_responses(owner, helpers)
+
+    db = SessionLocal()
+    try:
+        with querystats.track('TEST', 'lazy owners') as stats:
+            services = db.query(Service).filter(Service.id.in_(service_ids)).all()
+            names = [s.owner.username for s in services]  # 每个 s.owner 各触发一次 SELECT users
+        assert sorted(names) == sorted(h.username for h in helpers)
+        ((shape, count),) = stats.repeated()
+        assert count == len(helpers) and 'FROM users' in shape
+    finally:
+        db.close()
+
+    # IN 列表长度不同的语句归为同一形状
+    assert querystats.statement_shape('SELECT a FROM t WHERE id IN (?, ?)') == \
+        querystats.statement_shape('SELECT a FROM t\n WHERE id IN (?, ?, ?)')
+
+
+def test_debug_headers_report_queries_and_time():
+    mini = FastAPI()
+
+    @mini.get('/two')
+    def two_queries():
+        db = SessionLocal()
+        try:
+            db.query(User).first()
+            db.query(Service).first()
+        finally:
+            db.close()
+        return {'ok': True}
+
+    resp = TestClient(querystats.QueryCountMiddleware(mini, debug_headers=True)).get('/two')
+    assert resp.headers['x-db-queries'] == '2'
+    assert float(resp.headers['x-db-time']) >= 0
+    # 默认不带调试头
+    assert 'x-db-queries' not in client.get('/health').headers
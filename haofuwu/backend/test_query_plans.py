@@ -0,0 +1,265 @@
+"""EXPLAIN QUERY PLAN regression suite for the queries issued by crud.py, search.py and routers/admin.py.
+
+Every statement those functions send to a seeded SQLite database is recorded and explained.
+A hot query whose plan contains a bare `SCAN <table>` (a full table scan, as opposed to
+`SEARCH ... USING INDEX` or an ordered `SCAN ... USING INDEX`) fails the suite, and a cursor
+page must seek into its create_time index rather than walk it from the start. Run with
+PRINT_QUERY_PLANS=1 and `-s` to dump every captured plan.
+"""
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import datetime
+import random
+import re
+import tempfile
+import pytest
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from backend import crud, migrations, models, schemas, search
+from backend.routers import admin
+
+
+# 维护 / 回填类操作：记录执行计划，但允许全表扫描
+MAINTENANCE = {"recompute_need_counters", "rebuild_monthly_stats"}
+
+_BARE_SCAN_RE = re.compile(r"^SCAN (\w+)$")
+# 子查询先物化或作为协程执行，再 SCAN 其结果：读的是子查询产出的行，不是整张表
+_SUBQUERY_RE = re.compile(r"^(?:CO-ROUTINE|MATERIALIZE) (\w+)")
+# 游标翻页必须在 create_time 索引上按范围定位（SEARCH ... create_time<?），整索引 SCAN 随页深变慢
+_CURSOR_SEEK_RE = re.compile(r"^SEARCH (?:needs|services) USING (?:COVERING )?INDEX ix_\w*create_time\w* \(.*create_time<\?\)$")
+# 两字检索词经二元索引按 gram 定位候选行
+_BIGRAM_SEEK_RE = re.compile(r"^SEARCH (?:needs|services)_bigrams USING PRIMARY KEY \(gram=\?\)$")
+
+SERVICE_TYPES = ['居家维修', '保洁', '搬家', '家教', '代购', '宠物照看']
+REGIONS = ['北京市朝阳区', '上海市浦东新区', '广州市天河区', '深圳市南山区']
+SEED_BASE = datetime.datetime(2024, 1, 1)
+# 翻到种子数据中段的游标：深页应在索引上 SEARCH 定位，而不是从头扫到这里
+DEEP_CURSOR = (SEED_BASE + datetime.timedelta(minutes=1500), 1500)
+
+
+class PlanRecorder:
+    """Collect (label, sql, params) for every statement executed while a label is active."""
+
+    def __init__(self, *engines):
+        self.engines = engines
+        self.label = None
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        if self.label and not executemany and verb in ("SELECT", "UPDATE", "DELETE", "WITH"):
+            self.statements.append((self.label, statement, parameters))
+
+    def __enter__(self):
+        for engine in self.engines:
+            event.listen(engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        for engine in self.engines:
+            event.remove(engine, "before_cursor_execute", self._record)
+
+
+def explain(engine, statement, parameters):
+    with engine.connect() as conn:
+        return [row[3] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+
+
+def seed(engine, users=200, needs=3000, services=6000):
+    rng = random.Random(7)
+    base = SEED_BASE
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"id": i, "username": f"plan_user{i}", "hashed_password": "x"} for i in range(1, users + 1)])
+        conn.execute(insert(models.Need), [{
+            "id": i, "owner_id": rng.randint(1, users), "service_type": rng.choice(SERVICE_TYPES),
+            "title": f"上门维修需求 {i}", "description": "描述" * 20, "region": rng.choice(REGIONS), "status": 0,
+            "img_urls": [], "create_time": base + datetime.timedelta(minutes=i),
+            "update_time": base + datetime.timedelta(minutes=i),
+        } for i in range(1, needs + 1)])
+        conn.execute(insert(models.Service), [{
+            "id": i, "owner_id": rng.randint(1, users), "need_id": rng.randint(1, needs),
+            "service_type": rng.choice(SERVICE_TYPES), "title": f"响应 {i}", "content": "内容" * 20,
+            "status": rng.choice([0, 0, 1, 2]), "create_time": base + datetime.timedelta(minutes=i),
+            "update_time": base + datetime.timedelta(minutes=i),
+        } for i in range(1, services + 1)])
+
+
+def run_sync_calls(recorder, Session):
+    def call(label, fn, *args, **kwargs):
+        db = Session()
+        recorder.label = label
+        try:
+            return fn(db, *args, **kwargs)
+        finally:
+            recorder.label = None
+            db.close()
+
+    page = call("get_needs", crud.get_needs, limit=10)
+    call("get_needs(cursor)", crud.get_needs, limit=10, after=crud.decode_cursor(crud.next_cursor(page, 10, "createTime")))
+    call("get_needs_my_list", crud.get_needs_my_list, 5, skip=0, limit=15)
+    call("get_needs_my_list(serviceType)", crud.get_needs_my_list, 5, service_type='保洁', limit=15)
+    call("get_needs_my_list(keyword)", crud.get_needs_my_list, 5, keyword='上门维修', limit=15)
+    call("get_needs_my_list(keyword2)", crud.get_needs_my_list, 5, keyword='维修', limit=15)
+    call("get_needs_my_list(cursor)", crud.get_needs_my_list, 5, limit=15, after=DEEP_CURSOR)
+    call("get_need_detail", crud.get_need_detail, 10)
+    call("get_need", crud.get_need, 10)
+    call("get_user_by_username", crud.get_user_by_username, "plan_user3")
+    call("get_user_by_id", crud.get_user_by_id, 3)
+
+    services = call("get_service_list", crud.get_service_list, limit=20)
+    call("get_service_list(cursor)", crud.get_service_list, limit=20,
+         after=crud.decode_cursor(crud.next_cursor(services, 20, "create_time")))
+    call("get_service_list(serviceType)", crud.get_service_list, service_type='搬家', limit=20)
+    call("get_service_list(all)", crud.get_service_list)
+    call("get_service_list(keyword2)", crud.get_service_list, keyword='响应', limit=20)
+    call("search(need, 2-char)", search.search, "维修 北京", kind="need")
+    call("search(service, 2-char)", search.search, "响应", kind="service")
+    call("get_my_service_list", crud.get_my_service_list, 7)
+    call("get_services_by_need", crud.get_services_by_need, 10)
+    call("services_by_need_validator", crud.services_by_need_validator, 10)
+    call("get_service", crud.get_service, 10)
+
+    need = call("create_need", crud.create_need, 1, schemas.NeedCreate(serviceType='保洁', title='plan', description=None,
+                                                                      region='北京市朝阳区'))
+    need_id = need.id
+    call("update_need", crud.update_need, need_id, schemas.NeedCreate(serviceType='搬家', title='plan2', description=None,
+                                                                      region='上海市浦东新区'))
+    svc = call("create_service", crud.create_service, 2, schemas.ServiceCreate(needId=need_id, title='r'))
+    svc_id = svc.id
+    other = call("create_service", crud.create_service, 3, schemas.ServiceCreate(needId=need_id, title='r2'))
+    other_id = other.id
+    call("update_service", crud.update_service, svc_id, 2, schemas.ServiceCreate(needId=need_id, content='c'))
+    call("accept_service", crud.accept_service, svc_id, 1)
+    call("reject_service", crud.reject_service, other_id, 1)
+    call("delete_service", crud.delete_service, other_id, 3)
+    call("create_needs", crud.create_needs, 1, [
+        schemas.NeedCreate(serviceType='保洁', title=f'batch {i}', description=None, region=REGIONS[i % 2]) for i in range(3)])
+    call("get_needs_by_ids", crud.get_needs_by_ids, [10, 20, 30, need_id])
+    call("create_services", crud.create_services, 4, [
+        schemas.ServiceCreate(needId=n, title='batch') for n in (need_id, need_id, 10)])
+    call("get_service_details", crud.get_service_details, [10, 20, 30, svc_id])
+    call("cancel_need", crud.cancel_need, need_id)
+    call("delete_need", crud.delete_need, need_id)
+
+    call("admin_stats", lambda db: admin.admin_stats(startMonth="2024-01", endMonth="2024-06", db=db))
+    call("admin_stats(region)", lambda db: admin.admin_stats(startMonth="2024-01", endMonth="2024-06",
+                                                             regionKeyword="北京", db=db))
+
+    call("recompute_need_counters", crud.recompute_need_counters)
+    call("rebuild_monthly_stats", crud.rebuild_monthly_stats)
+
+
+async def run_async_calls(recorder, AsyncSessionLocal):
+    async def call(label, fn, *args, **kwargs):
+        async with AsyncSessionLocal() as db:
+            recorder.label = label
+            try:
+                return await fn(db, *args, **kwargs)
+            finally:
+                recorder.label = None
+
+    await call("need_feed_validator_async", crud.need_feed_validator_async, limit=10)
+    await call("need_feed_validator_async(page)", crud.need_feed_validator_async, skip=20, limit=10)
+    await call("need_feed_validator_async(cursor)", crud.need_feed_validator_async, limit=10, after=DEEP_CURSOR)
+    await call("need_my_list_validator_async", crud.need_my_list_validator_async, 5, limit=15)
+    await call("get_needs_async", crud.get_needs_async, limit=10)
+    await call("get_needs_async(summary)", crud.get_needs_async, limit=10, summary=True)
+    await call("get_needs_async(cursor)", crud.get_needs_async, limit=10, after=DEEP_CURSOR)
+    await call("get_needs_my_list_async", crud.get_needs_my_list_async, 5, limit=15)
+    await call("get_need_detail_async", crud.get_need_detail_async, 10)
+    await call("get_need_details_async", crud.get_need_details_async, [10, 20, 30])
+    await call("get_user_by_username_async", crud.get_user_by_username_async, "plan_user3")
+
+
+@pytest.fixture(scope="module")
+def plans():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "plans.db")
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        migrations.upgrade(engine)
+        seed(engine)
+        recorder = PlanRecorder(engine, async_engine.sync_engine)
+        with recorder:
+            run_sync_calls(recorder, sessionmaker(bind=engine, autoflush=False))
+            asyncio.run(run_async_calls(recorder, sessionmaker(async_engine, class_=AsyncSession,
+                                                                expire_on_commit=False)))
+        result = [(label, sql, explain(engine, sql, params)) for label, sql, params in recorder.statements]
+        asyncio.run(async_engine.dispose())
+        engine.dispose()
+    if os.environ.get("PRINT_QUERY_PLANS") == "1":
+        for label, sql, plan in result:
+            print(f"\n[{label}] {' '.join(sql.split())}\n    " + "\n    ".join(plan))
+    return result
+
+
+def test_every_call_issued_explainable_queries(plans):
+    labels = {label for label, _, _ in plans}
+    for expected in ("get_needs", "get_needs_my_list", "get_service_list", "get_my_service_list",
+                     "get_services_by_need", "accept_service", "admin_stats", "need_feed_validator_async"):
+        assert expected in labels
+    # 只有不带条件的 DELETE（SQLite 的清表优化）没有执行计划
+    assert all(plan or sql.lstrip().upper().startswith("DELETE") for _, sql, plan in plans)
+
+
+def test_hot_queries_do_not_scan_whole_tables(plans):
+    regressions = []
+    for label, sql, plan in plans:
+        if label in MAINTENANCE:
+            continue
+        subqueries = {m.group(1) for m in (_SUBQUERY_RE.match(line.strip()) for line in plan) if m}
+        for line in plan:
+            m = _BARE_SCAN_RE.match(line.strip())
+            if m and m.group(1) not in subqueries:
+                regressions.append(f"[{label}] {line}\n    {' '.join(sql.split())}\n    " + "\n    ".join(plan))
+    assert not regressions, "full table scans in hot queries:\n" + "\n".join(regressions)
+
+
+def test_batch_lookups_use_the_primary_key(plans):
+    # 批量接口按 id IN (...) 取行，应逐个走主键定位；内连 / 外连的用户、需求同样按主键取
+    batch = [(label, sql, plan) for label, sql, plan in plans
+             if label in ("get_needs_by_ids", "get_service_details", "get_need_details_async")]
+    assert {label for label, _, _ in batch} == {"get_needs_by_ids", "get_service_details", "get_need_details_async"}
+    for label, sql, plan in batch:
+        assert " IN (" in sql, (label, sql)
+        assert plan and all("USING INTEGER PRIMARY KEY (rowid=?)" in line for line in plan), (label, plan)
+    # 批量创建：计数器按需求各更新一次，也走主键
+    creates = [(label, plan) for label, sql, plan in plans if label in ("create_needs", "create_services")]
+    assert creates
+    for label, plan in creates:
+        assert all("USING INTEGER PRIMARY KEY" in line or "USING INDEX" in line for line in plan), (label, plan)
+
+
+def test_two_character_keywords_seek_the_bigram_index(plans):
+    # 两字检索词 trigram 索引查不到，应在二元索引上按 gram 定位，而不是 LIKE 扫描整张表
+    labels = ("get_needs_my_list(keyword2)", "get_service_list(keyword2)", "search(need, 2-char)",
+              "search(service, 2-char)")
+    checked = set()
+    for label, sql, plan in plans:
+        if label in labels and " LIKE " in sql:
+            assert any(_BIGRAM_SEEK_RE.match(line.strip()) for line in plan), (label, plan)
+            checked.add(label)
+    assert checked == set(labels)
+
+
+def test_paged_feeds_are_served_in_index_order(plans):
+    # 带 LIMIT 的分页列表应按索引顺序读取，不应先把整张表排序一遍
+    for label, sql, plan in plans:
+        if label in ("get_needs", "get_needs(cursor)", "get_needs_async", "get_needs_async(cursor)", "get_needs_my_list",
+                     "get_needs_my_list(cursor)", "get_service_list", "get_service_list(cursor)", "get_my_service_list",
+                     "need_feed_validator_async", "need_feed_validator_async(page)",
+                     "need_feed_validator_async(cursor)"):
+            assert not any("TEMP B-TREE FOR ORDER BY" in line for line in plan), (label, plan)
+
+
+def test_cursor_pages_seek_into_the_create_time_index(plans):
+    # 分页语句本身（带 ORDER BY），不含 my-list 的 COUNT
+    keyset = [(label, sql, plan) for label, sql, plan in plans if label.endswith("(cursor)") and " ORDER BY " in sql]
+    assert {label for label, _, _ in keyset} == {
+        "get_needs(cursor)", "get_needs_my_list(cursor)", "get_service_list(cursor)",
+        "need_feed_validator_async(cursor)", "get_needs_async(cursor)"}
+    for label, sql, plan in keyset:
+        assert any(_CURSOR_SEEK_RE.match(line.strip()) for line in plan), (label, plan)
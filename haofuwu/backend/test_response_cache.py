@@ -0,0 +1,67 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import SessionLocal
+from backend import crud, schemas
+from backend.cache import TTLCache
+from backend.response_cache import response_cache
+
+client = TestClient(app)
+
+
+def test_tag_invalidation_and_stale_fill_protection():
+    cache = TTLCache(ttl=60, max_entries=10)
+    cache.put(('need', 1), 'n1', tags=['need:1'])
+    cache.put(('service', 7), 's7', tags=['need:1'])
+    cache.put(('service', 8), 's8', tags=['need:2'])
+    cache.invalidate_tag('need:1')
+    assert cache.get(('need', 1)) is None and cache.get(('service', 7)) is None
+    assert cache.get(('service', 8)) == 's8'
+
+    epoch = cache.epoch()
+    cache.invalidate(('need', 3))  # a write lands while a reader is loading
+    assert cache.put(('need', 3), 'stale', epoch=epoch) is False
+    assert cache.get(('need', 3)) is None
+    assert cache.stats()['byNamespace']['service']['hits'] == 1
+
+
+def test_detail_responses_are_cached_until_crud_writes(ensure_user):
+    owner = ensure_user('test_rc_owner')
+    helper = ensure_user('test_rc_helper')
+    db = SessionLocal()
+    try:
+        need = crud.create_need(db, owner.id, schemas.NeedCreate(serviceType='保洁', title='缓存前', description=None))
+        svc = crud.create_service(db, helper.id, schemas.ServiceCreate(needId=need.id, title='响应'))
+        need_id, svc_id = need.id, svc.id
+    finally:
+        db.close()
+
+    response_cache.clear()
+    before = response_cache.stats()
+    assert client.get(f'/api/need/detail/{need_id}').json()['data']['title'] == '缓存前'
+    assert client.get(f'/api/need/detail/{need_id}').json()['data']['title'] == '缓存前'
+    assert client.get(f'/api/service/detail/{svc_id}').json()['data']['needTitle'] == '缓存前'
+    assert client.get(f'/api/user/detail/{owner.id}').json()['data']['username'] == 'test_rc_owner'
+    assert client.get('/api/user/by-username?username=test_rc_owner').json()['code'] == 200
+    after = response_cache.stats()
+    assert after['hits'] == before['hits'] + 1
+
+    db = SessionLocal()
+    try:
+        crud.update_need(db, need_id, schemas.NeedCreate(serviceType='保洁', title='缓存后', description=None))
+    finally:
+        db.close()
+    # the need and the services hanging off it are both refreshed
+    assert client.get(f'/api/need/detail/{need_id}').json()['data']['title'] == '缓存后'
+    assert client.get(f'/api/service/detail/{svc_id}').json()['data']['needTitle'] == '缓存后'
+
+    db = SessionLocal()
+    try:
+        crud.accept_service(db, svc_id, owner.id)
+    finally:
+        db.close()
+    assert client.get(f'/api/service/detail/{svc_id}').json()['data']['status'] == 1
+
+    stats = client.get('/api/admin/response-cache').json()['data']
+    assert set(stats['byNamespace']) >= {'need', 'service', 'user', 'username'}
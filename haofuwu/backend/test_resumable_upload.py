@@ -0,0 +1,82 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import datetime
+import hashlib
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import SessionLocal
+from backend.models import UploadSession
+from backend.routers import upload
+from backend import blobstore
+
+client = TestClient(app)
+
+CHUNK = upload.RESUMABLE_MIN_CHUNK_SIZE
+
+
+def test_chunks_can_be_resumed_in_any_order_and_assembled():
+    payload = os.urandom(CHUNK * 3 + 1000)
+    data = client.post('/api/upload/sessions', json={'filename': 'clip.mp4', 'size': len(payload), 'chunkSize': CHUNK}).json()['data']
+    upload_id = data['uploadId']
+    assert data['totalChunks'] == 4 and data['missingChunks'] == [0, 1, 2, 3]
+
+    def put(i, body=None):
+        return client.put(f'/api/upload/sessions/{upload_id}/chunks/{i}',
+                          content=payload[i * CHUNK:(i + 1) * CHUNK] if body is None else body)
+
+    assert put(3).status_code == 200
+    assert put(1).status_code == 200
+    assert put(0, b'short').status_code == 400  # truncated chunk is rejected, not stored
+    status = client.get(f'/api/upload/sessions/{upload_id}').json()['data']
+    assert status['receivedChunks'] == [1, 3] and status['missingChunks'] == [0, 2]
+    assert client.post(f'/api/upload/sessions/{upload_id}/complete').status_code == 409
+
+    assert put(0).status_code == 200
+    assert put(2).status_code == 200
+    assert put(2).status_code == 200  # re-sending a chunk is harmless
+    done = client.post(f'/api/upload/sessions/{upload_id}/complete').json()['data']
+    assert done['size'] == len(payload)
+    assert done['sha256'] == hashlib.sha256(payload).hexdigest()
+    assert done['url'] == blobstore.blob_url(done['sha256'], '.mp4')
+    with open(blobstore.blob_path(done['sha256'], '.mp4'), 'rb') as f:
+        assert f.read() == payload
+    assert not os.path.exists(blobstore.session_dir(upload_id))
+    assert client.get(f'/api/upload/sessions/{upload_id}').status_code == 404
+
+
+def test_abandoned_sessions_expire():
+    data = client.post('/api/upload/sessions', json={'filename': 'old.mp4', 'size': CHUNK * 2, 'chunkSize': CHUNK}).json()['data']
+    old_id = data['uploadId']
+    client.put(f'/api/upload/sessions/{old_id}/chunks/0', content=b'x' * CHUNK)
+    db = SessionLocal()
+    try:
+        db.get(UploadSession, old_id).update_time = datetime.datetime.utcnow() - blobstore.SESSION_TTL * 2
+        db.commit()
+    finally:
+        db.close()
+    # 清理之前过期会话仍在表里，但查询、续传、合并都拒绝
+    assert client.get(f'/api/upload/sessions/{old_id}').status_code == 410
+    assert client.put(f'/api/upload/sessions/{old_id}/chunks/1', content=b'x' * CHUNK).status_code == 410
+    assert client.post(f'/api/upload/sessions/{old_id}/complete').status_code == 410
+    assert not os.path.exists(blobstore.chunk_path(old_id, 1))
+    assert client.get('/api/upload/sessions/no-such-session').status_code == 404
+
+    # 新建会话不再顺带清理；由 gc_uploads.py 调用 expire_sessions
+    live_id = client.post('/api/upload/sessions', json={'filename': 'new.mp4', 'size': 10}).json()['data']['uploadId']
+    orphan = blobstore.session_dir('orphan-' + live_id)
+    os.makedirs(orphan)
+    stale = (datetime.datetime.now() - blobstore.SESSION_TTL * 2).timestamp()
+    os.utime(orphan, (stale, stale))
+    db = SessionLocal()
+    try:
+        assert db.get(UploadSession, old_id) is not None
+        assert set(blobstore.expire_sessions(db, dry_run=True)) >= {old_id, os.path.basename(orphan)}
+        assert os.path.exists(blobstore.session_dir(old_id))
+        removed = blobstore.expire_sessions(db)
+        assert old_id in removed and os.path.basename(orphan) in removed and live_id not in removed
+        assert db.get(UploadSession, old_id) is None
+    finally:
+        db.close()
+    assert not os.path.exists(blobstore.session_dir(old_id)) and not os.path.exists(orphan)
+    assert os.path.exists(blobstore.session_dir(live_id))
+    assert client.post('/api/upload/sessions', json={'filename': 'x', 'size': upload.RESUMABLE_MAX_BYTES + 1}).status_code == 413
@@ -0,0 +1,145 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from backend.main import app
+from backend.database import SessionLocal
+from backend.models import User, Need, Service
+from backend import crud, schemas, search
+
+client = TestClient(app)
+
+
+def ensure_search_user():
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == 'test_search_user').first()
+        if not user:
+            user = User(username='test_search_user', hashed_password='fake', full_name='Search User')
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+        return user.id
+    finally:
+        db.close()
+
+
+def make_need(title, description, region='测试区'):
+    db = SessionLocal()
+    try:
+        need_in = schemas.NeedCreate(serviceType='保洁', title=title, description=description, region=region)
+        return crud.create_need(db, ensure_search_user(), need_in).id
+    finally:
+        db.close()
+
+
+def search_needs(q):
+    body = client.get('/api/search/', params={'q': q, 'type': 'need', 'size': 100}).json()
+    assert body['code'] == 200
+    return body['data']['records']
+
+
+def test_fts_is_enabled():
+    assert search.FTS_ENABLED
+
+
+def test_search_ranks_title_hits_and_highlights():
+    body_hit = make_need('普通需求一则', '客厅需要彻底的玻璃擦洗与深度清洁')
+    title_hit = make_need('玻璃擦洗深度清洁服务', '无')
+    records = search_needs('玻璃擦洗')
+    ids = [r['id'] for r in records]
+    assert title_hit in ids and body_hit in ids
+    assert ids.index(title_hit) < ids.index(body_hit)
+    top = next(r for r in records if r['id'] == title_hit)
+    assert '<mark>玻璃擦洗</mark>' in top['titleHighlight']
+    other = next(r for r in records if r['id'] == body_hit)
+    assert '<mark>玻璃擦洗</mark>' in other['snippet']
+
+
+def test_search_index_follows_update_and_delete():
+    need_id = make_need('独一无二的钢琴调音', '老钢琴需要调音')
+    assert need_id in [r['id'] for r in search_needs('钢琴调音')]
+
+    db = SessionLocal()
+    try:
+        crud.update_need(db, need_id, schemas.NeedCreate(serviceType='保洁', title='已改为修剪草坪',
+                                                         description='草坪修剪', region='测试区'))
+    finally:
+        db.close()
+    assert need_id not in [r['id'] for r in search_needs('钢琴调音')]
+    assert need_id not in [r['id'] for r in search_needs('钢琴')]
+    assert need_id in [r['id'] for r in search_needs('修剪草坪')]
+    assert need_id in [r['id'] for r in search_needs('草坪')]
+
+    db = SessionLocal()
+    try:
+        crud.delete_need(db, need_id)
+    finally:
+        db.close()
+    assert need_id not in [r['id'] for r in search_needs('修剪草坪')]
+    assert need_id not in [r['id'] for r in search_needs('草坪')]
+    db = SessionLocal()
+    try:
+        assert db.execute(text('SELECT count(*) FROM needs_bigrams WHERE row_id = :id'), {'id': need_id}).scalar() == 0
+    finally:
+        db.close()
+
+
+def test_short_terms_match_without_fts():
+    need_id = make_need('搬家', '周末搬家需要帮手', region='杭州')
+    records = search_needs('搬家 杭州')
+    assert need_id in [r['id'] for r in records]
+    hit = next(r for r in records if r['id'] == need_id)
+    assert hit['score'] is None
+    assert '<mark>搬家</mark>' in hit['titleHighlight']
+    # 两字词按二元索引取候选行，单字词是 LIKE；大小写与 LIKE 一致，只折叠 ASCII
+    assert need_id in [r['id'] for r in search_needs('搬 杭州')]
+    latin = make_need('Sofa清洗', '布艺沙发')
+    assert latin in [r['id'] for r in search_needs('so')]
+    assert latin in [r['id'] for r in search_needs('SOFA')]
+
+
+def test_search_quotes_fts_syntax():
+    # FTS5 operators in user input must not raise
+    assert isinstance(search_needs('"AND OR NOT*('), list)
+
+
+def test_my_list_keyword_uses_index_and_matches_like():
+    user_id = ensure_search_user()
+    make_need('专业空调清洗', '空调')
+    db = SessionLocal()
+    try:
+        records, total = crud.get_needs_my_list(db, user_id, keyword='空调清洗')
+        assert total >= 1
+        assert all('空调清洗' in r.title for r in records)
+        expected = db.query(Need).filter(Need.owner_id == user_id, Need.title.contains('空调清洗')).count()
+        assert total == expected
+    finally:
+        db.close()
+
+
+def test_list_keyword_is_one_substring():
+    # keyword 是标题里的一个子串（空格也算），不拆词；两字关键词走二元索引
+    user_id = ensure_search_user()
+    together = make_need('上门 保洁 套餐', '无')
+    apart = make_need('保洁上门', '无')
+    db = SessionLocal()
+    try:
+        for keyword, expected in (('上门 保洁', {together}), ('保洁', {together, apart}), ('洁上门', {apart})):
+            records, total = crud.get_needs_my_list(db, user_id, keyword=keyword)
+            ids = {r.id for r in records} & {together, apart}
+            assert ids == expected, keyword
+            assert total == db.query(Need).filter(Need.owner_id == user_id, Need.title.contains(keyword)).count()
+    finally:
+        db.close()
+
+
+def test_highlights_escape_user_html():
+    payload = '<img src=x onerror=alert(1)>'
+    need_id = make_need(f'{payload} 窗帘清洗服务', f'正文 {payload} 窗帘清洗')
+    for q in ('窗帘清洗', '窗帘'):  # FTS 路径与两字词（二元索引）路径
+        hit = next(r for r in search_needs(q) if r['id'] == need_id)
+        for field in ('titleHighlight', 'snippet'):
+            assert hit[field].replace('<mark>', '').replace('</mark>', '').count('<') == 0
+        assert '&lt;img src=x onerror=alert(1)&gt;' in hit['titleHighlight']
+        assert '<mark>窗帘' in hit['titleHighlight']
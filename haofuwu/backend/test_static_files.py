@@ -0,0 +1,88 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend import blobstore
+
+client = TestClient(app)
+
+
+def test_uploads_are_served_with_range_etag_and_cache_headers():
+    payload = os.urandom(700_000)
+    data = client.post('/api/upload/', files={'file': ('movie.mp4', payload, 'video/mp4')}).json()['data']
+    url = data['url']
+
+    full = client.get(url)
+    assert full.status_code == 200 and full.content == payload
+    assert full.headers['etag'] == f'"{data["sha256"]}"'
+    assert 'immutable' in full.headers['cache-control']
+    assert full.headers['accept-ranges'] == 'bytes'
+    assert full.headers['content-type'] == 'video/mp4'
+
+    assert client.get(url, headers={'If-None-Match': full.headers['etag']}).status_code == 304
+    assert client.get(url, headers={'If-Modified-Since': full.headers['last-modified']}).status_code == 304
+
+    part = client.get(url, headers={'Range': 'bytes=1000-300999'})
+    assert part.status_code == 206
+    assert part.content == payload[1000:301000]
+    assert part.headers['content-range'] == f'bytes 1000-300999/{len(payload)}'
+
+    tail = client.get(url, headers={'Range': 'bytes=-100'})
+    assert tail.status_code == 206 and tail.content == payload[-100:]
+    open_ended = client.get(url, headers={'Range': f'bytes={len(payload) - 10}-'})
+    assert open_ended.content == payload[-10:]
+
+    bad = client.get(url, headers={'Range': f'bytes={len(payload)}-'})
+    assert bad.status_code == 416 and bad.headers['content-range'] == f'bytes */{len(payload)}'
+
+    stale = client.get(url, headers={'Range': 'bytes=0-9', 'If-Range': '"something-else"'})
+    assert stale.status_code == 200 and stale.content == payload
+
+
+def test_ranges_do_not_need_pread(monkeypatch):
+    # Windows 上没有 os.pread：Range 响应只能依赖 seek + read
+    monkeypatch.delattr(os, 'pread', raising=False)
+    payload = os.urandom(600_000)
+    url = client.post('/api/upload/', files={'file': ('clip.mp4', payload, 'video/mp4')}).json()['data']['url']
+    part = client.get(url, headers={'Range': 'bytes=100-500099'})
+    assert part.status_code == 206 and part.content == payload[100:500100]
+
+
+def test_internal_and_missing_paths_are_not_served():
+    os.makedirs(blobstore.TMP_DIR, exist_ok=True)
+    with open(os.path.join(blobstore.TMP_DIR, 'secret.part'), 'wb') as f:
+        f.write(b'x')
+    try:
+        assert client.get('/uploads/.tmp/secret.part').status_code == 404
+    finally:
+        os.remove(os.path.join(blobstore.TMP_DIR, 'secret.part'))
+    assert client.get('/uploads/../main.py').status_code == 404
+    assert client.get('/uploads/%2e%2e/main.py').status_code == 404
+    assert client.get('/uploads/no/such/file.png').status_code == 404
+    # Windows 路径分隔符与符号链接都不能逃出上传目录
+    assert client.get('/uploads/a%5C..%5C..%5Chaofuwu.db').status_code == 404
+    assert client.get('/uploads/a%00.png').status_code == 404
+    link = os.path.join(blobstore.UPLOAD_DIR, 'escape_link.py')
+    try:
+        os.symlink(os.path.join(os.path.dirname(blobstore.UPLOAD_DIR), 'main.py'), link)
+    except (OSError, NotImplementedError):
+        return
+    try:
+        assert client.get('/uploads/escape_link.py').status_code == 404
+    finally:
+        os.remove(link)
+
+
+def test_active_content_is_downloaded_not_rendered():
+    page = b'<html><script>alert(document.cookie)</script></html>'
+    for name, ctype in (('x.html', 'text/html'), ('x.svg', 'image/svg+xml')):
+        url = client.post('/api/upload/', files={'file': (name, page, ctype)}).json()['data']['url']
+        resp = client.get(url)
+        assert resp.status_code == 200
+        assert resp.headers['content-disposition'] == 'attachment'
+        assert resp.headers['x-content-type-options'] == 'nosniff'
+
+    url = client.post('/api/upload/', files={'file': ('a.png', b'\x89PNG\r\n\x1a\n', 'image/png')}).json()['data']['url']
+    resp = client.get(url)
+    assert 'content-disposition' not in resp.headers
+    assert resp.headers['x-content-type-options'] == 'nosniff'
@@ -0,0 +1,118 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import hashlib
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import SessionLocal
+from backend.models import User, Blob
+from backend import blobstore, crud, schemas
+
+client = TestClient(app)
+
+
+def upload(name, payload):
+    resp = client.post('/api/upload/', files={'file': (name, payload, 'application/octet-stream')})
+    assert resp.status_code == 200
+    return resp.json()['data']
+
+
+def test_upload_streams_to_disk_and_reports_size_and_hash():
+    payload = os.urandom(blobstore.UPLOAD_CHUNK_SIZE * 2 + 123)
+    data = upload('test_stream.BIN', payload)
+    assert data['size'] == len(payload)
+    assert data['sha256'] == hashlib.sha256(payload).hexdigest()
+    assert data['url'] == blobstore.blob_url(data['sha256'], '.bin')
+    with open(blobstore.blob_path(data['sha256'], '.bin'), 'rb') as f:
+        assert f.read() == payload
+    assert not os.listdir(blobstore.TMP_DIR)
+
+
+def test_upload_over_limit_is_rejected_without_leftovers():
+    saved = blobstore.UPLOAD_MAX_BYTES
+    blobstore.UPLOAD_MAX_BYTES = 1000
+    try:
+        resp = client.post('/api/upload/', files={'file': ('test_too_big.bin', b'x' * 1001, 'application/octet-stream')})
+    finally:
+        blobstore.UPLOAD_MAX_BYTES = saved
+    assert resp.status_code == 413
+    assert not os.listdir(blobstore.TMP_DIR)
+
+
+def test_identical_uploads_share_one_blob_and_gc_keeps_referenced_ones():
+    payload = os.urandom(4096)
+    first = upload('a.png', payload)
+    second = upload('b.jpg', payload)  # same content, different name: same blob and URL
+    assert second['url'] == first['url'] and second['deduplicated'] is True
+    orphan = upload('orphan.png', os.urandom(2048))
+
+    db = SessionLocal()
+    try:
+        owner = db.query(User).filter(User.username == 'test_blob_owner').first()
+        if not owner:
+            owner = User(username='test_blob_owner', hashed_password='fake')
+            db.add(owner)
+            db.commit()
+        need = crud.create_need(db, owner.id, schemas.NeedCreate(
+            serviceType='保洁', title='blob 引用', description=None, imgUrls=['http://localhost:8000' + first['url']]))
+
+        # still inside the grace period: nothing is removed
+        assert orphan['sha256'] not in blobstore.collect_garbage(db)
+        removed = blobstore.collect_garbage(db, grace_seconds=0)
+        assert orphan['sha256'] in removed and first['sha256'] not in removed
+        assert not os.path.exists(blobstore.blob_path(orphan['sha256'], '.png'))
+        assert os.path.exists(blobstore.blob_path(first['sha256'], '.png'))
+        assert db.get(Blob, first['sha256']).ref_count == 1
+
+        crud.delete_need(db, need.id)
+        assert first['sha256'] in blobstore.collect_garbage(db, grace_seconds=0)
+        assert not os.path.exists(blobstore.blob_path(first['sha256'], '.png'))
+    finally:
+        db.close()
+
+
+def test_upload_limit_applies_before_and_while_streaming():
+    saved = blobstore.UPLOAD_MAX_BYTES
+    blobstore.UPLOAD_MAX_BYTES = 1000
+    try:
+        # Content-Length 已超限：不读请求体直接 413
+        declared = client.post('/api/upload/', content=b'', headers={
+            'Content-Type': 'multipart/form-data; boundary=x',
+            'Content-Length': str(1000 + blobstore.MULTIPART_OVERHEAD_BYTES + 1)})
+        assert declared.status_code == 413
+
+        # 分块传输、没有 Content-Length：边收边数，超限就停，不再读后面的数据
+        sent = []
+
+        class ChunkedRequest:
+            headers = {'content-type': 'multipart/form-data; boundary=x'}
+
+            async def stream(self):
+                yield b'--x\r\nContent-Disposition: form-data; name="file"; filename="big.bin"\r\n\r\n'
+                for _ in range(100):
+                    sent.append(1)
+                    yield b'y' * 100
+                yield b'\r\n--x--\r\n'
+
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(blobstore.stream_upload_to_temp(ChunkedRequest()))
+        assert exc.value.status_code == 413
+        assert len(sent) == 11
+    finally:
+        blobstore.UPLOAD_MAX_BYTES = saved
+    assert not os.listdir(blobstore.TMP_DIR)
+
+
+def test_upload_skips_other_fields_and_requires_the_file_part():
+    payload = os.urandom(3000)
+    resp = client.post('/api/upload/', data={'note': 'hello'},
+                       files={'file': ('名字.png', payload, 'image/png')})
+    data = resp.json()['data']
+    assert data['filename'] == '名字.png' and data['size'] == len(payload)
+    assert data['sha256'] == hashlib.sha256(payload).hexdigest()
+
+    assert client.post('/api/upload/', files={'other': ('a.png', b'x', 'image/png')}).status_code == 400
+    assert client.post('/api/upload/', json={'file': 'x'}).status_code == 400
+    assert not os.listdir(blobstore.TMP_DIR)
@@ -0,0 +1,66 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import time
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.models import User
+from backend.utils import get_current_user, create_access_token
+from backend.user_cache import PrincipalCache, user_cache
+
+client = TestClient(app)
+
+
+def test_cache_is_bounded_and_expires():
+    cache = PrincipalCache(ttl=0.05, max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)  # 'b' 最久未使用，被淘汰
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    time.sleep(0.06)
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert stats['hits'] == 3 and stats['misses'] == 2 and stats['size'] == 1
+
+
+def test_current_user_is_cached_and_invalidated_on_profile_update(ensure_user):
+    ensure_user('test_cache_user')
+    saved = app.dependency_overrides.pop(get_current_user, None)
+    try:
+        user_cache.clear()
+        headers = {'Authorization': f"Bearer {create_access_token(subject='test_cache_user')}"}
+        before = user_cache.stats()
+        assert client.get('/api/user/me', headers=headers).json()['code'] == 200
+        assert client.get('/api/user/me', headers=headers).json()['code'] == 200
+        after = user_cache.stats()
+        assert after['misses'] == before['misses'] + 1
+        assert after['hits'] == before['hits'] + 1
+
+        resp = client.put('/api/user/me', headers=headers,
+                          json={'username': 'test_cache_user', 'password': 'x', 'phone': '13900000008'})
+        assert resp.json()['code'] == 200
+        assert user_cache.stats()['invalidations'] == after['invalidations'] + 1
+        assert client.get('/api/user/me', headers=headers).json()['data']['phone'] == '13900000008'
+
+        assert client.get('/api/admin/user-cache').json()['data']['hits'] >= 1
+    finally:
+        if saved is not None:
+            app.dependency_overrides[get_current_user] = saved
+
+
+def test_lookup_racing_a_profile_update_is_not_cached(monkeypatch):
+    from backend import crud
+    user_cache.clear()
+    stale = User(username='test_cache_race', hashed_password='fake', phone='old')
+
+    async def slow_lookup(db, username):
+        # 查库期间另一个请求提交了 PUT /me 并失效缓存
+        user_cache.invalidate(username)
+        return stale
+
+    monkeypatch.setattr(crud, 'get_user_by_username_async', slow_lookup)
+    token = create_access_token(subject='test_cache_race')
+    assert asyncio.run(get_current_user(token=token, db=None)) is stale
+    assert user_cache.get('test_cache_race') is None
@@ -0,0 +1,20 @@
+"""
+已认证用户缓存：按 token 的 subject（用户名）缓存 get_current_user 解析出的用户，避免每个请求都查 users 表。
+
+- 有界：超过 max_entries 时淘汰最久未使用的条目（LRU）
+- 有过期时间：条目超过 ttl 秒后视为未命中，重新查库
+- 线程安全：同步路由跑在线程池里，所有读写都在同一把锁内完成
+- 修改用户资料的地方必须调用 invalidate(username)，否则最长 ttl 秒内会读到旧资料
+"""
+from .cache import TTLCache
+
+USER_CACHE_TTL_SECONDS = 60
+USER_CACHE_MAX_ENTRIES = 1024
+
+
+class PrincipalCache(TTLCache):
+    def __init__(self, ttl: float = USER_CACHE_TTL_SECONDS, max_entries: int = USER_CACHE_MAX_ENTRIES):
+        super().__init__(ttl, max_entries)
+
+
+user_cache = PrincipalCache()
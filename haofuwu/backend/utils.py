@@ -4,9 +4,15 @@ from jose import jwt
 from fastapi import HTTPException, Depends
 from fastapi.security import OAuth2PasswordBearer
 from . import schemas, models
-from .database import get_db
-from sqlalchemy.orm import Session
+from .user_cache import user_cache
+from .database import get_async_db
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import multiprocessing
+import os
+import threading
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
@@ -14,6 +20,8 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 SECRET_KEY = "CHANGE_THIS_SECRET"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7
+# 密码哈希进程池的并发上限，默认等于 CPU 核数；可用环境变量 HAOFUWU_HASH_WORKERS 覆盖
+PASSWORD_HASH_WORKERS = int(os.environ.get("HAOFUWU_HASH_WORKERS") or os.cpu_count() or 1)
 
 
 def get_password_hash(password: str) -> str:
@@ -29,6 +37,67 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(str(plain_password), hashed_password)
 
 
+# ==========================================
+# 异步密码哈希：pbkdf2 放到独立的有界进程池里算，不占请求线程，也不抢事件循环的 GIL
+# ==========================================
+
+_hash_pool = None
+_hash_lock = threading.Lock()
+_hash_stats = {"inFlight": 0, "completed": 0, "peakInFlight": 0}
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    with _hash_lock:
+        if _hash_pool is None:
+            # 用 spawn 启动工作进程：此时进程里已有 anyio 线程池、aiosqlite、缩略图线程等，
+            # fork 会把别的线程持有的锁原样复制进子进程，子进程可能卡死（3.12+ 也会告警）；Windows 本来就是 spawn
+            _hash_pool = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        return _hash_pool
+
+
+async def _run_in_hash_pool(fn, *args):
+    with _hash_lock:
+        _hash_stats["inFlight"] += 1
+        _hash_stats["peakInFlight"] = max(_hash_stats["peakInFlight"], _hash_stats["inFlight"])
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_hash_pool(), fn, *args)
+    finally:
+        with _hash_lock:
+            _hash_stats["inFlight"] -= 1
+            _hash_stats["completed"] += 1
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
+def password_hash_stats() -> dict:
+    """Pool size and queue depth: `queued` counts jobs waiting for a free worker process."""
+    with _hash_lock:
+        in_flight = _hash_stats["inFlight"]
+        return {
+            "workers": PASSWORD_HASH_WORKERS,
+            "inFlight": in_flight,
+            "queued": max(0, in_flight - PASSWORD_HASH_WORKERS),
+            "peakInFlight": _hash_stats["peakInFlight"],
+            "completed": _hash_stats["completed"],
+        }
+
+
+def shutdown_password_hash_pool():
+    global _hash_pool
+    with _hash_lock:
+        pool, _hash_pool = _hash_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
 def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode = {"sub": subject, "exp": expire}
@@ -36,8 +105,9 @@ def create_access_token(subject: str, expires_delta: Optional[timedelta] = None)
     return encoded_jwt
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> models.User:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> models.User:
     from jose import JWTError
+    from .crud import get_user_by_username_async
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -45,7 +115,14 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-    user = db.query(models.User).filter(models.User.username == username).first()
+    # 先查已认证用户缓存；未命中再异步查库（会话 expire_on_commit=False，脱离会话后仍可读取属性）
+    # 查库前记下 epoch：查询期间资料被修改并失效缓存时，put 会被拒绝，旧资料不会被写回缓存
+    epoch = user_cache.epoch()
+    user = user_cache.get(username)
+    if user is not None:
+        return user
+    user = await get_user_by_username_async(db, username)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
+    user_cache.put(username, user, epoch=epoch)
     return user
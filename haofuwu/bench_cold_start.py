@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Worker cold-start benchmark: how long a fresh process takes to import `backend.main`.
+Usage:
+  python bench_cold_start.py                                  # 10 sequential + 8 simultaneous starts
+  python bench_cold_start.py --runs 20 --workers 16
+  python bench_cold_start.py --app-dir /tmp/old-checkout/haofuwu   # same measurement for another version
+
+Every start is a new interpreter running `import backend.main` in a temporary working directory
+whose haofuwu.db is already at the current schema (prepared once up front, like a deployed
+database), so the timings contain exactly what each worker pays on boot. The "simultaneous"
+figure starts all workers at once, the way `uvicorn --workers N` does after a restart.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_concurrency import PROJECT_ROOT, prepare_database, pct
+
+# 先导入 main 依赖的全部模块，再单独计时 `import backend.main` 本身：
+# 后者就是每个 worker 启动时对数据库做的工作（旧版的建表 / 探测，新版的版本检查）
+IMPORT_APP = """
+import importlib, pkgutil, time
+import backend.crud, backend.routers
+for m in pkgutil.iter_modules(backend.routers.__path__):
+    importlib.import_module('backend.routers.' + m.name)
+t0 = time.perf_counter()
+import backend.main
+print(time.perf_counter() - t0)
+"""
+
+
+def start_workers(app_dir, workdir, count):
+    env = dict(os.environ, PYTHONPATH=app_dir)
+    t0 = time.perf_counter()
+    procs = [subprocess.Popen([sys.executable, '-c', IMPORT_APP], cwd=workdir, env=env,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE) for _ in range(count)]
+    failed = 0
+    startup = []
+    for proc in procs:
+        out, err = proc.communicate()
+        if proc.returncode != 0:
+            failed += 1
+            sys.stderr.write(err.decode(errors='replace').strip().splitlines()[-1] + '\n')
+        else:
+            startup.append(float(out.decode().strip().splitlines()[-1]))
+    return time.perf_counter() - t0, startup, failed
+
+
+def main():
+    p = argparse.ArgumentParser(description="Cold-start time of backend.main")
+    p.add_argument('--runs', type=int, default=10, help='sequential starts to time (default: 10)')
+    p.add_argument('--workers', type=int, default=8, help='simultaneous starts (default: 8)')
+    p.add_argument('--app-dir', default=PROJECT_ROOT, help='directory containing the backend package')
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        prepare_database(args.app_dir, workdir)
+        # 第一次启动：旧版本在这里建表；之后每次都是对已就绪数据库的冷启动
+        start_workers(args.app_dir, workdir, 1)
+        samples, startup = [], []
+        failures = 0
+        for _ in range(args.runs):
+            elapsed, work, failed = start_workers(args.app_dir, workdir, 1)
+            samples.append(elapsed)
+            startup += work
+            failures += failed
+        together, startup_together, failed_together = start_workers(args.app_dir, workdir, args.workers)
+
+    print(f"app: {args.app_dir}")
+    print(f"sequential: {args.runs} starts, process p50 {statistics.median(samples) * 1000:.0f} ms "
+          f"(p90 {pct(samples, 0.9):.0f} ms), {failures} failed")
+    if startup:
+        print(f"  backend.main startup work: p50 {statistics.median(startup) * 1000:.1f} ms, "
+              f"p90 {pct(startup, 0.9):.1f} ms")
+    print(f"simultaneous: {args.workers} workers ready in {together * 1000:.0f} ms, {failed_together} failed")
+    if startup_together:
+        print(f"  backend.main startup work: p50 {statistics.median(startup_together) * 1000:.1f} ms, "
+              f"max {max(startup_together) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for the hot read endpoints (feed, my-list, need detail).
+Usage:
+  python bench_concurrency.py                          # 500 concurrent clients against this checkout
+  python bench_concurrency.py --clients 800 --requests 20000
+  python bench_concurrency.py --app-dir /tmp/old-checkout/haofuwu   # same load against another version
+
+The script boots `backend.main:app` with uvicorn in a temporary working directory (so it gets its own
+haofuwu.db), seeds it through the public API / sqlite3, then drives the endpoints with an asyncio
+httpx client and reports throughput and latency percentiles. Run it once per version to compare.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def prepare_database(app_dir, workdir):
+    # 有迁移脚本的版本启动时只检查 schema 版本，先离线建库；旧版本在导入时自己建表
+    migrate = os.path.join(app_dir, 'migrate.py')
+    if os.path.exists(migrate):
+        subprocess.run([sys.executable, migrate, 'upgrade'], cwd=workdir, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def start_server(app_dir, workdir, port):
+    env = dict(os.environ, PYTHONPATH=app_dir)
+    prepare_database(app_dir, workdir)
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'backend.main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=workdir, env=env)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f'http://127.0.0.1:{port}/health', timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError('server did not start')
+
+
+def seed(base, workdir, needs):
+    httpx.post(f'{base}/api/auth/register', json={'username': 'bench_user', 'password': 'bench_pw'})
+    token = httpx.post(f'{base}/api/auth/token',
+                       data={'username': 'bench_user', 'password': 'bench_pw'}).json()['access_token']
+    conn = sqlite3.connect(os.path.join(workdir, 'haofuwu.db'))
+    user_id = conn.execute("SELECT id FROM users WHERE username = 'bench_user'").fetchone()[0]
+    conn.executemany(
+        "INSERT INTO needs (title, description, region, service_type, img_urls, status, owner_id, create_time, update_time) "
+        "VALUES (?, ?, '测试区', '保洁', '[]', 0, ?, datetime('now', ?), datetime('now'))",
+        [(f'压测需求 {i}', '压测描述' * 20, user_id, f'-{i} seconds') for i in range(needs)])
+    conn.commit()
+    ids = [r[0] for r in conn.execute("SELECT id FROM needs")]
+    conn.close()
+    return token, ids
+
+
+async def run_load(base, token, need_ids, clients, total):
+    headers = {'Authorization': f'Bearer {token}'}
+    rng = random.Random(1)
+    plan = []
+    for _ in range(total):
+        r = rng.random()
+        if r < 0.5:
+            plan.append(('feed', f'/api/need/?page={rng.randint(1, 20)}&size=20'))
+        elif r < 0.8:
+            plan.append(('detail', f'/api/need/detail/{rng.choice(need_ids)}'))
+        else:
+            plan.append(('my-list', f'/api/need/my-list?pageNum={rng.randint(1, 10)}&pageSize=15'))
+    latencies = {}
+    errors = 0
+    queue = iter(plan)
+
+    async with httpx.AsyncClient(base_url=base, headers=headers, timeout=60,
+                                 limits=httpx.Limits(max_connections=clients, max_keepalive_connections=clients)) as client:
+        async def worker():
+            nonlocal errors
+            for name, path in queue:
+                t0 = time.perf_counter()
+                try:
+                    resp = await client.get(path)
+                    ok = resp.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                latencies.setdefault(name, []).append(time.perf_counter() - t0)
+                if not ok:
+                    errors += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - t0
+    return latencies, errors, elapsed
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+def main():
+    p = argparse.ArgumentParser(description="Concurrent read benchmark for the need endpoints")
+    p.add_argument('--clients', type=int, default=500, help='concurrent clients (default: 500)')
+    p.add_argument('--requests', type=int, default=10000, help='total requests (default: 10000)')
+    p.add_argument('--needs', type=int, default=2000, help='needs to seed (default: 2000)')
+    p.add_argument('--app-dir', default=PROJECT_ROOT, help='directory containing the backend package to serve')
+    args = p.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='haofuwu_bench_')
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    proc = start_server(os.path.abspath(args.app_dir), workdir, port)
+    try:
+        token, need_ids = seed(base, workdir, args.needs)
+        # warm-up
+        asyncio.run(run_load(base, token, need_ids, 20, 200))
+        latencies, errors, elapsed = asyncio.run(run_load(base, token, need_ids, args.clients, args.requests))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    done = sum(len(v) for v in latencies.values())
+    print(f"app: {args.app_dir}")
+    print(f"{args.clients} clients, {done} requests in {elapsed:.2f}s -> {done / elapsed:.0f} req/s, {errors} errors")
+    print(f"{'endpoint':<10}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for name, values in sorted(latencies.items()):
+        print(f"{name:<10}{len(values):>8}{pct(values, 0.5):>10.1f}{pct(values, 0.99):>10.1f}"
+              f"{statistics.mean(values) * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for list queries: full ORM entity loads vs column projections vs summary mode.
+Usage:
+  python bench_list_memory.py                     # 10,000 needs and 10,000 services in a temp database
+  python bench_list_memory.py --rows 50000 --desc-chars 4000
+
+The script builds its own SQLite file (never touches haofuwu.db) and lists every row three ways,
+reporting the tracemalloc peak and wall time of each:
+  entity:     SELECT whole Need / Service entities, then build the response dicts (previous behaviour)
+  projection: crud's column-projected statements returning plain Row tuples
+  summary:    the same with summary=True (description / content not selected at all)
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+from backend.database import Base
+from backend import crud, models, schemas
+
+SERVICE_TYPES = ['居家维修', '保洁', '搬家', '家教', '代购', '宠物照看']
+REGIONS = ['北京市朝阳区', '上海市浦东新区', '广州市天河区', '深圳市南山区']
+
+
+def build(db_path, rows, desc_chars):
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(1)
+    text = '上门维修水管漏水周末可以价格面议' * (desc_chars // 16 + 1)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"id": i, "username": f"user{i}", "hashed_password": "x"} for i in range(1, 501)])
+        conn.execute(insert(models.Need), [{
+            "id": i, "owner_id": rng.randint(1, 500), "service_type": rng.choice(SERVICE_TYPES),
+            "title": f"需求 {i}", "description": text[:desc_chars], "region": rng.choice(REGIONS),
+            "img_urls": [f"/uploads/{rng.getrandbits(64):016x}.png" for _ in range(rng.randint(0, 3))],
+            "status": 0,
+        } for i in range(1, rows + 1)])
+        conn.execute(insert(models.Service), [{
+            "id": i, "owner_id": rng.randint(1, 500), "need_id": rng.randint(1, rows),
+            "service_type": rng.choice(SERVICE_TYPES), "title": f"响应 {i}", "content": text[:desc_chars],
+            "status": 0,
+        } for i in range(1, rows + 1)])
+    return engine
+
+
+def needs_entity(db):
+    out = []
+    for n, username in db.execute(select(models.Need, models.User.username)
+                                  .outerjoin(models.User, models.User.id == models.Need.owner_id)
+                                  .order_by(models.Need.create_time.desc(), models.Need.id.desc())):
+        out.append(schemas.NeedOut(
+            id=n.id, title=n.title, description=n.description, region=n.region, serviceType=n.service_type,
+            imgUrls=n.img_urls or [], videoUrl=n.video_url, status=int(n.status or 0),
+            hasResponse=bool(n.response_count), hasAccepted=n.accepted_service_id is not None,
+            userId=n.owner_id, userName=username, createTime=n.create_time).dict())
+    return out
+
+
+def needs_projection(db, summary=False):
+    return [crud._need_dict_from_row(row, summary) for row in db.execute(crud._paged_need_feed([], summary=summary))]
+
+
+def services_entity(db):
+    return [schemas.ServiceOut(id=s.id, need_id=s.need_id, title=s.title, service_type=s.service_type,
+                               content=s.content, status=int(s.status or 0), user_id=s.owner_id,
+                               create_time=s.create_time).dict()
+            for s in db.query(models.Service).order_by(models.Service.create_time.desc(), models.Service.id.desc())]
+
+
+def measure(Session, fn, *args):
+    gc.collect()
+    db = Session()
+    try:
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        result = fn(db, *args)
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return len(result), peak, elapsed
+    finally:
+        db.close()
+
+
+def main():
+    p = argparse.ArgumentParser(description="List query memory benchmark")
+    p.add_argument('--rows', type=int, default=10000, help='needs and services to generate (default: 10000)')
+    p.add_argument('--desc-chars', type=int, default=2000, help='length of description / content (default: 2000)')
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build(os.path.join(tmp, 'bench.db'), args.rows, args.desc_chars)
+        Session = sessionmaker(bind=engine)
+        cases = [
+            ("needs", "entity", needs_entity),
+            ("needs", "projection", needs_projection),
+            ("needs", "summary", lambda db: needs_projection(db, True)),
+            ("services", "entity", services_entity),
+            ("services", "projection", lambda db: crud.get_service_list(db)),
+            ("services", "summary", lambda db: crud.get_service_list(db, summary=True)),
+        ]
+        print(f"{args.rows} rows, {args.desc_chars}-char text columns")
+        print(f"{'list':9} {'mode':11} {'rows':>7} {'peak MiB':>10} {'ms':>9}")
+        for table, mode, fn in cases:
+            count, peak, elapsed = measure(Session, fn)
+            print(f"{table:9} {mode:11} {count:7d} {peak / 2 ** 20:10.1f} {elapsed * 1000:9.0f}")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
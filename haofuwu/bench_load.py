@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Mixed-traffic load test for the whole API.
+Usage:
+  python bench_load.py                                   # 100 clients, 5000 requests, default mix
+  python bench_load.py --clients 200 --requests 20000 --seed 7
+  python bench_load.py --mix feed=50,detail=30,login=20  # custom weights (others become 0)
+  python bench_load.py --app-dir /tmp/old-checkout/haofuwu --compare bench_results/load-<...>.json
+
+The script migrates and seeds a SQLite file in a temporary working directory (users with a known
+password, needs spread over regions / service types, services with a realistic accept ratio), boots
+`backend.main:app` with uvicorn on it, logs every seeded user in, then drives the mix below with an
+asyncio httpx client:
+
+  feed            GET  /api/need/?page=&size=20
+  detail          GET  /api/need/detail/{id}
+  my-list         GET  /api/need/my-list  (polling with If-None-Match, 304 counts as success)
+  login           POST /api/auth/token
+  create-need     POST /api/need/
+  create-service  POST /api/service/      (on someone else's open need)
+  accept-reject   PUT  /api/service/confirm|reject/{id}  (need owner answers a pending response)
+
+A request is an error when the HTTP status is >= 400 or the JSON envelope's "code" is not 200.
+Per-endpoint p50 / p95 / p99 latency, throughput and error rate are printed and written as JSON
+to bench_results/ (or --out) together with the commit, arguments and seed, so runs on different
+commits can be compared with --compare.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from bench_concurrency import PROJECT_ROOT, free_port, prepare_database, start_server, pct
+
+DEFAULT_MIX = {
+    "feed": 35, "detail": 20, "my-list": 15, "login": 5,
+    "create-need": 8, "create-service": 10, "accept-reject": 7,
+}
+PASSWORD = "bench_pw"
+REGIONS = ['北京市朝阳区', '上海市浦东新区', '广州市天河区', '深圳市南山区', '杭州市西湖区', '成都市武侯区']
+SERVICE_TYPES = ['居家维修', '保洁', '搬家', '家教', '代购', '宠物照看']
+
+
+def parse_mix(text):
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {name: 0 for name in DEFAULT_MIX}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in mix:
+            raise SystemExit(f"unknown operation in --mix: {name!r} (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def password_hash():
+    # 与服务端相同的哈希算法，只算一次，所有种子用户共用同一个口令
+    sys.path.insert(0, PROJECT_ROOT)
+    from backend.utils import get_password_hash
+    return get_password_hash(PASSWORD)
+
+
+def seed(workdir, users, needs, services, rng):
+    """Fill the migrated database directly; returns {username: user_id} and [(need_id, owner_id)]."""
+    conn = sqlite3.connect(os.path.join(workdir, 'haofuwu.db'))
+    now = datetime.datetime.utcnow()
+    hashed = password_hash()
+    conn.executemany("INSERT INTO users (id, username, hashed_password, full_name, register_time) VALUES (?, ?, ?, ?, ?)",
+                     [(i, f'load_user{i}', hashed, f'压测用户{i}', now) for i in range(1, users + 1)])
+    need_rows = []
+    for i in range(1, needs + 1):
+        created = now - datetime.timedelta(seconds=rng.randint(0, 90 * 86400))
+        need_rows.append((i, f'压测需求 {i}', '需要上门帮忙，周末可以' * rng.randint(1, 5), rng.choice(REGIONS),
+                          rng.choice(SERVICE_TYPES), '[]', 0, rng.randint(1, users), created, created))
+    conn.executemany("INSERT INTO needs (id, title, description, region, service_type, img_urls, status, owner_id, "
+                     "create_time, update_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", need_rows)
+    owners = {row[0]: row[7] for row in need_rows}
+    accepted = set()
+    svc_rows = []
+    for i in range(1, services + 1):
+        need_id = rng.randint(1, needs)
+        owner = rng.randint(1, users)
+        # 约 20% 的响应已被接受（每个需求至多一条），15% 被拒绝，其余待处理
+        r = rng.random()
+        status = 1 if r < 0.2 and need_id not in accepted else (2 if r < 0.35 else 0)
+        if status == 1:
+            accepted.add(need_id)
+        created = now - datetime.timedelta(seconds=rng.randint(0, 30 * 86400))
+        svc_rows.append((i, f'压测响应 {i}', '可以提供服务', rng.choice(SERVICE_TYPES), status, need_id, owner,
+                         created, created))
+    conn.executemany("INSERT INTO services (id, title, content, service_type, status, need_id, owner_id, "
+                     "create_time, update_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", svc_rows)
+    # 冗余计数与 crud.recompute_need_counters 口径一致
+    conn.execute("""UPDATE needs SET
+        response_count = (SELECT count(*) FROM services s WHERE s.need_id = needs.id),
+        pending_count = (SELECT count(*) FROM services s WHERE s.need_id = needs.id AND s.status = 0),
+        accepted_service_id = (SELECT max(id) FROM services s WHERE s.need_id = needs.id AND s.status = 1)""")
+    conn.commit()
+    pending = {}
+    for sid, _, _, _, status, need_id, _, _, _ in svc_rows:
+        if status == 0 and need_id not in accepted:
+            pending.setdefault(owners[need_id], []).append((need_id, sid))
+    conn.close()
+    return {f'load_user{i}': i for i in range(1, users + 1)}, owners, accepted, pending
+
+
+class LoadState:
+    """Mutable view of the data shared by all workers (who owns what, which responses are pending)."""
+
+    def __init__(self, users, owners, accepted, pending):
+        self.users = users
+        self.tokens = {}
+        self.owners = owners
+        self.open_needs = [nid for nid in owners if nid not in accepted]
+        self.accepted = set(accepted)
+        self.pending = pending  # need owner id -> [(need_id, service_id)]
+        self.etags = {}
+
+
+async def login(client, username):
+    resp = await client.post('/api/auth/token', data={'username': username, 'password': PASSWORD})
+    return resp, (resp.json().get('access_token') if resp.status_code == 200 else None)
+
+
+def is_ok(resp):
+    if resp.status_code == 304:
+        return True
+    if resp.status_code >= 400:
+        return False
+    try:
+        body = resp.json()
+    except ValueError:
+        return False
+    return not isinstance(body, dict) or 'code' not in body or body['code'] == 200
+
+
+async def perform(op, client, state, rng):
+    """Run one operation; returns the response whose status decides success."""
+    username = rng.choice(list(state.users))
+    auth = {'Authorization': f'Bearer {state.tokens[username]}'}
+    if op == 'feed':
+        return await client.get(f'/api/need/?page={rng.randint(1, 20)}&size=20')
+    if op == 'detail':
+        return await client.get(f'/api/need/detail/{rng.choice(list(state.owners))}')
+    if op == 'my-list':
+        headers = dict(auth)
+        if username in state.etags:
+            headers['If-None-Match'] = state.etags[username]
+        resp = await client.get('/api/need/my-list?pageNum=1&pageSize=15', headers=headers)
+        if resp.headers.get('etag'):
+            state.etags[username] = resp.headers['etag']
+        return resp
+    if op == 'login':
+        resp, token = await login(client, username)
+        if token:
+            state.tokens[username] = token
+        return resp
+    if op == 'create-need':
+        resp = await client.post('/api/need/', headers=auth, json={
+            'title': f'新需求 {rng.getrandbits(32):08x}', 'description': '压测新建', 'region': rng.choice(REGIONS),
+            'serviceType': rng.choice(SERVICE_TYPES)})
+        if resp.status_code == 200:
+            need_id = resp.json()['id']
+            state.owners[need_id] = state.users[username]
+            state.open_needs.append(need_id)
+        return resp
+    if op == 'create-service':
+        user_id = state.users[username]
+        need_id = rng.choice(state.open_needs)
+        if state.owners[need_id] == user_id:
+            username = rng.choice([u for u, uid in state.users.items() if uid != user_id])
+            auth = {'Authorization': f'Bearer {state.tokens[username]}'}
+        resp = await client.post('/api/service/', headers=auth, json={
+            'needId': need_id, 'title': '我可以帮忙', 'content': '压测响应', 'serviceType': rng.choice(SERVICE_TYPES)})
+        if is_ok(resp) and need_id not in state.accepted:
+            state.pending.setdefault(state.owners[need_id], []).append((need_id, resp.json()['data']))
+        return resp
+    if op == 'accept-reject':
+        owners = [uid for uid, items in state.pending.items() if items]
+        owner_id = rng.choice(owners)
+        need_id, service_id = state.pending[owner_id].pop(rng.randrange(len(state.pending[owner_id])))
+        owner = next(u for u, uid in state.users.items() if uid == owner_id)
+        auth = {'Authorization': f'Bearer {state.tokens[owner]}'}
+        if rng.random() < 0.4:
+            # 接受后同一需求的其他响应自动被拒绝，也不能再被响应
+            state.accepted.add(need_id)
+            state.pending[owner_id] = [p for p in state.pending[owner_id] if p[0] != need_id]
+            if need_id in state.open_needs:
+                state.open_needs.remove(need_id)
+            return await client.put(f'/api/service/confirm/{service_id}', headers=auth)
+        return await client.put(f'/api/service/reject/{service_id}', headers=auth)
+    raise ValueError(op)
+
+
+async def run_load(base, state, mix, clients, total, seed_value):
+    rng = random.Random(seed_value)
+    names = [n for n, w in mix.items() if w > 0]
+    weights = [mix[n] for n in names]
+    plan = iter(rng.choices(names, weights, k=total))
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+
+    async with httpx.AsyncClient(base_url=base, timeout=60,
+                                 limits=httpx.Limits(max_connections=clients, max_keepalive_connections=clients)) as client:
+        async def worker(index):
+            worker_rng = random.Random(seed_value * 100003 + index)
+            for op in plan:
+                if op == 'accept-reject' and not any(state.pending.values()):
+                    op = 'feed'  # 没有待处理的响应时退化为浏览
+                t0 = time.perf_counter()
+                try:
+                    ok = is_ok(await perform(op, client, state, worker_rng))
+                except httpx.HTTPError:
+                    ok = False
+                latencies.setdefault(op, []).append(time.perf_counter() - t0)
+                if not ok:
+                    errors[op] = errors.get(op, 0) + 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(clients)))
+        elapsed = time.perf_counter() - t0
+    return latencies, errors, elapsed
+
+
+async def login_all(base, state, concurrency=16):
+    sem = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(base_url=base, timeout=60) as client:
+        async def one(username):
+            async with sem:
+                _, token = await login(client, username)
+                if not token:
+                    raise RuntimeError(f'login failed for {username}')
+                state.tokens[username] = token
+        await asyncio.gather(*(one(u) for u in state.users))
+
+
+def git_commit(app_dir):
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=app_dir, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(latencies, errors, elapsed):
+    endpoints = {}
+    for name, values in sorted(latencies.items()):
+        if not values:
+            continue
+        endpoints[name] = {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "errorRate": round(errors.get(name, 0) / len(values), 4),
+            "throughput": round(len(values) / elapsed, 1),
+            "p50Ms": round(pct(values, 0.5), 2),
+            "p95Ms": round(pct(values, 0.95), 2),
+            "p99Ms": round(pct(values, 0.99), 2),
+            "meanMs": round(statistics.mean(values) * 1000, 2),
+        }
+    done = sum(e["count"] for e in endpoints.values())
+    failed = sum(e["errors"] for e in endpoints.values())
+    return {
+        "requests": done,
+        "errors": failed,
+        "errorRate": round(failed / done, 4) if done else 0.0,
+        "elapsedSeconds": round(elapsed, 3),
+        "throughput": round(done / elapsed, 1) if elapsed else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+def print_report(result, baseline=None):
+    total = result["summary"]
+    print(f"app: {result['appDir']} (commit {result['commit']})")
+    print(f"{result['args']['clients']} clients, {total['requests']} requests in {total['elapsedSeconds']:.2f}s "
+          f"-> {total['throughput']:.0f} req/s, error rate {total['errorRate'] * 100:.2f}%")
+    print(f"{'endpoint':<16}{'count':>7}{'req/s':>8}{'err %':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          + (f"{'p95 vs base':>13}" if baseline else ""))
+    base_eps = baseline["summary"]["endpoints"] if baseline else {}
+    for name, e in total["endpoints"].items():
+        line = (f"{name:<16}{e['count']:>7}{e['throughput']:>8.1f}{e['errorRate'] * 100:>7.2f}"
+                f"{e['p50Ms']:>9.1f}{e['p95Ms']:>9.1f}{e['p99Ms']:>9.1f}")
+        if name in base_eps and base_eps[name]["p95Ms"]:
+            line += f"{(e['p95Ms'] / base_eps[name]['p95Ms'] - 1) * 100:>+12.1f}%"
+        print(line)
+    if baseline:
+        b = baseline["summary"]
+        print(f"baseline {baseline['commit']}: {b['throughput']:.0f} req/s, error rate {b['errorRate'] * 100:.2f}% "
+              f"-> throughput {(total['throughput'] / b['throughput'] - 1) * 100:+.1f}%")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Mixed-traffic load test for the whole API")
+    p.add_argument('--clients', type=int, default=100, help='concurrent clients (default: 100)')
+    p.add_argument('--requests', type=int, default=5000, help='total requests (default: 5000)')
+    p.add_argument('--users', type=int, default=100, help='users to seed (default: 100)')
+    p.add_argument('--needs', type=int, default=5000, help='needs to seed (default: 5000)')
+    p.add_argument('--services', type=int, default=10000, help='services to seed (default: 10000)')
+    p.add_argument('--mix', default=None, help='operation weights, e.g. feed=50,detail=30,login=20')
+    p.add_argument('--seed', type=int, default=1, help='random seed for data and traffic (default: 1)')
+    p.add_argument('--app-dir', default=PROJECT_ROOT, help='directory containing the backend package to serve')
+    p.add_argument('--out', default=None, help='result file (default: bench_results/load-<commit>-<time>.json)')
+    p.add_argument('--compare', default=None, help='earlier result file to compare against')
+    args = p.parse_args()
+    mix = parse_mix(args.mix)
+    app_dir = os.path.abspath(args.app_dir)
+
+    workdir = tempfile.mkdtemp(prefix='haofuwu_load_')
+    prepare_database(app_dir, workdir)
+    if not os.path.exists(os.path.join(workdir, 'haofuwu.db')):
+        raise SystemExit('this version creates its tables on import; seed it with bench_concurrency.py instead')
+    rng = random.Random(args.seed)
+    state = LoadState(*seed(workdir, args.users, args.needs, args.services, rng))
+
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    proc = start_server(app_dir, workdir, port)
+    try:
+        asyncio.run(login_all(base, state))
+        # 预热：少量读请求，让连接、缓存和进程池就绪
+        asyncio.run(run_load(base, state, {'feed': 1, 'detail': 1}, 10, 100, args.seed + 1))
+        latencies, errors, elapsed = asyncio.run(run_load(base, state, mix, args.clients, args.requests, args.seed))
+    finally:
+        proc.terminate()
+        proc.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        "benchmark": "load",
+        "commit": git_commit(app_dir),
+        "appDir": app_dir,
+        "time": datetime.datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "args": {k: v for k, v in vars(args).items() if k not in ('out', 'compare')},
+        "mix": mix,
+        "summary": summarize(latencies, errors, elapsed),
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    out = args.out or os.path.join(PROJECT_ROOT, 'bench_results',
+                                   f"load-{result['commit'] or 'nogit'}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"results written to {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-request overhead of the /metrics middleware.
+Usage:
+  python bench_metrics.py                      # 200,000 requests, best of 5
+  python bench_metrics.py --requests 1000000 --repeat 3
+
+A minimal ASGI app (response start + one body message, with the route info FastAPI would leave
+in the scope) is called directly in a loop, once bare and once wrapped in MetricsMiddleware.
+The difference per call is the cost the middleware adds to every real request: the in-flight
+gauge, the send wrapper, two histogram updates and the route-template lookup.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from backend import metrics
+
+
+class _Route:
+    path = "/api/need/detail/{need_id}"
+
+
+START = {"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]}
+BODY = {"type": "http.response.body", "body": b'{"code":200,"msg":"ok","data":{}}'}
+
+
+async def bare_app(scope, receive, send):
+    scope["fastapi"] = {"effective_route_context": _Route}
+    await send(START)
+    await send(BODY)
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def run(app, n):
+    scope = {"type": "http", "method": "GET", "path": "/api/need/detail/1"}
+    t0 = time.perf_counter()
+    for _ in range(n):
+        await app(scope, receive, send)
+    return time.perf_counter() - t0
+
+
+def main():
+    p = argparse.ArgumentParser(description="Overhead of the metrics middleware per request")
+    p.add_argument('--requests', type=int, default=200_000, help='calls per run (default: 200,000)')
+    p.add_argument('--repeat', type=int, default=5, help='runs per variant, best is reported (default: 5)')
+    args = p.parse_args()
+
+    wrapped = metrics.MetricsMiddleware(bare_app, registry=metrics.Registry())
+    bare_best = wrapped_best = None
+    for _ in range(args.repeat):
+        bare = asyncio.run(run(bare_app, args.requests))
+        timed = asyncio.run(run(wrapped, args.requests))
+        bare_best = bare if bare_best is None else min(bare_best, bare)
+        wrapped_best = timed if wrapped_best is None else min(wrapped_best, timed)
+
+    per_bare = bare_best / args.requests * 1e6
+    per_wrapped = wrapped_best / args.requests * 1e6
+    print(f"{args.requests} calls, best of {args.repeat}")
+    print(f"  bare app        {per_bare:6.2f} us/request")
+    print(f"  with metrics    {per_wrapped:6.2f} us/request")
+    print(f"  overhead        {per_wrapped - per_bare:6.2f} us/request")
+
+
+if __name__ == '__main__':
+    main()
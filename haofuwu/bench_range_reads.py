@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for concurrent HTTP Range reads from /uploads (video seeking pattern).
+Usage:
+  python bench_range_reads.py                              # 200 clients, 64 MiB file, 256 KiB ranges
+  python bench_range_reads.py --clients 500 --file-mb 256 --range-kb 1024 --requests 20000
+
+The script boots `backend.main:app` with uvicorn in a temporary working directory, uploads one
+random file through POST /api/upload/, then fires random byte ranges at its /uploads URL and
+reports requests/s, MiB/s and latency percentiles. Every response body is checked for length.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from bench_concurrency import PROJECT_ROOT, free_port, start_server, pct
+
+
+async def run_load(base, url, size, range_bytes, clients, total):
+    rng = random.Random(1)
+    plan = []
+    for _ in range(total):
+        start = rng.randrange(0, max(1, size - range_bytes))
+        plan.append((start, min(size, start + range_bytes) - 1))
+    latencies = []
+    errors = 0
+    received = 0
+    queue = iter(plan)
+
+    async with httpx.AsyncClient(base_url=base, timeout=60,
+                                 limits=httpx.Limits(max_connections=clients, max_keepalive_connections=clients)) as client:
+        async def worker():
+            nonlocal errors, received
+            for start, end in queue:
+                t0 = time.perf_counter()
+                try:
+                    resp = await client.get(url, headers={'Range': f'bytes={start}-{end}'})
+                    ok = resp.status_code == 206 and len(resp.content) == end - start + 1
+                    received += len(resp.content)
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - t0)
+                if not ok:
+                    errors += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - t0
+    return latencies, errors, received, elapsed
+
+
+def main():
+    p = argparse.ArgumentParser(description="Concurrent Range-read benchmark for /uploads")
+    p.add_argument('--clients', type=int, default=200, help='concurrent clients (default: 200)')
+    p.add_argument('--requests', type=int, default=5000, help='total range requests (default: 5000)')
+    p.add_argument('--file-mb', type=int, default=64, help='size of the served file in MiB (default: 64)')
+    p.add_argument('--range-kb', type=int, default=256, help='bytes per range request in KiB (default: 256)')
+    p.add_argument('--app-dir', default=PROJECT_ROOT, help='directory containing the backend package to serve')
+    args = p.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='haofuwu_bench_')
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    proc = start_server(os.path.abspath(args.app_dir), workdir, port)
+    url = None
+    try:
+        size = args.file_mb * 1024 * 1024
+        payload = os.urandom(size)
+        url = httpx.post(f'{base}/api/upload/', files={'file': ('bench.mp4', payload, 'video/mp4')},
+                         timeout=120).json()['data']['url']
+        asyncio.run(run_load(base, url, size, args.range_kb * 1024, 10, 100))  # warm-up
+        latencies, errors, received, elapsed = asyncio.run(
+            run_load(base, url, size, args.range_kb * 1024, args.clients, args.requests))
+    finally:
+        proc.terminate()
+        proc.wait()
+        # the upload store lives inside the served checkout, not the temp workdir
+        blob = os.path.join(os.path.abspath(args.app_dir), 'backend', *url.lstrip('/').split('/')) if url else None
+        if blob and os.path.exists(blob):
+            os.remove(blob)
+
+    print(f"app: {args.app_dir}")
+    print(f"{args.clients} clients, {len(latencies)} ranges of {args.range_kb} KiB in {elapsed:.2f}s "
+          f"-> {len(latencies) / elapsed:.0f} req/s, {received / elapsed / 1048576:.1f} MiB/s, {errors} errors")
+    print(f"p50 {pct(latencies, 0.5):.1f} ms  p99 {pct(latencies, 0.99):.1f} ms  "
+          f"mean {statistics.mean(latencies) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
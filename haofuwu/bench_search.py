@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark FTS5 keyword search against the legacy LIKE '%kw%' scan.
+Usage:
+  python bench_search.py                      # 1,000,000 needs in a temp database
+  python bench_search.py --rows 200000 --repeat 5 --db /tmp/bench_search.db
+
+The script builds its own SQLite file (never touches haofuwu.db), fills `needs` with synthetic
+Chinese text, builds the FTS index, then times each query both ways.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from sqlalchemy import create_engine
+from backend.database import Base
+from backend import models, search  # noqa: F401  (models registers the tables on Base)
+
+REGIONS = ['北京市朝阳区', '上海市浦东新区', '广州市天河区', '深圳市南山区', '杭州市西湖区', '成都市武侯区']
+SERVICE_TYPES = ['居家维修', '保洁', '搬家', '家教', '代购', '宠物照看']
+WORDS = ['上门', '维修', '水管', '漏水', '空调', '清洗', '玻璃擦洗', '深度清洁', '搬家', '周末', '钢琴调音',
+         '数学辅导', '英语口语', '宠物喂养', '遛狗', '代购', '生鲜', '跑腿', '油烟机', '开荒保洁', '家电',
+         '安装', '热水器', '马桶疏通', '墙面翻新', '需要', '帮忙', '尽快', '价格面议', '经验丰富']
+QUERIES = ['玻璃擦洗', '马桶疏通', '钢琴调音', '数学辅导', '热水器 油烟机']
+# 常用字，用来拼出随机填充词，让关键词的命中率接近真实数据（几个百分点而不是一半）
+FILLER_CHARS = '的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处理府研质'
+
+
+def filler(rng, n):
+    return ''.join(rng.choice(FILLER_CHARS) for _ in range(n))
+
+
+def sentence(rng, n):
+    # 每个关键词后面跟一段随机填充
+    return ''.join(rng.choice(WORDS) + filler(rng, rng.randint(4, 12)) for _ in range(n))
+
+
+def build(db_path, rows, batch=50000):
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("INSERT OR IGNORE INTO users (id, username, hashed_password) VALUES (1, 'bench', 'x')")
+    rng = random.Random(42)
+    sql = ("INSERT INTO needs (title, description, region, service_type, status, owner_id, create_time, update_time) "
+           "VALUES (?, ?, ?, ?, 0, 1, '2024-01-01 00:00:00', '2024-01-01 00:00:00')")
+    done = 0
+    while done < rows:
+        n = min(batch, rows - done)
+        conn.executemany(sql, [(sentence(rng, 1), sentence(rng, 3), rng.choice(REGIONS), rng.choice(SERVICE_TYPES))
+                               for _ in range(n)])
+        done += n
+    conn.commit()
+    conn.close()
+    # 批量写入完成后再建索引（一次 rebuild 比逐行触发器快得多）
+    search.ensure_fts(engine)
+    engine.dispose()
+
+
+def time_query(conn, sql, params, repeat):
+    best = None
+    count = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        count = conn.execute(sql, params).fetchone()[0]
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, count
+
+
+def main():
+    p = argparse.ArgumentParser(description="FTS5 vs LIKE keyword search benchmark")
+    p.add_argument('--rows', type=int, default=1000000, help='number of needs to generate (default: 1,000,000)')
+    p.add_argument('--repeat', type=int, default=3, help='runs per query, best time is reported')
+    p.add_argument('--db', default=None, help='database path (default: a temp file, reused if it exists)')
+    args = p.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.gettempdir(), f"haofuwu_bench_search_{args.rows}.db")
+    if not os.path.exists(db_path):
+        t0 = time.perf_counter()
+        build(db_path, args.rows)
+        print(f"built {args.rows} needs in {time.perf_counter() - t0:.1f}s -> {db_path}")
+
+    conn = sqlite3.connect(db_path)
+    print(f"{'query':<14}{'LIKE ms':>10}{'FTS ms':>10}{'speedup':>9}{'hits':>9}")
+    for q in QUERIES:
+        terms = q.split()
+        like_where = " AND ".join("(title LIKE ? OR description LIKE ? OR region LIKE ?)" for _ in terms)
+        like_params = [f"%{t}%" for t in terms for _ in range(3)]
+        like_t, like_n = time_query(conn, f"SELECT COUNT(*) FROM needs WHERE {like_where}", like_params, args.repeat)
+        fts_t, fts_n = time_query(conn, "SELECT COUNT(*) FROM needs_fts WHERE needs_fts MATCH ?",
+                                  [search.match_expression(terms)], args.repeat)
+        if like_n != fts_n:
+            print(f"warning: result mismatch for {q!r}: LIKE={like_n} FTS={fts_n}")
+        print(f"{q:<14}{like_t * 1000:>10.1f}{fts_t * 1000:>10.1f}{like_t / fts_t:>8.1f}x{fts_n:>9}")
+
+    # 排序 + 高亮 + 取前 20 条：接口实际执行的查询
+    for q in QUERIES[:2]:
+        t0 = time.perf_counter()
+        conn.execute(
+            "SELECT b.id, snippet(needs_fts, 1, '<mark>', '</mark>', '…', 24) FROM needs_fts "
+            "JOIN needs b ON b.id = needs_fts.rowid WHERE needs_fts MATCH ? "
+            "ORDER BY bm25(needs_fts, 10.0, 1.0, 2.0) LIMIT 20", [search.match_expression(q.split())]).fetchall()
+        print(f"ranked top-20 with snippet for {q!r}: {(time.perf_counter() - t0) * 1000:.1f} ms")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
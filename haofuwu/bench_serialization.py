@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: serialising a need-feed page through pydantic vs the fast JSON path.
+Usage:
+  python bench_serialization.py                   # 1000-row pages, 200 repeats
+  python bench_serialization.py --rows 10000 --repeat 20
+
+Both paths start from the same synthetic feed rows (the shape `crud._paged_need_feed` returns):
+  pydantic: row -> schemas.NeedOut -> jsonable_encoder -> json.dumps   (old route behaviour)
+  fast:     row -> dict (crud._need_dict_from_row) -> fastjson.dumps   (orjson when installed)
+The script checks that both produce the same JSON before timing anything.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from collections import namedtuple
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from fastapi.encoders import jsonable_encoder
+from backend import crud, fastjson
+
+FeedRow = namedtuple("FeedRow", "id title description region service_type img_urls video_url status owner_id "
+                                "accepted_service_id create_time user_name response_count")
+
+SERVICE_TYPES = ['居家维修', '保洁', '搬家', '家教', '代购', '宠物照看']
+REGIONS = ['北京市朝阳区', '上海市浦东新区', '广州市天河区', '深圳市南山区']
+
+
+def make_rows(n, seed=1):
+    rng = random.Random(seed)
+    base = datetime.datetime(2024, 1, 1)
+    rows = []
+    for i in range(n):
+        imgs = [f"/uploads/{rng.getrandbits(64):016x}.png" for _ in range(rng.randint(0, 3))]
+        rows.append(FeedRow(
+            id=i + 1, title=f"需求标题 {i}", description="上门维修水管漏水，周末可以，价格面议" * rng.randint(1, 4),
+            region=rng.choice(REGIONS), service_type=rng.choice(SERVICE_TYPES), img_urls=imgs or None,
+            video_url=None, status=rng.choice([0, 0, 0, 1]), owner_id=rng.randint(1, 500),
+            accepted_service_id=rng.choice([None, None, 7]),
+            create_time=base + datetime.timedelta(seconds=rng.randint(0, 10 ** 7), microseconds=rng.randint(0, 1)),
+            user_name=f"user{rng.randint(1, 500)}", response_count=rng.randint(0, 3)))
+    return rows
+
+
+def pydantic_path(rows):
+    return json.dumps(jsonable_encoder([crud._need_out_from_row(r) for r in rows]),
+                      ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(rows):
+    return fastjson.dumps([crud._need_dict_from_row(r) for r in rows])
+
+
+def timeit(fn, rows, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(rows)
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def main():
+    p = argparse.ArgumentParser(description="NeedOut vs fast JSON serialisation benchmark")
+    p.add_argument('--rows', type=int, default=1000, help='rows per page (default: 1000)')
+    p.add_argument('--repeat', type=int, default=200, help='timed repetitions per path (default: 200)')
+    args = p.parse_args()
+
+    rows = make_rows(args.rows)
+    if json.loads(pydantic_path(rows)) != json.loads(fast_path(rows)):
+        sys.exit("outputs differ: the fast path is not a drop-in replacement")
+
+    print(f"encoder: {'orjson' if fastjson.orjson is not None else 'json (orjson not installed)'}")
+    print(f"{args.rows} rows x {args.repeat} repeats")
+    print(f"{'path':10} {'median ms':>10} {'min ms':>10} {'rows/s':>12}")
+    results = {}
+    for name, fn in (("pydantic", pydantic_path), ("fast", fast_path)):
+        samples = timeit(fn, rows, args.repeat)
+        med = statistics.median(samples)
+        results[name] = med
+        print(f"{name:10} {med * 1000:10.2f} {min(samples) * 1000:10.2f} {args.rows / med:12.0f}")
+    print(f"speedup: {results['pydantic'] / results['fast']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Recount references to content-addressed uploads and delete the ones nothing points at, and drop
+resumable upload sessions that have expired together with their chunk files.
+Usage:
+  python gc_uploads.py                     # delete blobs unreferenced and not uploaded in the last 24h
+  python gc_uploads.py --grace-hours 1     # shorter grace period
+  python gc_uploads.py --dry-run           # only list what would be deleted
+
+References are the blob URLs found in Need.img_urls, Need.video_url and Service.files.
+Upload sessions expire after blobstore.SESSION_TTL without a new chunk; until this script runs,
+the upload API answers them with 410.
+"""
+import argparse
+import sys
+import os
+
+# ensure project root is on sys.path so `backend` imports work
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from backend.database import SessionLocal
+from backend import blobstore
+
+
+def main():
+    p = argparse.ArgumentParser(description="Garbage-collect unreferenced uploads and expired upload sessions")
+    p.add_argument('--grace-hours', type=float, default=blobstore.GC_GRACE_SECONDS / 3600,
+                   help='keep unreferenced blobs uploaded within this many hours (default: 24)')
+    p.add_argument('--dry-run', action='store_true', help='list removable blobs without deleting them')
+    args = p.parse_args()
+
+    db = SessionLocal()
+    try:
+        sessions = blobstore.expire_sessions(db, dry_run=args.dry_run)
+        for upload_id in sessions:
+            print(f"session {upload_id}")
+        print(f"✅ {'Would remove' if args.dry_run else 'Removed'} {len(sessions)} expired upload session(s)")
+        removed = blobstore.collect_garbage(db, grace_seconds=int(args.grace_hours * 3600), dry_run=args.dry_run)
+        for sha256 in removed:
+            print(sha256)
+        print(f"✅ {'Would remove' if args.dry_run else 'Removed'} {len(removed)} unreferenced blob(s)")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Upload GC failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
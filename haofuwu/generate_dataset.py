@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Generate a large synthetic dataset (users, needs, services) for realistic-scale testing.
+Usage:
+  python generate_dataset.py                                  # 1M users, 2M needs, ~3M services -> haofuwu_large.db
+  python generate_dataset.py --users 200000 --needs 400000 --services 600000 --db /tmp/mid.db
+  python generate_dataset.py --db haofuwu.db --force          # replace the dev database (asks nothing, deletes it)
+
+The target file is migrated to the current schema first, then filled with batched executemany
+inserts inside a few large transactions, with SQLite tuned for bulk load (no journal, no fsync,
+exclusive lock, large page cache). Secondary indexes and the FTS / bigram sync triggers are dropped
+for the load and rebuilt once at the end, and the stats_monthly table is rebuilt from the result.
+
+Distributions (all driven by --seed):
+  users     registration time spread over --months, later months busier; ~40% of users post
+            needs and ~25% respond, each with a heavy-tailed (Pareto) activity level
+  needs     regions / service types with skewed weights taken from the frontend pools,
+            created after the owner registered, ~6% cancelled
+  services  responses per need are geometric (many needs get none, a few get dozens), arriving
+            within days of the need; --accept-ratio of the answered open needs accept one response
+            (the others become rejected, as the API does), the rest stay mostly pending
+Every seeded user has the password given by --password, so any of them can log in.
+The denormalised counters on needs are written consistently with crud.recompute_need_counters.
+"""
+import argparse
+import datetime
+import math
+import os
+import random
+import sqlite3
+import sys
+import time
+
+# ensure project root is on sys.path so `backend` imports work
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from backend import crud, migrations, search
+from backend.utils import get_password_hash
+
+# 与前端 userStore.js 的地域池 / 服务类型一致；权重为大致的人口与订单量比例
+REGIONS = {
+    '北京市朝阳区': 14, '北京市海淀区': 11, '上海市浦东新区': 15, '上海市静安区': 6,
+    '广州市天河区': 9, '广州市越秀区': 5, '深圳市南山区': 10, '深圳市福田区': 8,
+    '杭州市西湖区': 7, '杭州市滨江区': 5, '成都市锦江区': 4, '成都市武侯区': 6,
+}
+DESCRIPTIONS = {
+    '居家维修': ['电路跳闸多次，怀疑线路老化，需要专业电工检修', '马桶堵塞无法冲水，急需疏通，要求师傅带工具',
+             '热水器不出热水，排查是否是加热管故障，需维修', '空调制冷效果差，需要清洗滤网并加氟',
+             '燃气灶打不着火，检查是否是电池或燃气阀问题', '衣柜铰链松动，柜门下垂，需要调整并加固'],
+    '生活照料': ['独居老人80岁，需要日常陪护，包括买菜、做饭、聊天', '术后老人需要协助洗澡、穿衣，要求护理经验丰富',
+             '每周三次接送老人去医院复诊，路程约5公里', '老人忘记按时吃药，需要每天电话提醒+上门确认',
+             '帮老人照顾宠物（猫咪），每天喂食、铲屎，时长1小时'],
+    '清洁保洁': ['全屋深度清洁，包括厨房、卫生间、卧室，要求无死角', '厨房重油污清理，重点是灶台、抽油烟机、橱柜内部',
+             '全屋玻璃擦拭，包括落地窗、阳台门，要求无水印', '新房开荒保洁，刚装修完，需清理灰尘和胶迹',
+             '沙发和地毯有污渍，需要专业清洗，去除异味'],
+    '出行就医': ['陪同老人去三甲医院挂号就诊，需帮忙排队、取号', '接送化疗病人往返医院，每周两次，车程约30分钟',
+             '代取老人的检查报告，需凭就诊卡到医院打印', '用轮椅接送行动不便的老人出门，范围5公里内'],
+    '餐食服务': ['定制老年营养餐，低盐低脂，每天配送三餐', '每日三餐配送，针对糖尿病患者，控糖食谱',
+             '每周5次午餐配送，针对独居老人，热菜热饭'],
+    '其它': ['帮忙搬运衣柜（双门），从5楼到1楼，无电梯', '网购家具组装，包括书桌、衣柜，需带工具',
+           '教老人使用智能手机，包括微信、视频通话、扫码'],
+}
+SERVICE_TYPE_WEIGHTS = {'居家维修': 30, '清洁保洁': 25, '生活照料': 18, '出行就医': 10, '餐食服务': 9, '其它': 8}
+DETAIL_SUFFIXES = ['', '，时间可协商', '，周末优先', '，价格面议', '，尽快上门', '，请带好工具和证件，联系前先电话确认']
+SERVICE_CONTENTS = ['本人有相关经验，可以随时上门', '从业五年，持证上岗，价格优惠', '就住附近，半小时内可到',
+                    '做过很多类似的单子，好评率高', '周末全天有空，可以长期合作']
+
+USER_SQL = ("INSERT INTO users (id, username, hashed_password, full_name, phone, user_type, register_time, update_time) "
+            "VALUES (?, ?, ?, ?, ?, '普通用户', ?, ?)")
+NEED_SQL = ("INSERT INTO needs (id, owner_id, service_type, title, description, region, img_urls, status, "
+            "response_count, pending_count, accepted_service_id, create_time, update_time) "
+            "VALUES (?, ?, ?, ?, ?, ?, '[]', ?, ?, ?, ?, ?, ?)")
+SERVICE_SQL = ("INSERT INTO services (id, owner_id, need_id, service_type, title, content, files, status, "
+               "create_time, update_time) VALUES (?, ?, ?, ?, ?, ?, '[]', ?, ?, ?)")
+
+BULK_PRAGMAS = [
+    "PRAGMA journal_mode=OFF",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA locking_mode=EXCLUSIVE",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-262144",  # 256 MiB
+]
+
+
+class Timestamps:
+    """Format epoch seconds the way SQLAlchemy stores DateTime in SQLite (whole seconds).
+
+    The date part is cached per day and the time part comes from a table of all 86400 clock
+    readings, so formatting costs a dict lookup and a concatenation instead of strftime.
+    """
+
+    CLOCK = [f'{h:02d}:{m:02d}:{s:02d}.000000' for h in range(24) for m in range(60) for s in range(60)]
+
+    def __init__(self):
+        self.days = {}
+
+    def __call__(self, epoch):
+        day, sec = divmod(int(epoch), 86400)
+        prefix = self.days.get(day)
+        if prefix is None:
+            prefix = self.days[day] = datetime.datetime.fromtimestamp(
+                day * 86400, datetime.timezone.utc).strftime('%Y-%m-%d ')
+        return prefix + self.CLOCK[sec]
+
+
+def cumulative(weights):
+    total, out = 0.0, []
+    for w in weights:
+        total += w
+        out.append(total)
+    return out
+
+
+def activity_weights(rng, users, share, alpha=1.5):
+    # share 比例的用户有 Pareto 分布的活跃度，其余为 0（只浏览不发布）
+    return cumulative(rng.paretovariate(alpha) if rng.random() < share else 0.0 for _ in range(users))
+
+
+def drop_bulk_obstacles(conn):
+    """Drop secondary indexes and triggers on the bulk-loaded tables; returns their DDL for restore."""
+    rows = conn.execute("SELECT type, name, sql FROM sqlite_master WHERE type IN ('index', 'trigger') "
+                        "AND tbl_name IN ('users', 'needs', 'services') AND sql IS NOT NULL").fetchall()
+    for kind, name, _ in rows:
+        conn.execute(f"DROP {kind.upper()} {name}")
+    return rows
+
+
+def restore_bulk_obstacles(conn, rows):
+    for kind, _, sql in rows:
+        if kind == 'index':
+            conn.execute(sql)
+    # FTS 是 external-content 表，一次 rebuild 比逐行触发器快得多；重建后再恢复同步触发器
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                                "AND name IN ('needs_fts', 'services_fts')").fetchall():
+        conn.execute(f"INSERT INTO {name}({name}) VALUES ('rebuild')")
+    # 两字词的二元索引同样由触发器维护，批量导入后整体重填
+    for sql in search.bigram_rebuild_statements():
+        conn.execute(sql)
+    for kind, _, sql in rows:
+        if kind == 'trigger':
+            conn.execute(sql)
+
+
+class Generator:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.end = time.time()
+        self.start = self.end - args.months * 30 * 86400
+        self.register = []  # user id - 1 -> 注册时间（epoch）
+        self.ts = Timestamps()
+
+    def users(self, conn, hashed):
+        rng, ts, span = self.rng, self.ts, self.end - self.start
+        batch = self.args.batch
+        for lo in range(1, self.args.users + 1, batch):
+            rows = []
+            for uid in range(lo, min(lo + batch, self.args.users + 1)):
+                # sqrt 使注册量随时间线性增长（越往后越多）
+                t = self.start + span * math.sqrt(rng.random())
+                self.register.append(t)
+                stamp = ts(t)
+                rows.append((uid, f'user{uid:07d}', hashed, f'用户{uid}', f'1{rng.randint(3, 9)}{uid:09d}', stamp, stamp))
+            conn.executemany(USER_SQL, rows)
+        return self.args.users
+
+    def needs_and_services(self, conn):
+        args, rng, ts, end = self.args, self.rng, self.ts, self.end
+        user_count = args.users
+        user_ids = range(1, user_count + 1)
+        posters = activity_weights(rng, user_count, 0.4)
+        responders = activity_weights(rng, user_count, 0.25)
+        region_names, region_cum = list(REGIONS), cumulative(REGIONS.values())
+        type_names, type_cum = list(SERVICE_TYPE_WEIGHTS), cumulative(SERVICE_TYPE_WEIGHTS.values())
+        # (title, description, 响应标题) 组合预先拼好，循环里只做下标选择
+        texts = {stype: [(d.split('，')[0], d + suffix, d.split('，')[0] + ' - 我可以帮忙')
+                         for d in descs for suffix in DETAIL_SUFFIXES] for stype, descs in DESCRIPTIONS.items()}
+        contents = SERVICE_CONTENTS
+        # 每个需求的响应数服从均值为 services/needs 的几何分布
+        mean = args.services / args.needs if args.needs else 0
+        log_q = math.log(mean / (mean + 1)) if mean > 0 else None
+        reply_delay = 1 / (2 * 86400.0)  # 响应平均在需求发布两天后到达
+        need_id = service_id = 0
+        for lo in range(0, args.needs, args.batch):
+            n = min(args.batch, args.needs - lo)
+            owners = rng.choices(user_ids, cum_weights=posters, k=n)
+            regions = rng.choices(region_names, cum_weights=region_cum, k=n)
+            types = rng.choices(type_names, cum_weights=type_cum, k=n)
+            counts = [int(math.log(1.0 - rng.random()) / log_q) for _ in range(n)] if log_q else [0] * n
+            # 整批一次抽取响应者，比每个需求单独调用 choices 快得多
+            helpers = iter(rng.choices(user_ids, cum_weights=responders, k=sum(counts)))
+            need_rows, service_rows = [], []
+            for owner, region, stype, count in zip(owners, regions, types, counts):
+                need_id += 1
+                reg = self.register[owner - 1]
+                created = reg + (end - reg) * rng.random()
+                options = texts[stype]
+                title, desc, reply_title = options[int(rng.random() * len(options))]
+                status = -1 if rng.random() < 0.06 else 0
+                accepted_at = -1
+                if count and status == 0 and rng.random() < args.accept_ratio:
+                    accepted_at = int(rng.random() * count)
+                accepted_id = None
+                pending = 0
+                updated = created
+                for i in range(count):
+                    service_id += 1
+                    helper = next(helpers)
+                    if helper == owner:
+                        helper = helper % user_count + 1
+                    s_created = min(created + rng.expovariate(reply_delay), end)
+                    if accepted_at >= 0:
+                        # 接受一条后其余响应被拒绝，与 crud.accept_service 一致
+                        s_status = 1 if i == accepted_at else 2
+                    else:
+                        s_status = 0 if rng.random() < 0.8 else 2
+                    if s_status == 1:
+                        accepted_id = service_id
+                    elif s_status == 0:
+                        pending += 1
+                    if s_created > updated:
+                        updated = s_created
+                    s_stamp = ts(s_created)
+                    service_rows.append((service_id, helper, need_id, stype, reply_title,
+                                         contents[int(rng.random() * len(contents))], s_status, s_stamp, s_stamp))
+                need_rows.append((need_id, owner, stype, title, desc, region, status,
+                                  count, pending, accepted_id, ts(created), ts(updated)))
+            conn.executemany(NEED_SQL, need_rows)
+            conn.executemany(SERVICE_SQL, service_rows)
+        return need_id, service_id
+
+
+def main():
+    p = argparse.ArgumentParser(description="Generate a large synthetic haofuwu dataset")
+    p.add_argument('--db', default='haofuwu_large.db', help='SQLite file to create (default: haofuwu_large.db)')
+    p.add_argument('--force', action='store_true', help='delete the target file first if it exists')
+    p.add_argument('--users', type=int, default=1_000_000, help='users to create (default: 1,000,000)')
+    p.add_argument('--needs', type=int, default=2_000_000, help='needs to create (default: 2,000,000)')
+    p.add_argument('--services', type=int, default=3_000_000,
+                   help='expected number of services; the actual count varies with the distribution (default: 3,000,000)')
+    p.add_argument('--accept-ratio', type=float, default=0.35,
+                   help='share of answered open needs that accept a response (default: 0.35)')
+    p.add_argument('--months', type=int, default=24, help='create-time spread in months, ending now (default: 24)')
+    p.add_argument('--password', default='Aa123456', help='password shared by every generated user')
+    p.add_argument('--batch', type=int, default=50_000, help='rows per executemany batch (default: 50,000)')
+    p.add_argument('--seed', type=int, default=1, help='random seed (default: 1)')
+    args = p.parse_args()
+
+    if os.path.exists(args.db):
+        if not args.force:
+            print(f"❌ {args.db} already exists; pass --force to replace it")
+            sys.exit(1)
+        os.remove(args.db)
+
+    t_start = time.perf_counter()
+    engine = create_engine(f"sqlite:///{args.db}", connect_args={"check_same_thread": False})
+    migrations.upgrade(engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(args.db, isolation_level=None)
+    for pragma in BULK_PRAGMAS:
+        conn.execute(pragma)
+    gen = Generator(args)
+    try:
+        conn.execute("BEGIN")
+        saved = drop_bulk_obstacles(conn)
+        conn.execute("COMMIT")
+
+        t0 = time.perf_counter()
+        conn.execute("BEGIN")
+        users = gen.users(conn, get_password_hash(args.password))
+        conn.execute("COMMIT")
+        conn.execute("BEGIN")
+        needs, services = gen.needs_and_services(conn)
+        conn.execute("COMMIT")
+        load_time = time.perf_counter() - t0
+        rows = users + needs + services
+        print(f"✅ Inserted {users} users, {needs} needs, {services} services in {load_time:.1f}s "
+              f"({rows / load_time:,.0f} rows/s)")
+
+        t0 = time.perf_counter()
+        conn.execute("BEGIN")
+        restore_bulk_obstacles(conn, saved)
+        conn.execute("COMMIT")
+        print(f"✅ Rebuilt {len(saved)} indexes / triggers and the full-text / bigram indexes in {time.perf_counter() - t0:.1f}s")
+    except Exception as e:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        print(f"❌ Failed to generate dataset: {e}")
+        raise
+    finally:
+        conn.close()
+
+    t0 = time.perf_counter()
+    engine = create_engine(f"sqlite:///{args.db}", connect_args={"check_same_thread": False})
+    db = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        stats = crud.rebuild_monthly_stats(db)
+    finally:
+        db.close()
+    engine.dispose()
+    print(f"✅ Rebuilt {stats} monthly stats rows in {time.perf_counter() - t0:.1f}s")
+    print(f"✅ {args.db} ready in {time.perf_counter() - t_start:.1f}s (password for every user: {args.password})")
+
+
+if __name__ == '__main__':
+    main()
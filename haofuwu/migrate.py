@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Apply or inspect database schema migrations (backend/migrations/vNNNN_*.py).
+Usage:
+  python migrate.py                 # same as `upgrade`
+  python migrate.py upgrade         # apply all pending migrations to haofuwu.db
+  python migrate.py upgrade --to 3  # stop after version 3
+  python migrate.py status          # show current / head version and applied migrations
+
+Run it before starting (or restarting) the API after a deploy: the app only checks that the
+schema is at the expected version and refuses to start otherwise. Databases created before
+versioned migrations existed are adopted by the same command.
+"""
+import argparse
+import sys
+import os
+import time
+
+# ensure project root is on sys.path so `backend` imports work
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from backend.database import engine
+from backend import migrations
+
+
+def status():
+    current, head = migrations.current_version(engine), migrations.head()
+    applied = {version: applied_at for version, _, applied_at in migrations.history(engine)}
+    for m in migrations.discover():
+        mark = f"applied {applied[m.version]}" if m.version in applied else "pending"
+        print(f"  {m.version:04d}_{m.name:32} {mark}")
+    print(f"current version {current}, head {head}" + (" (up to date)" if current == head else ""))
+
+
+def upgrade(target):
+    t0 = time.perf_counter()
+    try:
+        applied = migrations.upgrade(engine, target)
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
+    for m in applied:
+        print(f"  applied {m.version:04d}_{m.name}")
+    print(f"✅ Schema at version {migrations.current_version(engine)} "
+          f"({len(applied)} migration(s) in {time.perf_counter() - t0:.2f}s)")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Database schema migrations")
+    p.add_argument('command', nargs='?', choices=['upgrade', 'status'], default='upgrade')
+    p.add_argument('--to', type=int, default=None, help='target version for upgrade (default: latest)')
+    args = p.parse_args()
+    if args.command == 'status':
+        status()
+    else:
+        upgrade(args.to)
+
+
+if __name__ == '__main__':
+    main()
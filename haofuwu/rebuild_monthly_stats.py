@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Rebuild the `stats_monthly` rollup used by /api/admin/stats from needs and
+accepted services.
+Usage:
+  python rebuild_monthly_stats.py         # rebuild the rollup in haofuwu.db
+
+Run it after importing data or editing rows by hand; the API keeps the rollup
+up to date on its own.
+"""
+import sys
+import os
+import time
+
+# ensure project root is on sys.path so `backend` imports work
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from backend.database import SessionLocal
+from backend.crud import rebuild_monthly_stats
+
+
+def main():
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        rows = rebuild_monthly_stats(db)
+        print(f"✅ Rebuilt {rows} (month, region) rows in {time.perf_counter() - t0:.2f}s")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Failed to rebuild monthly stats: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
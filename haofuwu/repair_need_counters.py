@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Recompute the denormalised counters on `needs` (response_count, pending_count,
+accepted_service_id) from the `services` table.
+Usage:
+  python repair_need_counters.py          # repair all needs in haofuwu.db
+
+Run it after importing data or editing services by hand; the API keeps the counters
+up to date on its own.
+"""
+import sys
+import os
+import time
+
+# ensure project root is on sys.path so `backend` imports work
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from backend.database import SessionLocal
+from backend.crud import recompute_need_counters
+
+
+def main():
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        updated = recompute_need_counters(db)
+        print(f"✅ Recomputed counters for {updated} needs in {time.perf_counter() - t0:.2f}s")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Failed to recompute need counters: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
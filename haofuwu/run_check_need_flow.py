@@ -37,7 +37,7 @@ def main():
         print('Created need id=', n.id)
 
         # list user1 needs before any service
-        needs_before = crud.get_needs_my_list(db, u1.id)
+        needs_before, _ = crud.get_needs_my_list(db, u1.id)
         print('Needs before count:', len(needs_before), 'ids:', [x.id for x in needs_before])
 
         # create service by user2 for that need
@@ -54,7 +54,7 @@ def main():
         print('Created service id=', s.id, 'for need=', s.need_id)
 
         # list user1 needs after service created
-        needs_after = crud.get_needs_my_list(db, u1.id)
+        needs_after, _ = crud.get_needs_my_list(db, u1.id)
         print('Needs after count:', len(needs_after), 'ids:', [x.id for x in needs_after])
         for item in needs_after:
             print('need', item.id, 'hasResponse=', item.hasResponse)